@@ -6,7 +6,16 @@ from database.models import User, OcrResult, CerResult
 from werkzeug.security import generate_password_hash, check_password_hash
 from routes.user_routes import user_bp
 from routes.ocr_routes import ocr_bp
-from flask import send_from_directory
+from routes.job_routes import job_bp
+from routes.export_routes import export_bp
+from routes.history_routes import history_bp
+from routes.metrics_routes import metrics_bp
+from routes.health_routes import health_bp
+from routes.analytics_routes import analytics_bp
+from routes.file_routes import file_bp
+from routes.capture_routes import capture_bp
+from utils.model_registry import init_models, use_ocr_pool
+import multiprocessing
 import os
 
 app = Flask(__name__)
@@ -19,6 +28,31 @@ db.init_app(app)
 # Register routes
 app.register_blueprint(user_bp)
 app.register_blueprint(ocr_bp)
+app.register_blueprint(job_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(history_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(health_bp)
+app.register_blueprint(analytics_bp)
+app.register_blueprint(file_bp)
+app.register_blueprint(capture_bp)
+
+# ====== โหลดโมเดลตาม MODEL_LOAD_MODE (ไม่บล็อก /login, /list_users ระหว่างโหลดในโหมด background) ======
+# python app.py (debug reloader): process แม่แค่คอยดูไฟล์ — โหลดเฉพาะใน process ลูกที่รับ request จริง
+# OCR pool ใช้ spawn: worker import app.py ซ้ำในชื่อ __mp_main__ — ห้ามโหลดโมเดล / เปิด pool ซ้อนใน worker
+if (__name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true") \
+        and multiprocessing.parent_process() is None:
+    if app.config["OCR_POOL_WORKERS"] > 0:
+        use_ocr_pool(
+            app.config["OCR_POOL_WORKERS"],
+            torch_threads=app.config["OCR_POOL_TORCH_THREADS"],
+            max_inflight=app.config["OCR_POOL_MAX_INFLIGHT"] or None,
+            submit_timeout=app.config["OCR_POOL_SUBMIT_TIMEOUT"],
+            task_timeout=app.config["OCR_POOL_TASK_TIMEOUT"],
+            max_tasks=app.config["OCR_POOL_MAX_TASKS"],
+            max_rss_mb=app.config["OCR_POOL_MAX_RSS_MB"],
+        )
+    init_models(app.config["MODEL_LOAD_MODE"])
 
 @app.route("/")
 def index():
@@ -38,13 +72,6 @@ def list_users():
     users = User.query.all()
     return jsonify([{"id": u.id, "username": u.username, "email": u.email} for u in users])
 
-# ===== เสิร์ฟรูปภาพในโฟลเดอร์ uploads =====
-@app.route('/uploads/<path:filename>')
-def serve_upload(filename):
-    upload_dir = os.path.join(os.path.dirname(__file__), 'uploads')
-    print("[DEBUG] Serving file:", os.path.join(upload_dir, filename))
-    return send_from_directory(upload_dir, filename)
-
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()  # สร้าง table (ถ้าไม่มี)
@@ -0,0 +1,12 @@
+from flask import Flask
+from config import Config
+from database import db
+
+
+def make_app(**overrides):
+    """Flask app ขั้นต่ำสำหรับรัน benchmark (ใช้ current_app.config / db ได้โดยไม่ต้องรัน server)"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(overrides)
+    db.init_app(app)
+    return app
@@ -0,0 +1,212 @@
+"""วัด write path ของ DB เมื่อมี request พร้อมกันหลายตัว: /save_ocr และการบันทึก draft ของ /upload_ocr
+
+เทียบสำเนาเวอร์ชันเดิม (แช่แข็งไว้ด้านล่าง) กับโค้ดปัจจุบันต่อจำนวน thread:
+- save_ocr:     เดิม commit OcrResult → โหลด draft ใหม่ (expire หลัง commit) → commit CerResult
+                ปัจจุบัน CER ก่อนเขียน แล้ว flush + insert ใน transaction เดียว
+- upload_draft: เดิม commit แถวแคช + SUM ขนาดตารางทุกครั้ง แล้ว commit draft แยก
+                ปัจจุบัน แถวแคช + draft commit ครั้งเดียว (ตรวจขนาดแคชทุก EVICT_EVERY ครั้ง)
+รายงาน op/s, commit/s, commit ต่อ op และ p50/p95 latency
+
+รัน (จากโฟลเดอร์ backend):
+    python -m benchmarks.bench_db                                   # SQLite ไฟล์ชั่วคราว
+    python -m benchmarks.bench_db --db mysql+pymysql://u:p@127.0.0.1/ocr_bench --threads 1 8 32
+ฐานข้อมูลที่ระบุด้วย --db ควรเป็นฐานว่างสำหรับ benchmark — ตารางถูกสร้าง (create_all) และลบ (drop_all)
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import make_app
+from config import engine_options
+from database import db
+from database.models import OcrResult
+from routes.ocr_routes import ocr_bp
+from utils.ocr_cache import OcrResultCache
+
+FIELDS = ["id_number", "prefix", "first_name", "last_name", "dob", "address"]
+N_DRAFTS = 200
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _payload(i):
+    return {
+        "user_id": 1,
+        "filename": f"card_{i % N_DRAFTS}.jpg",
+        "id_number": "1103702071561",
+        "prefix": "นาย",
+        "first_name": "สมชาย",
+        "last_name": "ใจดี",
+        "dob": f"{i % 28 + 1} ม.ค. 2530",
+        "address": "12/3 หมู่ที่ 4 ต.สุเทพ อ.เมืองเชียงใหม่ จ.เชียงใหม่",
+    }
+
+
+# ====== สำเนาเวอร์ชันเดิม (ห้ามแก้ — ใช้เป็นค่าอ้างอิง) ======
+def make_legacy_blueprint():
+    from flask import Blueprint, jsonify, request
+
+    from database.models import CerResult
+    from routes.ocr_routes import compute_cer
+
+    bp = Blueprint("legacy_bench", __name__)
+
+    @bp.route("/legacy/save_ocr", methods=["POST"])
+    def legacy_save_ocr():
+        data = request.get_json()
+        filename, user_id = data["filename"], data["user_id"]
+        draft = (
+            OcrResult.query
+            .filter_by(user_id=user_id, filename=filename, is_draft=True)
+            .order_by(OcrResult.id.desc())
+            .first()
+        )
+        ocr_result = OcrResult(
+            user_id=user_id, filename=filename,
+            original_image_path=f"uploads/{filename}", processed_image_path=f"uploads/processed_{filename}",
+            is_draft=False, **{f: data[f] for f in FIELDS},
+        )
+        db.session.add(ocr_result)
+        db.session.commit()
+        field_cer = {f: compute_cer((getattr(draft, f) if draft else "") or "", data.get(f) or "") for f in FIELDS}
+        cer_avg = round(sum(field_cer.values()) / len(field_cer), 4)
+        db.session.add(CerResult(
+            ocr_result_id=ocr_result.id, filename=filename, cer_avg=cer_avg,
+            **{f"cer_{f}": v for f, v in field_cer.items()},
+        ))
+        db.session.commit()
+        return jsonify({"ocr_result_id": ocr_result.id, "cer_avg": cer_avg})
+
+    return bp
+
+
+def legacy_upload_draft(cache, i):
+    from routes.ocr_routes import _build_draft
+
+    data = _payload(i)
+    cache.put(f"{i:064x}", "raw", data, f"uploads/processed_{data['filename']}")   # commit #1
+    cache._evict_db()                                                               # SUM ทุกครั้ง
+    db.session.add(_build_draft(1, data["filename"], data))
+    db.session.commit()                                                             # commit #2
+
+
+def current_upload_draft(cache, i):
+    from routes.ocr_routes import _build_draft, _commit_draft
+
+    data = _payload(i)
+    cache.put(f"{i:064x}", "raw", data, f"uploads/processed_{data['filename']}", commit=False)
+    _commit_draft(_build_draft(1, data["filename"], data), cache)
+
+
+# ====== ตัววัด ======
+class CommitCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.n = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_commit(self, conn):
+        with self._lock:
+            self.n += 1
+
+
+def run(app, counter, fn, n, threads):
+    """เรียก fn(i) n ครั้งจาก threads thread (แต่ละครั้งใน app context ของตัวเอง)"""
+    def one(i):
+        t = time.perf_counter()
+        with app.app_context():
+            fn(i)
+        return time.perf_counter() - t
+
+    commits = counter.n
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as ex:
+        latencies = list(ex.map(one, range(n)))
+    wall = time.perf_counter() - t0
+    commits = counter.n - commits
+    return {
+        "ops_per_sec": n / wall,
+        "commits_per_sec": commits / wall,
+        "commits_per_op": commits / n,
+        "p50_ms": _percentile(latencies, 0.5) * 1e3,
+        "p95_ms": _percentile(latencies, 0.95) * 1e3,
+        "mean_ms": statistics.mean(latencies) * 1e3,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DB write path throughput under concurrency")
+    parser.add_argument("--db", help="SQLAlchemy URI (ไม่ระบุ = SQLite ไฟล์ชั่วคราว)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--n", type=int, default=400, help="จำนวน operation ต่อรอบ")
+    args = parser.parse_args(argv)
+
+    if not args.db:
+        args.db = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_db_'), 'bench.db')}"
+    options = engine_options(args.db)
+    app = make_app(SQLALCHEMY_DATABASE_URI=args.db, SQLALCHEMY_ENGINE_OPTIONS=options)
+    app.register_blueprint(ocr_bp)
+    app.register_blueprint(make_legacy_blueprint())
+    print(f"[DB] {args.db.split('@')[-1]}  engine options {options}")
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # draft ตั้งต้นให้ /save_ocr หาเจอ — insert ทีละชุดด้วย executemany
+        db.session.execute(OcrResult.__table__.insert(), [
+            {"user_id": 1, "filename": f"card_{i}.jpg", "is_draft": True,
+             "id_number": "1103702071560", "first_name": "สมชาย", "last_name": "ใจดี"}
+            for i in range(N_DRAFTS)
+        ])
+        db.session.commit()
+        counter = CommitCounter(db.engine)
+
+    client_lock = threading.local()
+
+    def post(path):
+        def fn(i):
+            client = getattr(client_lock, "client", None)
+            if client is None:
+                client = client_lock.client = app.test_client()
+            resp = client.post(path, json=_payload(i))
+            if resp.status_code != 200:
+                raise RuntimeError(f"{path}: {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+        return fn
+
+    scenarios = {
+        "save_ocr": (post("/legacy/save_ocr"), post("/save_ocr")),
+        "upload_draft": (None, None),
+    }
+    for threads in args.threads:
+        caches = (OcrResultCache("bench-legacy"), OcrResultCache("bench-current"))
+        scenarios["upload_draft"] = (
+            lambda i: legacy_upload_draft(caches[0], threads * 1_000_000 + i),
+            lambda i: current_upload_draft(caches[1], threads * 1_000_000 + i),
+        )
+        for name, (legacy, current) in scenarios.items():
+            base = run(app, counter, legacy, args.n, threads)
+            new = run(app, counter, current, args.n, threads)
+            print(f"[DB] {name:12s} {threads:3d} threads  "
+                  f"legacy {base['ops_per_sec']:8.1f} op/s {base['commits_per_sec']:8.1f} commit/s "
+                  f"({base['commits_per_op']:.2f}/op) p95 {base['p95_ms']:7.1f} ms  →  "
+                  f"current {new['ops_per_sec']:8.1f} op/s {new['commits_per_sec']:8.1f} commit/s "
+                  f"({new['commits_per_op']:.2f}/op) p95 {new['p95_ms']:7.1f} ms  "
+                  f"({new['ops_per_sec'] / base['ops_per_sec']:.2f}x)")
+
+    with app.app_context():
+        db.drop_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""เทียบ label scanner (utils/label_scanner.py) กับ loop หา "ที่อยู่" แบบเดิมบนข้อความ OCR ยาว ๆ
+
+loop เดิม: L.ratio กับทุก token แล้ว text.find(token) ทุกครั้งที่เจอตัวที่ดีกว่า — หาได้ทีละ label
+และคืนตำแหน่งที่ข้อความนั้นปรากฏครั้งแรก (ไม่ใช่ตำแหน่งของ token ที่ match)
+scanner: หาทั้ง 6 label ในรอบเดียวและคืน offset ของ token ที่ match จริง
+
+รัน (จากโฟลเดอร์ backend):
+    python -m benchmarks.bench_labels
+    python -m benchmarks.bench_labels --sizes 100 1000 10000 --repeat 5
+"""
+import argparse
+import random
+import sys
+import time
+
+import Levenshtein as L
+
+from benchmarks.synthetic_cards import card_text, random_truth, FIRST_NAMES, LAST_NAMES, PLACES
+from utils.field_extractor import clean_text, tokenize
+from utils.label_scanner import LABELS, scan_labels
+
+
+def legacy_find(text, label):
+    """สำเนา loop เดิมใน extract_fields_from_text (ใช้ label ใดก็ได้)"""
+    best_ratio, start = 0.6, -1
+    for token in text.split():
+        ratio = L.ratio(token, label)
+        if ratio > best_ratio:
+            best_ratio = ratio
+            start = text.find(token)
+    return start
+
+
+def long_text(n_tokens, rng):
+    """ข้อความบัตรหลายใบต่อกัน + คำอื่นคั่น (เหมือน OCR หน้าเอกสารที่มีบัตรหลายใบ / ข้อความรอบบัตร)"""
+    filler = FIRST_NAMES + LAST_NAMES + [p for place in PLACES for p in place] + ["ที่", "อยู่", "บ้าน", "วัน"]
+    tokens = []
+    while len(tokens) < n_tokens:
+        truth = random_truth(rng)
+        card = f"{card_text(truth)} วันออกบัตร {truth['dob']} วันบัตรหมดอายุ {truth['dob']}"
+        tokens.extend(clean_text(card).split(" "))
+        tokens.extend(rng.choice(filler) for _ in range(rng.randint(5, 40)))
+    return " ".join(tokens[:n_tokens])
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Label scanner vs legacy anchor loop")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="จำนวน token ต่อข้อความ")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    for n in args.sizes:
+        text = long_text(n, rng)
+        tokens = tokenize(text)
+
+        legacy_one = _time(lambda: legacy_find(text, LABELS["address"]), args.repeat)
+        legacy_all = _time(lambda: [legacy_find(text, label) for label in LABELS.values()], args.repeat)
+        scanner = _time(lambda: scan_labels(tokenize(text)), args.repeat)
+
+        # loop เดิมคืนตำแหน่งแรกที่ข้อความของ token นั้นปรากฏ ซึ่งอาจอยู่กลางคำอื่น
+        anchors = scan_labels(tokens)
+        legacy_start = legacy_find(text, LABELS["address"])
+        address = anchors.get("address")
+        same = "same" if address and address.start == legacy_start else "differs"
+        print(f"[LABELS] {n:6d} tokens  legacy(address) {legacy_one * 1e3:8.2f} ms  "
+              f"legacy(6 labels) {legacy_all * 1e3:8.2f} ms  scanner(6 labels) {scanner * 1e3:8.2f} ms  "
+              f"({legacy_all / scanner:.1f}x)  found {len(anchors)}/{len(LABELS)}  address offset {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""วัด throughput ของ OCR process pool เมื่อเพิ่มจำนวน worker (บัตรสังเคราะห์, CPU)
+
+แต่ละจำนวน worker: เปิด pool ใหม่ → รอทุก worker โหลด EasyOCR เสร็จ → ส่งภาพที่ preprocess แล้วพร้อมกัน
+จาก --clients thread แล้ววัดภาพต่อวินาที, p50/p95 latency และ speed-up เทียบกับ worker ตัวเดียว
+
+รัน (จากโฟลเดอร์ backend):
+    python -m benchmarks.bench_pool
+    python -m benchmarks.bench_pool --workers 1 2 4 8 --torch-threads 1 --n 64
+
+ต้องมีโมเดล EasyOCR (~/.EasyOCR) อยู่ในเครื่องแล้ว — ไม่ดาวน์โหลดระหว่างรัน
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OCR_DEVICE", "cpu")
+
+from benchmarks.synthetic_cards import generate
+from routes.ocr_routes import preprocess_gaussian
+from utils.ocr_pool import OcrProcessPool
+
+READY_TIMEOUT_S = 600
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(images, workers, torch_threads, clients):
+    pool = OcrProcessPool(workers, torch_threads, max_inflight=max(clients, workers) * 2,
+                          submit_timeout=READY_TIMEOUT_S).start()
+    try:
+        t0 = time.perf_counter()
+        if not pool.wait_ready(READY_TIMEOUT_S):
+            raise RuntimeError(pool.error or "pool not ready")
+        startup = time.perf_counter() - t0
+
+        def one(img):
+            t = time.perf_counter()
+            pool.readtext(img, detail=0, paragraph=True)
+            return time.perf_counter() - t
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(clients) as ex:
+            latencies = list(ex.map(one, images))
+        wall = time.perf_counter() - t0
+        return {
+            "startup_s": startup,
+            "images_per_sec": len(images) / wall,
+            "p50_ms": _percentile(latencies, 0.5) * 1e3,
+            "p95_ms": _percentile(latencies, 0.95) * 1e3,
+            "stats": pool.stats(),
+        }
+    finally:
+        pool.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR process pool throughput vs worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=0, help="จำนวน request พร้อมกัน (0 = workers x 2)")
+    parser.add_argument("--n", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    images = [preprocess_gaussian(img) for img, _ in generate(args.n, seed=args.seed)]
+    print(f"[POOL] {len(images)} images, {os.cpu_count()} cpus, torch threads per worker = {args.torch_threads}")
+
+    base = None
+    for workers in args.workers:
+        r = run(images, workers, args.torch_threads, args.clients or workers * 2)
+        base = base or r["images_per_sec"]
+        print(f"[POOL] {workers:3d} workers  startup {r['startup_s']:6.1f}s  {r['images_per_sec']:7.2f} img/s "
+              f"({r['images_per_sec'] / base:4.2f}x)  p50 {r['p50_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms  "
+              f"restarts {r['stats']['restarts']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
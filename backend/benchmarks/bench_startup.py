@@ -0,0 +1,141 @@
+"""วัดเวลา start server และ RSS ต่อ worker ในแต่ละ MODEL_LOAD_MODE
+
+แต่ละโหมดรันใน process ใหม่ (python -m benchmarks.bench_startup --child <mode>) แล้ววัด
+- import_s:         import app.py (สร้าง Flask app + เรียก init_models)
+- first_response_s: จากเริ่ม import จนได้ /healthz 200 (เท่ากับเวลาที่ /login เริ่มตอบได้)
+- ready_s:          จากเริ่ม import จน /readyz ตอบ 200 (โมเดลพร้อม)
+- rss_mb:           RSS หลัง ready
+โหมด preload วัดเพิ่ม: fork worker ออกไป --workers ตัว (เหมือน gunicorn --preload) แล้วอ่าน
+/proc/<pid>/smaps_rollup ของแต่ละ worker — Pss คือส่วนที่ worker นั้น "เป็นเจ้าของจริง" หลังหารหน้าที่แชร์กัน
+
+รัน (จากโฟลเดอร์ backend, Linux):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --modes background preload --workers 4
+
+ใช้ SQLALCHEMY_DATABASE_URI จาก .env (ไม่ตั้งไว้จะใช้ sqlite ในหน่วยความจำ)
+ใช้งานจริงแบบแชร์ weight:  MODEL_LOAD_MODE=preload OCR_DEVICE=cpu gunicorn --preload -w 4 app:app
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+READY_TIMEOUT_S = 600
+
+
+def _smaps_rollup(pid):
+    """คืน {Rss, Pss, Shared_Clean, Shared_Dirty, Private_Clean, Private_Dirty} เป็น MB"""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                out[key] = round(int(rest.split()[0]) / 1024, 1)
+    return out
+
+
+def _fork_workers(app, n):
+    """fork worker n ตัวหลังโหลดโมเดลแล้ว ให้แต่ละตัวเรียก /readyz (แตะโมเดล / DB) แล้วรออ่าน smaps"""
+    children = []
+    for _ in range(n):
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            with app.test_client() as client:
+                client.get("/readyz")
+            os.write(w, b"1")
+            time.sleep(60)
+            os._exit(0)
+        os.close(w)
+        children.append((pid, r))
+
+    results = []
+    for pid, r in children:
+        os.read(r, 1)
+        results.append(_smaps_rollup(pid))
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+    return results
+
+
+def child(mode, workers):
+    t0 = time.perf_counter()
+    from app import app
+    import_s = time.perf_counter() - t0
+
+    from utils.model_registry import current_rss_mb, registry
+    with app.test_client() as client:
+        assert client.get("/healthz").status_code == 200
+        first_response_s = time.perf_counter() - t0
+
+        if mode == "lazy":
+            # โหมด lazy โมเดลโหลดตอน request แรกที่ใช้ — จำลองด้วยการ warm-up ตรง ๆ
+            try:
+                registry.warmup_all()
+            except Exception as e:
+                print("[ERROR lazy load]", e, file=sys.stderr)
+        deadline = time.perf_counter() + READY_TIMEOUT_S
+        ready_s = None
+        while time.perf_counter() < deadline:
+            resp = client.get("/readyz")
+            if resp.status_code == 200 and registry.ready():
+                ready_s = time.perf_counter() - t0
+                break
+            if any(m["state"] == "failed" for m in resp.get_json()["models"].values()):
+                break
+            time.sleep(0.1)
+
+    result = {
+        "mode": mode,
+        "import_s": round(import_s, 3),
+        "first_response_s": round(first_response_s, 3),
+        "ready_s": round(ready_s, 3) if ready_s is not None else None,
+        "errors": {name: s["error"] for name, s in registry.stats()["models"].items() if s["error"]},
+        "rss_mb": current_rss_mb(),
+    }
+    if mode == "preload" and workers:
+        result["workers"] = _fork_workers(app, workers)
+    print(json.dumps(result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time / RSS per MODEL_LOAD_MODE")
+    parser.add_argument("--modes", nargs="+", default=["lazy", "background", "preload"])
+    parser.add_argument("--workers", type=int, default=2, help="จำนวน worker ที่ fork ในโหมด preload")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.workers)
+        return 0
+
+    for mode in args.modes:
+        # Config อ่าน env ตอน import (package benchmarks import config ก่อนถึง child) จึงต้องตั้งจากตรงนี้
+        env = dict(os.environ, MODEL_LOAD_MODE=mode)
+        env.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite:///:memory:")
+        env.setdefault("OCR_DEVICE", "cpu")
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, "--workers", str(args.workers)],
+            capture_output=True, text=True, env=env,
+        )
+        if proc.returncode != 0:
+            print(f"[STARTUP] {mode}: failed\n{proc.stderr.strip()[-2000:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        ready = f"{r['ready_s']:7.3f}s" if r["ready_s"] is not None else "  never"
+        print(f"[STARTUP] {mode:10s} import {r['import_s']:7.3f}s  first response {r['first_response_s']:7.3f}s  "
+              f"ready {ready}  rss {r['rss_mb']:8.1f} MB")
+        for name, error in r["errors"].items():
+            print(f"[STARTUP]   {name} failed to load: {error}")
+        for k, w in enumerate(r.get("workers", [])):
+            print(f"[STARTUP]   worker {k}: rss {w['Rss']:8.1f} MB  pss {w['Pss']:8.1f} MB  "
+                  f"shared {w['Shared_Clean'] + w['Shared_Dirty']:8.1f} MB  "
+                  f"private {w['Private_Clean'] + w['Private_Dirty']:8.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""Load test ทั้งแอป (app.py) ด้วย OCR ปลอม — วางแผน capacity ได้โดยไม่ต้องมีโมเดลจริง
+
+- เปิด app.py ใน process นี้บน werkzeug (threaded) + SQLite ไฟล์ชั่วคราว, โมเดลเป็น StubReader / StubNer
+  (benchmarks/stub_ocr.py) ที่หน่วงเวลาตาม --ocr-latency และทำพร้อมกันได้ --ocr-slots งาน
+- client --concurrency thread ยิง HTTP จริงแบบ closed loop ตามสัดส่วน --mix
+  (upload = /upload_ocr, save = /save_ocr, history = /get_ocr_history, export = /export_results)
+- รายงานต่อ endpoint: throughput, p50/p95/p99 latency, อัตรา error และ DB contention
+  (เวลา SQL ต่อ request — รวมเวลารอ lock ของ SQLite —, จำนวน statement และ error "database is locked")
+- บันทึกผลเป็น JSON แล้วเทียบกับ baseline ได้ (--baseline / --fail-on-regression) แบบเดียวกับ run_bench
+
+รัน (จากโฟลเดอร์ backend):
+    python -m benchmarks.load_test --duration 30 --concurrency 16 --out benchmarks/results/load_latest.json
+    python -m benchmarks.load_test --ocr-latency 0.2:0.8 --ocr-slots 2 --mix upload=5,save=3,history=3,export=1
+    python -m benchmarks.load_test --ocr-latency-samples latencies.json     # เวลา OCR จริง (list วินาที)
+    python -m benchmarks.load_test --baseline benchmarks/results/load_baseline.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib import error, request as urlrequest
+
+from benchmarks.replay_frames import _multipart
+from benchmarks.stub_ocr import StubReader, make_images, make_texts, parse_latency, register_stubs
+
+ENDPOINTS = ("upload", "save", "history", "export")
+# ชื่อ endpoint ของ Flask → ชื่อในรายงาน (แยก DB time ตาม request.endpoint)
+FLASK_ENDPOINTS = {
+    "ocr_bp.upload_ocr": "upload",
+    "ocr_bp.save_ocr": "save",
+    "history_bp.get_ocr_history": "history",
+    "export_bp.export_results": "export",
+}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"--mix endpoints must be in {ENDPOINTS}, got {name!r}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ====== เปิดแอป ======
+def start_app(tmp, engine):
+    """import app.py ด้วย Config ที่ชี้ไป SQLite / uploads ชั่วคราว แล้วเปิด werkzeug ใน thread — คืน (app, base_url, server)"""
+    from config import Config, engine_options
+
+    uri = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+    overrides = {
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options(uri),
+        "UPLOAD_FOLDER": os.path.join(tmp, "uploads"),
+        "MODEL_LOAD_MODE": "lazy",     # โมเดลปลอมโหลดตอน request แรก
+        "OCR_POOL_WORKERS": 0,
+        "OCR_ENGINE": engine,
+        "METRICS_ATTACH_TIMINGS": False,
+    }
+    for key, value in overrides.items():
+        setattr(Config, key, value)
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):   # ไม่พิมพ์ access log ทุก request
+            pass
+
+    import app as server_module
+    from database import db
+
+    app = server_module.app
+    with app.app_context():
+        db.create_all()
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name="load-test-server", daemon=True).start()
+    return app, f"http://127.0.0.1:{server.server_port}", server
+
+
+class DbProbe:
+    """เวลา SQL / จำนวน statement / error lock ต่อ endpoint (ผ่าน SQLAlchemy event ของ engine ของแอป)"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.stats = {name: {"sql_seconds": 0.0, "statements": 0, "lock_errors": 0} for name in ENDPOINTS}
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    @staticmethod
+    def _endpoint():
+        from flask import has_request_context, request
+
+        return FLASK_ENDPOINTS.get(request.endpoint) if has_request_context() else None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["load_test_start"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("load_test_start", None)
+        name = self._endpoint()
+        if start is None or name is None:
+            return
+        with self._lock:
+            self.stats[name]["sql_seconds"] += time.perf_counter() - start
+            self.stats[name]["statements"] += 1
+
+    def _error(self, ctx):
+        name = self._endpoint()
+        if name is not None and "locked" in str(ctx.original_exception).lower():
+            with self._lock:
+                self.stats[name]["lock_errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(s) for name, s in self.stats.items()}
+
+
+# ====== client ======
+class LoadClient:
+    def __init__(self, base_url, images, users):
+        self.base_url = base_url
+        self.images = images
+        self.users = users
+        self._lock = threading.Lock()
+        self._next_image = 0
+        self.uploaded = {u: [] for u in users}   # user_id → filename ที่มี draft แล้ว
+
+    def _call(self, method, path, body=None, content_type=None):
+        req = urlrequest.Request(self.base_url + path, data=body, method=method,
+                                 headers={"Content-Type": content_type} if content_type else {})
+        try:
+            with urlrequest.urlopen(req, timeout=120) as resp:
+                payload = resp.read()   # อ่านจนจบ (export เป็น stream)
+                return resp.status, payload
+        except error.HTTPError as e:
+            return e.code, e.read()
+
+    def upload(self, rng, user_id=None):
+        with self._lock:
+            i = self._next_image % len(self.images)   # วนครบรอบแล้วจะเป็น cache hit
+            self._next_image += 1
+        user_id = user_id or rng.choice(self.users)
+        filename = f"load_{i:05d}.jpg"
+        body, content_type = _multipart({"user_id": user_id}, [("file", filename, self.images[i])])
+        status, payload = self._call("POST", "/upload_ocr", body, content_type)
+        if status == 200:
+            with self._lock:
+                self.uploaded[user_id].append(filename)
+        return status
+
+    def save(self, rng, user_id=None):
+        user_id = user_id or rng.choice(self.users)
+        with self._lock:
+            files = self.uploaded[user_id]
+            filename = rng.choice(files) if files else None
+        if filename is None:
+            return self.upload(rng, user_id)
+        data = {"user_id": user_id, "filename": filename, "id_number": "1103702071561", "prefix": "นาย",
+                "first_name": "สมชาย", "last_name": "ใจดี", "dob": "12 ม.ค. 2530",
+                "address": "12/3 หมู่ที่ 4 ต.สุเทพ อ.เมืองเชียงใหม่ จ.เชียงใหม่"}
+        return self._call("POST", "/save_ocr", json.dumps(data).encode(), "application/json")[0]
+
+    def history(self, rng):
+        return self._call("GET", f"/get_ocr_history/{rng.choice(self.users)}")[0]
+
+    def export(self, rng):
+        return self._call("GET", f"/export_results/{rng.choice(self.users)}?status=all")[0]
+
+
+def run_load(client, mix, concurrency, duration, max_requests, seed):
+    """closed loop: แต่ละ thread สุ่ม endpoint ตาม mix แล้วยิงทันทีที่ request ก่อนหน้าตอบกลับ"""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    results = {name: {"latencies": [], "errors": 0, "statuses": {}} for name in names}
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker(k):
+        rng = random.Random(seed * 1000 + k)
+        while time.perf_counter() < deadline:
+            with lock:
+                if max_requests and issued[0] >= max_requests:
+                    return
+                issued[0] += 1
+            name = rng.choices(names, weights)[0]
+            t = time.perf_counter()
+            try:
+                status = getattr(client, name)(rng)
+            except Exception as e:
+                print(f"[LOAD] {name} failed: {e}")
+                status = "exception"
+            elapsed = time.perf_counter() - t
+            with lock:
+                r = results[name]
+                r["latencies"].append(elapsed)
+                r["statuses"][str(status)] = r["statuses"].get(str(status), 0) + 1
+                if status != 200:
+                    r["errors"] += 1
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,), name=f"load-client-{k}") for k in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - t0
+
+
+def summarize(results, wall, db_stats):
+    endpoints = {}
+    for name, r in results.items():
+        lat = r["latencies"]
+        n = len(lat)
+        db = db_stats.get(name, {})
+        endpoints[name] = {
+            "requests": n,
+            "rps": round(n / wall, 2) if wall else None,
+            "p50_ms": round(_percentile(lat, 0.5) * 1e3, 2) if n else None,
+            "p95_ms": round(_percentile(lat, 0.95) * 1e3, 2) if n else None,
+            "p99_ms": round(_percentile(lat, 0.99) * 1e3, 2) if n else None,
+            "error_rate": round(r["errors"] / n, 4) if n else None,
+            "statuses": r["statuses"],
+            "db_ms_per_request": round(db.get("sql_seconds", 0.0) / n * 1e3, 2) if n else None,
+            "db_share": round(db.get("sql_seconds", 0.0) / sum(lat), 4) if n and sum(lat) else None,
+            "statements_per_request": round(db.get("statements", 0) / n, 2) if n else None,
+            "db_lock_errors": db.get("lock_errors", 0),
+        }
+    total = sum(len(r["latencies"]) for r in results.values())
+    return {
+        "endpoints": endpoints,
+        "total": {
+            "requests": total,
+            "rps": round(total / wall, 2) if wall else None,
+            "error_rate": round(sum(r["errors"] for r in results.values()) / total, 4) if total else None,
+            "wall_s": round(wall, 2),
+        },
+    }
+
+
+# ====== เทียบกับ baseline ======
+def compare(current, baseline, tolerance):
+    """regression: p95 ช้าลงหรือ rps ลดลงเกิน tolerance, หรืออัตรา error เพิ่มขึ้นเกิน 1 จุด"""
+    regressions = []
+    for name, stats in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base or not stats["requests"] or not base.get("requests"):
+            continue
+        p95 = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps = (stats["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        line = (f"{name:8s} p95 {base['p95_ms']:9.1f} → {stats['p95_ms']:9.1f} ms ({p95:+.1%})  "
+                f"rps {base['rps']:7.2f} → {stats['rps']:7.2f} ({rps:+.1%})  "
+                f"errors {base['error_rate']:.2%} → {stats['error_rate']:.2%}")
+        print(line)
+        if p95 > tolerance or -rps > tolerance or stats["error_rate"] - base["error_rate"] > 0.01:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Flask app with a stub OCR reader")
+    parser.add_argument("--concurrency", type=int, default=8, help="จำนวน client พร้อมกัน")
+    parser.add_argument("--duration", type=float, default=20.0, help="วินาที")
+    parser.add_argument("--requests", type=int, default=0, help="หยุดเมื่อครบจำนวนนี้ (0 = ตาม --duration)")
+    parser.add_argument("--mix", default="upload=4,save=2,history=3,export=1", help="สัดส่วน endpoint")
+    parser.add_argument("--ocr-latency", default="0.3", help='วินาทีต่อการอ่าน: "0.3" หรือ "0.1:0.6" (uniform)')
+    parser.add_argument("--ocr-latency-samples", help="ไฟล์ JSON list ของเวลา OCR จริง (วินาที) — สุ่มจากนี้แทน")
+    parser.add_argument("--ocr-slots", type=int, default=1, help="OCR ที่ทำพร้อมกันได้ (1 = โมเดลตัวเดียวบน CPU)")
+    parser.add_argument("--engine", default="easyocr", choices=["easyocr", "cascade"],
+                        help="OCR_ENGINE (cascade ใช้ tesseract จริงถ้ามีในเครื่อง)")
+    parser.add_argument("--images", type=int, default=500, help="จำนวนภาพไม่ซ้ำ — อัปโหลดเกินนี้จะเป็น cache hit")
+    parser.add_argument("--texts", help="ไฟล์ JSON list ของข้อความ OCR สำเร็จรูป (ไม่ระบุ = บัตรสังเคราะห์)")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmarks/results/load_latest.json")
+    parser.add_argument("--baseline", help="ไฟล์ JSON ผลครั้งก่อนสำหรับเทียบ")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="ยอมให้ p95 / rps แย่ลงได้เท่าไร (0.15 = 15%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    samples = None
+    if args.ocr_latency_samples:
+        with open(args.ocr_latency_samples, encoding="utf-8") as f:
+            samples = [float(x) for x in json.load(f)]
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = json.load(f)
+    else:
+        texts = make_texts(args.images, args.seed)
+    reader = StubReader(texts, parse_latency(args.ocr_latency, samples), args.ocr_slots, args.seed)
+    register_stubs(reader)
+
+    tmp = tempfile.mkdtemp(prefix="load_test_")
+    app, base_url, server = start_app(tmp, args.engine)
+    from database import db
+    from database.models import User
+
+    with app.app_context():
+        users = [User(username=f"load{i}", email=f"load{i}@example.com", password_hash="-") for i in range(args.users)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+        probe = DbProbe(db.engine)
+
+    client = LoadClient(base_url, make_images(args.images), user_ids)
+    # ให้ทุก user มี draft + ผลที่บันทึกแล้วก่อนเริ่มวัด (history / export / save มีข้อมูล)
+    rng = random.Random(args.seed)
+    for user_id in user_ids:
+        client.upload(rng, user_id)
+        client.save(rng, user_id)
+    warm = probe.snapshot()
+
+    print(f"[LOAD] {base_url}  concurrency {args.concurrency}  mix {mix}  "
+          f"ocr latency {'samples' if samples else args.ocr_latency}s x {args.ocr_slots} slots")
+    results, wall = run_load(client, mix, args.concurrency, args.duration, args.requests, args.seed)
+    server.shutdown()
+
+    db_stats = {
+        name: {k: s[k] - warm[name][k] for k in s}
+        for name, s in probe.snapshot().items()
+    }
+    report = summarize(results, wall, db_stats)
+    report["meta"] = {
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": mix,
+        "ocr_latency": args.ocr_latency if not samples else f"samples({len(samples)})",
+        "ocr_slots": args.ocr_slots,
+        "ocr_calls": reader.calls,
+        "engine": args.engine,
+        "images": args.images,
+        "users": args.users,
+        "database": "sqlite",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    for name, s in report["endpoints"].items():
+        if not s["requests"]:
+            continue
+        print(f"[LOAD] {name:8s} {s['requests']:6d} req {s['rps']:8.2f} rps  "
+              f"p50 {s['p50_ms']:8.1f}  p95 {s['p95_ms']:8.1f}  p99 {s['p99_ms']:8.1f} ms  "
+              f"errors {s['error_rate']:.2%}  db {s['db_ms_per_request']:6.1f} ms/req "
+              f"({s['db_share']:.1%}, {s['statements_per_request']} stmt, {s['db_lock_errors']} locked)")
+    t = report["total"]
+    print(f"[LOAD] total    {t['requests']:6d} req {t['rps']:8.2f} rps  errors {t['error_rate']:.2%}  "
+          f"in {t['wall_s']} s  ({reader.calls} OCR calls)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"[LOAD] wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        # เทียบได้เฉพาะเมื่อรูปแบบโหลดเหมือนกัน
+        for key in ("concurrency", "mix", "ocr_latency", "ocr_slots", "engine", "images", "users"):
+            if baseline.get("meta", {}).get(key) != report["meta"][key]:
+                print(f"[LOAD] warning: {key} differs from baseline "
+                      f"({baseline.get('meta', {}).get(key)} → {report['meta'][key]})")
+        regressions = compare(report, baseline, args.tolerance)
+        for r in regressions:
+            print("[REGRESSION]", r)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
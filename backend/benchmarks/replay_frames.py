@@ -0,0 +1,103 @@
+"""ส่งลำดับเฟรมกล้องที่บันทึกไว้ในไดเรกทอรีเข้า /upload_ocr_frames แล้วสรุปผล (เฟรมที่เลือก, คะแนน, เวลา)
+
+รัน (จากโฟลเดอร์ backend):
+    python -m benchmarks.replay_frames path/to/frames/                         # in-process, SQLite ชั่วคราว
+    python -m benchmarks.replay_frames path/to/frames/ --mode fields
+    python -m benchmarks.replay_frames path/to/frames/ --url http://127.0.0.1:5000 --user-id 1
+in-process ใช้โมเดลจริงจาก model registry (EasyOCR / ThaiNER) เหมือน server
+ลองให้คะแนนอย่างเดียวโดยไม่ OCR: python -m utils.frame_select path/to/frames/
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from urllib import error, request as urlrequest
+
+from utils.frame_select import load_frames
+
+
+def _multipart(fields, files):
+    """สร้าง body แบบ multipart/form-data — files = [(field, filename, bytes)]"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, data in files:
+        parts.append((f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                      f'Content-Type: application/octet-stream\r\n\r\n').encode() + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def post_remote(url, fields, frames):
+    body, content_type = _multipart(fields, [("frames", name, raw) for name, raw in frames])
+    req = urlrequest.Request(url.rstrip("/") + "/upload_ocr_frames", data=body,
+                             headers={"Content-Type": content_type}, method="POST")
+    try:
+        with urlrequest.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def post_local(fields, frames):
+    import io
+
+    from benchmarks import make_app
+    from database import db
+    from routes.capture_routes import capture_bp
+    from routes.ocr_routes import ocr_bp
+
+    tmp = tempfile.mkdtemp(prefix="replay_frames_")
+    app = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmp, 'replay.db')}",
+                   SQLALCHEMY_ENGINE_OPTIONS={}, UPLOAD_FOLDER=os.path.join(tmp, "uploads"))
+    app.register_blueprint(ocr_bp)
+    app.register_blueprint(capture_bp)
+    with app.app_context():
+        db.create_all()
+    data = dict(fields, frames=[(io.BytesIO(raw), name) for name, raw in frames])
+    resp = app.test_client().post("/upload_ocr_frames", data=data, content_type="multipart/form-data")
+    return resp.status_code, resp.get_json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded camera burst against /upload_ocr_frames")
+    parser.add_argument("path", help="ไดเรกทอรีที่มีเฟรม (.jpg / .png) เรียงตามชื่อไฟล์")
+    parser.add_argument("--url", help="base URL ของ server (ไม่ระบุ = in-process)")
+    parser.add_argument("--user-id", default="1")
+    parser.add_argument("--mode", choices=["frame", "fields"], default="frame")
+    parser.add_argument("--force", action="store_true", help="OCR เฟรมที่ดีที่สุดแม้ไม่มีเฟรมที่ใช้ได้")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.path)
+    if not frames:
+        print(f"[REPLAY] ไม่พบไฟล์ภาพใน {args.path}")
+        return 1
+    fields = {"user_id": args.user_id, "mode": args.mode}
+    if args.force:
+        fields["force"] = "1"
+
+    t0 = time.perf_counter()
+    status, body = post_remote(args.url, fields, frames) if args.url else post_local(fields, frames)
+    elapsed = time.perf_counter() - t0
+
+    for f in body.get("frames", []):
+        print(f"[REPLAY] {f.get('filename', ''):30s} " + json.dumps({k: v for k, v in f.items() if k != "filename"}))
+    selected = body.get("selected")
+    print(f"[REPLAY] HTTP {status} in {elapsed * 1e3:.0f} ms — {len(frames)} frames, "
+          f"{len(body.get('frames', []))} scored, selected "
+          f"{frames[selected][0] if selected is not None else None}")
+    if body.get("field_frames"):
+        print(f"[REPLAY] field crops: {json.dumps(body['field_frames'])}")
+    if status == 200:
+        print(f"[REPLAY] result: {json.dumps(body.get('result'), ensure_ascii=False)}")
+    else:
+        print(f"[REPLAY] error: {body.get('error')}")
+    return 0 if status == 200 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
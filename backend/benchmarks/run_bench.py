@@ -0,0 +1,206 @@
+"""Benchmark แยกทีละ stage + end-to-end บนบัตรสังเคราะห์ (CPU, offline)
+
+รัน (จากโฟลเดอร์ backend):
+    python -m benchmarks.run_bench --n 50 --out benchmarks/results/latest.json
+    python -m benchmarks.run_bench --n 50 --baseline benchmarks/baseline.json --fail-on-regression
+    python -m benchmarks.run_bench --no-ocr            # เฉพาะ stage ที่ไม่ใช้ EasyOCR
+    python -m benchmarks.run_bench --n 50 --engines easyocr cascade   # p50 / CER ต่อ OCR engine
+
+ต้องมีโมเดล EasyOCR (~/.EasyOCR) และ ThaiNER (pythainlp data) อยู่ในเครื่องแล้ว — ไม่ดาวน์โหลดระหว่างรัน
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("OCR_DEVICE", "cpu")
+
+from benchmarks import make_app
+from benchmarks.synthetic_cards import generate, card_text
+from utils.model_registry import current_rss_mb
+
+FIELDS = ["id_number", "prefix", "first_name", "last_name", "dob", "address"]
+MEMORY_SAMPLES = 5  # จำนวนรายการที่วัด peak memory (tracemalloc ทำให้ช้า จึงแยกรอบ)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(fn, items):
+    """รัน fn กับทุก item — คืน (สถิติ latency/throughput/memory, ผลลัพธ์ของแต่ละ item)"""
+    outputs, latencies = [], []
+    rss_before = current_rss_mb()
+    wall0 = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - wall0
+    rss_after = current_rss_mb()
+
+    tracemalloc.start()
+    for item in items[:MEMORY_SAMPLES]:
+        fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = [x * 1000 for x in latencies]
+    return {
+        "n": len(items),
+        "mean_ms": round(statistics.mean(ms), 3),
+        "p50_ms": round(_percentile(ms, 0.5), 3),
+        "p95_ms": round(_percentile(ms, 0.95), 3),
+        "max_ms": round(max(ms), 3),
+        "throughput_per_s": round(len(items) / wall, 2) if wall > 0 else None,
+        "peak_traced_mb": round(peak / (1024 * 1024), 3),
+        "rss_delta_mb": round(rss_after - rss_before, 2),
+    }, outputs
+
+
+def cer_per_field(predictions, truths):
+    from routes.ocr_routes import compute_cer
+    out = {}
+    for f in FIELDS:
+        values = [compute_cer(p.get(f, ""), t[f]) for p, t in zip(predictions, truths)]
+        out[f] = round(statistics.mean(values), 4)
+    out["avg"] = round(statistics.mean(out[f] for f in FIELDS), 4)
+    return out
+
+
+def run(n, seed, font, with_ocr, engines=()):
+    from flask import current_app
+    from routes import ocr_routes
+    from routes.ocr_routes import preprocess_gaussian, extract_fields_from_text, run_ocr
+    from utils.card_detect import locate_card
+    from utils.model_registry import get_reader
+    from utils.normalizer import normalize_pred
+    from utils.preprocess import preprocess_adaptive
+
+    samples = generate(n, seed=seed, font_path=font)
+    images = [img for img, _ in samples]
+    truths = [t for _, t in samples]
+    texts = [card_text(t) for t in truths]
+
+    results = {"stages": {}, "cer": {}}
+    stages = results["stages"]
+
+    stages["preprocess_gaussian"], _ = measure(preprocess_gaussian, images)
+    stages["preprocess_adaptive"], adaptive = measure(preprocess_adaptive, images)
+    results["recipes"] = {}
+    for _, _, recipe, _ in adaptive:
+        results["recipes"][recipe] = results["recipes"].get(recipe, 0) + 1
+    stages["card_detect"], _ = measure(locate_card, images)
+    stages["normalize_pred"], _ = measure(
+        lambda t: {f: normalize_pred(f, t[f]) for f in FIELDS}, truths)
+    stages["extract_fields_from_text"], extracted = measure(extract_fields_from_text, texts)
+    results["cer"]["extract_fields_from_text"] = cer_per_field(extracted, truths)
+
+    if with_ocr:
+        reader = get_reader()
+        processed = [preprocess_gaussian(img) for img in images]
+        stages["readtext_full"], _ = measure(
+            lambda p: reader.readtext(p, detail=0, paragraph=True), processed)
+        stages["end_to_end"], e2e = measure(run_ocr, images)
+        results["cer"]["end_to_end"] = cer_per_field([data for _, _, data, _ in e2e], truths)
+        results["card_modes"] = {
+            mode: sum(1 for *_, card in e2e if card["mode"] == mode) for mode in ("roi", "full")
+        }
+        results["preprocess_retries"] = sum(1 for *_, card in e2e if card["preprocess"]["retried"])
+
+        # --- end-to-end ต่อ OCR engine (เทียบ p50 / CER ของ cascade กับ EasyOCR ล้วน) ---
+        default_engine = current_app.config["OCR_ENGINE"]
+        for name in engines:
+            current_app.config["OCR_ENGINE"] = name
+            ocr_routes.ocr_engine = None
+            key = f"end_to_end_{name}"
+            stages[key], e2e = measure(run_ocr, images)
+            results["cer"][key] = cer_per_field([data for _, _, data, _ in e2e], truths)
+            results.setdefault("engine_fields", {})[name] = _engine_counts(e2e)
+        current_app.config["OCR_ENGINE"] = default_engine
+        ocr_routes.ocr_engine = None
+    return results
+
+
+def _engine_counts(e2e):
+    """จำนวน ROI ที่แต่ละ engine อ่าน ต่อฟิลด์ → {field: {engine: n}}"""
+    counts = {}
+    for *_, card in e2e:
+        for field, engine in card["engines"].items():
+            counts.setdefault(field, {}).setdefault(engine, 0)
+            counts[field][engine] += 1
+    return counts
+
+
+# ====== เทียบกับ baseline ======
+def compare(current, baseline, tolerance):
+    """คืนรายการ regression: p50 ช้าลงเกิน tolerance หรือ CER เพิ่มขึ้นเกิน 0.01"""
+    regressions = []
+    for stage, stats in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        change = (stats["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+        line = f"{stage:28s} p50 {base['p50_ms']:10.3f} → {stats['p50_ms']:10.3f} ms ({change:+.1%})"
+        print(line)
+        if change > tolerance:
+            regressions.append(line)
+    for group, cers in current["cer"].items():
+        base = baseline.get("cer", {}).get(group, {})
+        for field, value in cers.items():
+            if field in base and value - base[field] > 0.01:
+                regressions.append(f"CER {group}.{field}: {base[field]} → {value}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Thai ID OCR per-stage benchmark")
+    parser.add_argument("--n", type=int, default=30, help="จำนวนบัตรสังเคราะห์")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", help="path ของฟอนต์ไทย (.ttf)")
+    parser.add_argument("--no-ocr", action="store_true", help="ข้าม stage ที่ใช้ EasyOCR")
+    parser.add_argument("--engines", nargs="*", default=[], choices=["easyocr", "tesseract", "cascade"],
+                        help="วัด end-to-end เพิ่มต่อ OCR engine (เช่น --engines easyocr cascade)")
+    parser.add_argument("--out", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="ไฟล์ JSON ผลครั้งก่อนสำหรับเทียบ")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="ยอมให้ p50 ช้าลงได้กี่เท่า (0.10 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    with make_app().app_context():
+        results = run(args.n, args.seed, args.font, with_ocr=not args.no_ocr, engines=args.engines)
+
+    results["meta"] = {
+        "n": args.n,
+        "seed": args.seed,
+        "with_ocr": not args.no_ocr,
+        "engines": args.engines,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"[BENCH] wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print("[REGRESSION]", r)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""EasyOCR / ThaiNER ปลอมสำหรับ load test — ใช้ pipeline จริงทั้งหมด ยกเว้นตัวโมเดล
+
+StubReader คืนข้อความสำเร็จรูปต่อภาพ และหน่วงเวลาแทนการ inference:
+- latency: "0.3" (คงที่, วินาที), "0.1:0.6" (สุ่ม uniform) หรือ list ของเวลาที่วัดจริง (สุ่มแบบใส่คืน)
+- slots: จำนวน OCR ที่ทำพร้อมกันได้ (จำลองโมเดลตัวเดียวบน CPU = 1) — request ที่เกินต้องรอคิว
+- ข้อความเลือกจากความกว้างของภาพ: ภาพที่ make_images สร้างกว้าง BASE_WIDTH + i → texts[i]
+  (ความกว้างไม่เปลี่ยนผ่าน decode / preprocess แบบ OCR ทั้งภาพ) ภาพอื่นใช้ texts[ความกว้าง % len(texts)]
+"""
+import random
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic_cards import card_text, random_truth
+from utils.model_registry import registry
+
+BASE_WIDTH = 900
+IMAGE_HEIGHT = 560
+
+
+def parse_latency(spec, samples=None):
+    """คืนฟังก์ชัน rng → วินาที จาก spec ("0.3" หรือ "0.1:0.6") หรือ samples (list ของวินาที)"""
+    if samples:
+        return lambda rng: rng.choice(samples)
+    lo, _, hi = str(spec).partition(":")
+    lo = float(lo)
+    if not hi:
+        return lambda rng: lo
+    hi = float(hi)
+    return lambda rng: rng.uniform(lo, hi)
+
+
+class StubReader:
+    """หน้าตาเหมือน easyocr.Reader (readtext / readtext_batched) — ไม่ใช้ torch"""
+
+    def __init__(self, texts, latency=lambda rng: 0.0, slots=1, seed=0):
+        self.texts = list(texts)
+        self.latency = latency
+        self._slots = threading.BoundedSemaphore(slots)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    def _text_for(self, img):
+        i = img.shape[1] - BASE_WIDTH
+        return self.texts[i if 0 <= i < len(self.texts) else img.shape[1] % len(self.texts)]
+
+    def readtext(self, img, detail=0, paragraph=True, **kwargs):
+        with self._rng_lock:
+            delay = self.latency(self._rng)
+            self.calls += 1
+        with self._slots:
+            time.sleep(delay)
+        return self._text_for(img).split("\n")
+
+    def readtext_batched(self, images, detail=0, paragraph=True, **kwargs):
+        return [self.readtext(img) for img in images]
+
+
+class StubNer:
+    """แทน pythainlp NER — ทุก token ได้ tag "O" (ชื่อ-นามสกุลแยกด้วย regex ของ field_extractor แทน)"""
+
+    def tag(self, text):
+        return [(tok, "O") for tok in text.split()]
+
+
+def register_stubs(reader, ner=None):
+    """แทน loader ใน model registry — ต้องเรียกก่อน request แรก (ก่อนโมเดลถูกโหลด)"""
+    registry.register("easyocr_th", lambda: reader, warmup=None, version="stub-reader")
+    registry.register("thai_ner", lambda: ner or StubNer(), warmup=None, version="stub-ner")
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [card_text(random_truth(rng)) for _ in range(n)]
+
+
+def make_images(n):
+    """ภาพ JPEG n ภาพที่เนื้อไฟล์ไม่ซ้ำกัน (ไม่มีขอบบัตร → OCR ทั้งภาพ) กว้าง BASE_WIDTH + i"""
+    images = []
+    for i in range(n):
+        img = np.full((IMAGE_HEIGHT, BASE_WIDTH + i, 3), 235, np.uint8)
+        cv2.putText(img, f"load test {i}", (40, IMAGE_HEIGHT // 2), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (40, 40, 40), 2)
+        ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        images.append(encoded.tobytes())
+    return images
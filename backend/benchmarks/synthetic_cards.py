@@ -0,0 +1,140 @@
+"""สร้างภาพบัตรประชาชนสังเคราะห์ (ข้อความไทยวาดด้วย PIL) พร้อม ground truth
+
+ใช้ฟอนต์ไทยที่มีในเครื่อง (ระบุเองได้ด้วย --font หรือ BENCH_THAI_FONT)
+"""
+import math
+import os
+import random
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from utils.card_detect import CARD_W, CARD_H
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/tlwg/Garuda.ttf",
+    "/usr/share/fonts/truetype/tlwg/Loma.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSansThai-Regular.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansThai-Regular.ttf",
+    "/Library/Fonts/Thonburi.ttf",
+    "/System/Library/Fonts/Thonburi.ttc",
+    "/System/Library/Fonts/Supplemental/Tahoma.ttf",
+    "C:/Windows/Fonts/tahoma.ttf",
+]
+
+PREFIXES = ["นาย", "นาง", "นางสาว"]
+FIRST_NAMES = ["สมชาย", "สมหญิง", "วิชัย", "มาลี", "ประเสริฐ", "กนกพร", "ธนากร", "สุดารัตน์"]
+LAST_NAMES = ["ใจดี", "แสงทอง", "ศรีสุข", "บุญมา", "วงศ์ใหญ่", "ทองคำ", "พูลผล", "มีสุข"]
+MONTHS = ["ม.ค.", "ก.พ.", "มี.ค.", "เม.ย.", "พ.ค.", "มิ.ย.", "ก.ค.", "ส.ค.", "ก.ย.", "ต.ค.", "พ.ย.", "ธ.ค."]
+PLACES = [
+    ("บางพลีใหญ่", "บางพลี", "สมุทรปราการ"),
+    ("ทับคล้อ", "ทับคล้อ", "พิจิตร"),
+    ("ในเมือง", "เมืองขอนแก่น", "ขอนแก่น"),
+    ("สุเทพ", "เมืองเชียงใหม่", "เชียงใหม่"),
+    ("หาดใหญ่", "หาดใหญ่", "สงขลา"),
+]
+
+
+def find_thai_font(explicit=None):
+    for path in [explicit, os.getenv("BENCH_THAI_FONT")] + FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            return path
+    raise FileNotFoundError("ไม่พบฟอนต์ภาษาไทย — ระบุด้วย --font หรือ BENCH_THAI_FONT")
+
+
+def random_id(rng):
+    """เลขบัตร 13 หลักที่ checksum ถูกต้อง"""
+    d = [rng.randint(1, 8)] + [rng.randint(0, 9) for _ in range(11)]
+    s = sum(d[i] * (13 - i) for i in range(12))
+    d.append((11 - s % 11) % 10)
+    return "".join(map(str, d))
+
+
+def format_id(d13):
+    return f"{d13[0]} {d13[1:5]} {d13[5:10]} {d13[10:12]} {d13[12]}"
+
+
+def random_truth(rng):
+    tambon, amphoe, province = rng.choice(PLACES)
+    return {
+        "id_number": random_id(rng),
+        "prefix": rng.choice(PREFIXES).replace("นางสาว", "น.ส."),
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "dob": f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(2500, 2550)}",
+        "address": f"{rng.randint(1, 199)}/{rng.randint(1, 9)} หมู่ที่ {rng.randint(1, 12)} "
+                   f"ต.{tambon} อ.{amphoe} จ.{province}",
+    }
+
+
+def card_text(truth):
+    """ข้อความแบบที่ OCR อ่านได้จากบัตร (ใช้วัด extract_fields_from_text แยกจาก OCR)"""
+    prefix = "นางสาว" if truth["prefix"] == "น.ส." else truth["prefix"]
+    return "\n".join([
+        "บัตรประจำตัวประชาชน Thai National ID Card",
+        f"เลขประจำตัวประชาชน {format_id(truth['id_number'])}",
+        f"ชื่อตัวและชื่อสกุล {prefix} {truth['first_name']} {truth['last_name']}",
+        f"เกิดวันที่ {truth['dob']}",
+        "ศาสนา พุทธ",
+        f"ที่อยู่ {truth['address']}",
+    ])
+
+
+def render_card(truth, font_path):
+    """วาดบัตรตรงขนาด CARD_W x CARD_H ตามตำแหน่ง FIELD_ROIS"""
+    card = Image.new("RGB", (CARD_W, CARD_H), (236, 242, 250))
+    draw = ImageDraw.Draw(card)
+    big = ImageFont.truetype(font_path, 40)
+    mid = ImageFont.truetype(font_path, 32)
+    small = ImageFont.truetype(font_path, 22)
+    ink = (30, 30, 40)
+
+    prefix = "นางสาว" if truth["prefix"] == "น.ส." else truth["prefix"]
+    draw.text((40, 25), "บัตรประจำตัวประชาชน  Thai National ID Card", font=small, fill=ink)
+    draw.text((250, 100), "เลขประจำตัวประชาชน", font=small, fill=ink)
+    draw.text((500, 85), format_id(truth["id_number"]), font=big, fill=ink)
+    draw.text((120, 175), "ชื่อตัวและชื่อสกุล", font=small, fill=ink)
+    draw.text((300, 165), f"{prefix} {truth['first_name']} {truth['last_name']}", font=mid, fill=ink)
+    draw.text((330, 340), "เกิดวันที่", font=small, fill=ink)
+    draw.text((470, 330), truth["dob"], font=mid, fill=ink)
+    draw.text((90, 420), "ศาสนา พุทธ", font=small, fill=ink)
+    draw.text((20, 475), "ที่อยู่", font=small, fill=ink)
+    address = truth["address"]
+    cut = address.find(" ต.")
+    draw.text((90, 465), address[:cut], font=mid, fill=ink)
+    draw.text((90, 520), address[cut + 1:], font=mid, fill=ink)
+    draw.rectangle((790, 330, 985, 600), outline=(120, 120, 140), width=3)  # กรอบรูปถ่าย
+    return cv2.cvtColor(np.array(card), cv2.COLOR_RGB2BGR)
+
+
+def distort(card, rng, noise=8.0, blur=1, max_angle=6.0):
+    """วางบัตรบนพื้นหลัง แล้วหมุน / เบลอ / ใส่ noise"""
+    pad = 120
+    canvas = np.full((CARD_H + 2 * pad, CARD_W + 2 * pad, 3), 60, dtype=np.uint8)
+    canvas[pad:pad + CARD_H, pad:pad + CARD_W] = card
+
+    angle = rng.uniform(-max_angle, max_angle)
+    h, w = canvas.shape[:2]
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    canvas = cv2.warpAffine(canvas, M, (w, h), borderValue=(60, 60, 60))
+
+    if blur:
+        k = 2 * blur + 1
+        canvas = cv2.GaussianBlur(canvas, (k, k), 0)
+    if noise:
+        np_rng = np.random.default_rng(rng.randint(0, 2 ** 31))
+        canvas = np.clip(canvas + np_rng.normal(0, noise, canvas.shape), 0, 255).astype(np.uint8)
+    return canvas, round(math.radians(angle), 4)
+
+
+def generate(n, seed=0, font_path=None, **distort_kwargs):
+    """คืน list ของ (image_bgr, truth) จำนวน n ใบ (ผลเหมือนเดิมทุกครั้งถ้า seed เดิม)"""
+    rng = random.Random(seed)
+    font_path = find_thai_font(font_path)
+    samples = []
+    for _ in range(n):
+        truth = random_truth(rng)
+        img, _ = distort(render_card(truth, font_path), rng, **distort_kwargs)
+        samples.append((img, truth))
+    return samples
@@ -3,8 +3,131 @@ from dotenv import load_dotenv
 
 load_dotenv()  # โหลดค่าจากไฟล์ .env
 
+
+def _sqlite_memory(uri):
+    """SQLite ในหน่วยความจำ — Flask-SQLAlchemy ใช้ StaticPool (connection เดียว) ที่ไม่รับ pool_size ฯลฯ"""
+    from sqlalchemy.engine import make_url
+
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(uri):
+    """ตัวเลือก connection pool ของ SQLAlchemy (Config.SQLALCHEMY_ENGINE_OPTIONS)
+
+    pool_size / max_overflow / pool_timeout ใช้กับ QueuePool — MySQL และ SQLite แบบไฟล์
+    (ยกเว้น SQLite ในหน่วยความจำที่ใช้ StaticPool) ส่วน pre-ping (ตรวจ connection ก่อนยืม) และ recycle
+    ใช้ได้กับทุก pool
+    """
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        # ต่ำกว่า wait_timeout ของ MySQL — connection ที่ค้างใน pool นานเกินจะถูกเปิดใหม่ก่อนโดนตัดทิ้ง
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    if uri and _sqlite_memory(uri):
+        if any(os.getenv(k) for k in ("DB_POOL_SIZE", "DB_POOL_MAX_OVERFLOW", "DB_POOL_TIMEOUT")):
+            print("[CONFIG] SQLite in-memory uses a single static connection — DB_POOL_SIZE / "
+                  "DB_POOL_MAX_OVERFLOW / DB_POOL_TIMEOUT are ignored")
+    elif uri:
+        options.update(
+            # ราว ๆ จำนวน thread ที่รับ request พร้อมกันต่อ process (+ OCR_JOB_WORKERS)
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "10")),   # รอ connection ว่างนานกว่านี้ → error
+        )
+    return options
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
+
+    # --- Batch OCR (/upload_ocr_batch) ---
+    OCR_BATCH_MAX_FILES = int(os.getenv("OCR_BATCH_MAX_FILES", "200"))
+    OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))
+    # EasyOCR batched API ต้องการภาพขนาดเท่ากัน — ทุกภาพจะถูก resize เป็นขนาดนี้
+    OCR_BATCH_WIDTH = int(os.getenv("OCR_BATCH_WIDTH", "1280"))
+    OCR_BATCH_HEIGHT = int(os.getenv("OCR_BATCH_HEIGHT", "810"))
+
+    # --- Async OCR jobs (/ocr_jobs) ---
+    OCR_JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", "2"))
+    OCR_JOB_QUEUE_DEPTH = int(os.getenv("OCR_JOB_QUEUE_DEPTH", "100"))  # ต่อ lane — lane เต็มแล้วตอบ 429
+    # ความลึกแยกต่อ lane (ไม่ตั้ง = OCR_JOB_QUEUE_DEPTH) — งาน low ล้นคิวไม่ทำให้งาน high โดน 429
+    OCR_JOB_LANE_DEPTHS = {
+        "high": int(os.getenv("OCR_JOB_QUEUE_DEPTH_HIGH", OCR_JOB_QUEUE_DEPTH)),
+        "normal": int(os.getenv("OCR_JOB_QUEUE_DEPTH_NORMAL", OCR_JOB_QUEUE_DEPTH)),
+        "low": int(os.getenv("OCR_JOB_QUEUE_DEPTH_LOW", OCR_JOB_QUEUE_DEPTH)),
+    }
+    OCR_JOB_RETRY_AFTER = int(os.getenv("OCR_JOB_RETRY_AFTER", "5"))
+    OCR_JOB_SSE_HEARTBEAT = int(os.getenv("OCR_JOB_SSE_HEARTBEAT", "15"))
+
+    # --- OCR result cache (SHA-256 ของไฟล์ + pipeline version) ---
+    OCR_CACHE_MEMORY_MB = int(os.getenv("OCR_CACHE_MEMORY_MB", "32"))
+    OCR_CACHE_DB_MB = int(os.getenv("OCR_CACHE_DB_MB", "256"))
+    # แถวของ pipeline version อื่นที่ไม่ถูกใช้เลยนานกว่านี้จะถูกลบ (process เวอร์ชันเก่าที่ยังรันอยู่ไม่โดนลบแคช)
+    OCR_CACHE_STALE_HOURS = float(os.getenv("OCR_CACHE_STALE_HOURS", "24"))
+
+    # --- Card localisation: ต่ำกว่าค่านี้จะ OCR ทั้งภาพแทนการตัด ROI ---
+    CARD_FIT_THRESHOLD = float(os.getenv("CARD_FIT_THRESHOLD", "0.6"))
+
+    # --- Upload decode / persistence ---
+    # ด้านยาวสูงสุดหลัง decode (ภาพ 12 MP จากมือถือจะถูกย่อระหว่าง decode)
+    UPLOAD_MAX_SIDE = int(os.getenv("UPLOAD_MAX_SIDE", "2000"))
+    # บันทึกต้นฉบับลง upload store (UPLOAD_FOLDER/originals, ชื่อ = SHA-256) แบบ background (ปิดได้ด้วย PERSIST_UPLOADS=0)
+    PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "1") == "1"
+    # ภาพย่อ / processed สร้างตอนถูกขอครั้งแรก — ลบตัวที่ไม่ได้ใช้นานสุดเมื่อรวมกันเกินขนาดนี้
+    UPLOAD_VARIANTS_MAX_MB = int(os.getenv("UPLOAD_VARIANTS_MAX_MB", "512"))
+    UPLOAD_THUMB_SIDE = int(os.getenv("UPLOAD_THUMB_SIDE", "320"))
+    UPLOAD_CACHE_MAX_AGE = int(os.getenv("UPLOAD_CACHE_MAX_AGE", "86400"))   # Cache-Control max-age (วินาที)
+
+    # --- Camera burst (/upload_ocr_frames): ให้คะแนนเฟรมแล้ว OCR เฉพาะเฟรมที่ดีที่สุด ---
+    CAPTURE_MAX_FRAMES = int(os.getenv("CAPTURE_MAX_FRAMES", "15"))
+    CAPTURE_ACCEPT_SCORE = float(os.getenv("CAPTURE_ACCEPT_SCORE", "0.75"))   # เจอเฟรมคะแนนถึงนี้ หยุดอ่านเฟรมที่เหลือ
+    CAPTURE_MODE = os.getenv("CAPTURE_MODE", "frame")                        # frame | fields (ROI ที่ดีที่สุดต่อฟิลด์)
+    CAPTURE_FIELD_CANDIDATES = int(os.getenv("CAPTURE_FIELD_CANDIDATES", "3"))
+
+    # --- Streaming export: จำนวนแถวที่อ่านจาก DB / เขียนออกต่อชุด ---
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    # --- Metrics: แนบ "timings" ต่อ stage ในทุก JSON response (หรือส่ง ?timings=1 ทีละ request) ---
+    METRICS_ATTACH_TIMINGS = os.getenv("METRICS_ATTACH_TIMINGS", "0") == "1"
+
+    # --- การโหลดโมเดล: lazy | background (warm-up ใน thread, ค่าเริ่มต้น) | preload (ใช้กับ gunicorn --preload) ---
+    MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "background")
+
+    # --- ThaiNER LRU cache (utils/ner_cache.py): จำนวนรายการ / ขนาดรวม (0 = ปิด cache, tag ตรงทุกครั้ง) ---
+    NER_CACHE_ENTRIES = int(os.getenv("NER_CACHE_ENTRIES", "8192"))
+    NER_CACHE_MB = int(os.getenv("NER_CACHE_MB", "16"))
+
+    # --- OCR process pool: EasyOCR หนึ่งตัวต่อ process (0 = OCR ใน process ของ Flask เหมือนเดิม) ---
+    OCR_POOL_WORKERS = int(os.getenv("OCR_POOL_WORKERS", "0"))
+    OCR_POOL_TORCH_THREADS = int(os.getenv("OCR_POOL_TORCH_THREADS", "1"))    # core ต่อ worker
+    OCR_POOL_MAX_INFLIGHT = int(os.getenv("OCR_POOL_MAX_INFLIGHT", "0"))      # 0 = workers x 2
+    OCR_POOL_SUBMIT_TIMEOUT = float(os.getenv("OCR_POOL_SUBMIT_TIMEOUT", "10"))  # รอคิวว่างนานกว่านี้ตอบ 503
+    OCR_POOL_TASK_TIMEOUT = float(os.getenv("OCR_POOL_TASK_TIMEOUT", "120"))
+    OCR_POOL_MAX_TASKS = int(os.getenv("OCR_POOL_MAX_TASKS", "0"))            # 0 = ไม่จำกัด
+    OCR_POOL_MAX_RSS_MB = int(os.getenv("OCR_POOL_MAX_RSS_MB", "0"))          # 0 = ไม่จำกัด
+
+    # --- OCR engine: easyocr | tesseract | cascade (Tesseract ก่อน ไม่ผ่าน validator ค่อย EasyOCR) ---
+    OCR_ENGINE = os.getenv("OCR_ENGINE", "cascade")
+    OCR_CASCADE_FIELDS = os.getenv("OCR_CASCADE_FIELDS", "id_number,dob")   # ROI ที่ลอง Tesseract ก่อน
+    OCR_CASCADE_MIN_CONF = float(os.getenv("OCR_CASCADE_MIN_CONF", "0.75"))
+    TESSERACT_CMD = os.getenv("TESSERACT_CMD")   # path ของ tesseract ถ้าไม่อยู่ใน PATH
+
+    # --- Preprocess: adaptive (เลือก recipe ตามคุณภาพภาพ) | gaussian (gray + blur 5x5 แบบเดิม) ---
+    OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "adaptive")
+    OCR_PREPROCESS_RETRIES = int(os.getenv("OCR_PREPROCESS_RETRIES", "1"))   # recipe สำรองเมื่อฟิลด์ไม่ผ่านการตรวจ
+
+    # --- Gazetteer: แก้ชื่อ ตำบล / อำเภอ / จังหวัด ที่ OCR อ่านผิด (utils/gazetteer.py) ---
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")   # ไม่ตั้ง = data/thai_gazetteer.csv
+    # โฟลเดอร์เก็บ index ที่ pickle ไว้ (ไม่ตั้ง = instance folder ของ Flask) — ต้องเขียนได้เฉพาะ process ของ server
+    GAZETTEER_CACHE = os.getenv("GAZETTEER_CACHE")
+    # 0 = ไม่แทนชื่อในข้อความ (ยังคืนผล resolve / ความมั่นใจ และใช้ตรวจที่อยู่ใน cascade)
+    GAZETTEER_SNAP = os.getenv("GAZETTEER_SNAP", "1") == "1"
+
+    # --- Re-extract จากข้อความ OCR ที่เก็บไว้ (python -m utils.reextract, POST /reextract) ---
+    REEXTRACT_WORKERS = int(os.getenv("REEXTRACT_WORKERS", "2"))       # 0 = รันใน process เดียว
+    REEXTRACT_CHUNK_SIZE = int(os.getenv("REEXTRACT_CHUNK_SIZE", "500"))
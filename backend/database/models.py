@@ -14,6 +14,12 @@ class User(db.Model):
 
 class OcrResult(db.Model):
     __tablename__ = "ocr_results"
+    __table_args__ = (
+        # export / รายการที่แก้ไขแล้วของผู้ใช้ เรียงตามวันที่
+        db.Index("ix_ocr_results_user_draft_created", "user_id", "is_draft", "created_at"),
+        # หน้า History (keyset: filename, is_draft, created_at)
+        db.Index("ix_ocr_results_user_file_draft_created", "user_id", "filename", "is_draft", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
@@ -29,10 +35,17 @@ class OcrResult(db.Model):
     cer = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_draft = db.Column(db.Boolean, default=False)
+    # ข้อความ OCR ดิบ (zlib, utils/ocr_text.py) + เวอร์ชัน extractor/normalizer ที่ใช้ดึงฟิลด์ — ใช้กับ re-extract
+    ocr_text_z = db.Column(db.LargeBinary)
+    extractor_version = db.Column(db.String(40))
 
 
 class CerResult(db.Model):
     __tablename__ = "cer_results"
+    __table_args__ = (
+        # CER ล่าสุดของแต่ละ OcrResult
+        db.Index("ix_cer_results_ocr_result_id", "ocr_result_id", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     ocr_result_id = db.Column(db.Integer, db.ForeignKey("ocr_results.id"))
@@ -45,3 +58,49 @@ class CerResult(db.Model):
     cer_address = db.Column(db.Float)
     cer_avg = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class OcrCacheEntry(db.Model):
+    """แคชผล OCR ตาม SHA-256 ของไฟล์ + เวอร์ชัน pipeline (tier ถาวรของ utils/ocr_cache.py)"""
+    __tablename__ = "ocr_cache"
+    __table_args__ = (
+        db.UniqueConstraint("content_hash", "pipeline_version", name="uq_ocr_cache_hash_version"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    pipeline_version = db.Column(db.String(100), nullable=False, index=True)
+    raw_text = db.Column(db.Text)
+    ocr_text_z = db.Column(db.LargeBinary)
+    fields_json = db.Column(db.Text)
+    processed_image_path = db.Column(db.String(255))
+    size_bytes = db.Column(db.Integer, default=0)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+# ====== Rollup ของ CER ต่อ วัน × ผู้ใช้ × ฟิลด์ (อัปเดตตอน save_ocr — ดู utils/cer_rollup.py) ======
+CER_HIST_BUCKETS = 22   # h00: CER = 0, h01–h20: ช่วงละ 0.05 ถึง 1.0, h21: > 1.0
+
+
+class CerRollup(db.Model):
+    __tablename__ = "cer_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("day", "user_id", "field", name="uq_cer_rollups_day_user_field"),
+        # trend / summary ของทุกผู้ใช้ตามช่วงวัน
+        db.Index("ix_cer_rollups_field_day", "field", "day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)                       # วันที่ (UTC) ของ CerResult.created_at
+    user_id = db.Column(db.Integer, nullable=False, default=0)     # 0 = ไม่ระบุผู้ใช้
+    field = db.Column(db.String(20), nullable=False)               # id_number … address, avg
+    n = db.Column(db.Integer, nullable=False, default=0)
+    cer_sum = db.Column(db.Float, nullable=False, default=0.0)
+    cer_sum_sq = db.Column(db.Float, nullable=False, default=0.0)
+
+
+for _i in range(CER_HIST_BUCKETS):
+    setattr(CerRollup, f"h{_i:02d}", db.Column(f"h{_i:02d}", db.Integer, nullable=False, default=0))
+del _i
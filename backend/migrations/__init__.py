@@ -0,0 +1,47 @@
+from flask import Flask
+from sqlalchemy import inspect, text
+from config import Config
+from database import db
+
+
+def make_app():
+    """Flask app ขั้นต่ำสำหรับรัน migration (ไม่ import routes → ไม่โหลดโมเดล OCR)"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    return app
+
+
+def create_indexes(table, names):
+    """สร้าง index ที่ประกาศไว้ใน models ให้ตารางที่มีอยู่แล้ว (ข้ามถ้ามีอยู่แล้ว)"""
+    for index in table.indexes:
+        if index.name in names:
+            index.create(bind=db.engine, checkfirst=True)
+            print(f"[MIGRATE] index {index.name} on {table.name}: ok")
+
+
+def drop_indexes(table, names):
+    for index in table.indexes:
+        if index.name in names:
+            index.drop(bind=db.engine, checkfirst=True)
+            print(f"[MIGRATE] index {index.name} on {table.name}: dropped")
+
+
+def add_columns(table, names):
+    """เพิ่มคอลัมน์ที่ประกาศไว้ใน models ให้ตารางที่มีอยู่แล้ว (ข้ามคอลัมน์ที่มีอยู่แล้ว) — ค่าในแถวเดิมเป็น NULL"""
+    existing = {c["name"] for c in inspect(db.engine).get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for column in table.columns:
+            if column.name in names and column.name not in existing:
+                ddl = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl}"))
+                print(f"[MIGRATE] column {table.name}.{column.name}: ok")
+
+
+def drop_columns(table, names):
+    existing = {c["name"] for c in inspect(db.engine).get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for name in names:
+            if name in existing:
+                conn.execute(text(f"ALTER TABLE {table.name} DROP COLUMN {name}"))
+                print(f"[MIGRATE] column {table.name}.{name}: dropped")
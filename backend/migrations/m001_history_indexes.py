@@ -0,0 +1,30 @@
+"""เพิ่ม index สำหรับหน้า History (keyset) และ export ให้ฐานข้อมูลที่สร้างไว้ก่อน
+(db.create_all ไม่เพิ่ม index ให้ตารางที่มีอยู่แล้ว)
+
+รัน:  cd backend && python -m migrations.m001_history_indexes [--downgrade]
+"""
+import sys
+
+from database.models import OcrResult, CerResult
+from migrations import make_app, create_indexes, drop_indexes
+
+OCR_RESULT_INDEXES = {
+    "ix_ocr_results_user_draft_created",
+    "ix_ocr_results_user_file_draft_created",
+}
+CER_RESULT_INDEXES = {"ix_cer_results_ocr_result_id"}
+
+
+def upgrade():
+    create_indexes(OcrResult.__table__, OCR_RESULT_INDEXES)
+    create_indexes(CerResult.__table__, CER_RESULT_INDEXES)
+
+
+def downgrade():
+    drop_indexes(OcrResult.__table__, OCR_RESULT_INDEXES)
+    drop_indexes(CerResult.__table__, CER_RESULT_INDEXES)
+
+
+if __name__ == "__main__":
+    with make_app().app_context():
+        downgrade() if "--downgrade" in sys.argv else upgrade()
@@ -0,0 +1,32 @@
+"""สร้างตาราง ocr_cache (แคชผล OCR ตาม SHA-256 ของไฟล์, utils/ocr_cache.py) ให้ฐานข้อมูลที่สร้างไว้ก่อน
+พร้อม index ของ pipeline_version / last_hit_at — ต้องรันก่อน m003_ocr_text (ซึ่งเพิ่มคอลัมน์ให้ตารางนี้)
+
+รัน:  cd backend && python -m migrations.m002_ocr_cache [--downgrade]
+"""
+import sys
+
+from database import db
+from database.models import OcrCacheEntry
+from migrations import make_app, create_indexes
+
+OCR_CACHE_INDEXES = {
+    "ix_ocr_cache_pipeline_version",
+    "ix_ocr_cache_last_hit_at",
+}
+
+
+def upgrade():
+    OcrCacheEntry.__table__.create(bind=db.engine, checkfirst=True)
+    print("[MIGRATE] table ocr_cache: ok")
+    # ตารางที่มีอยู่แล้ว (จาก db.create_all รุ่นก่อน) — เติม index ที่ยังไม่มี
+    create_indexes(OcrCacheEntry.__table__, OCR_CACHE_INDEXES)
+
+
+def downgrade():
+    OcrCacheEntry.__table__.drop(bind=db.engine, checkfirst=True)
+    print("[MIGRATE] table ocr_cache: dropped")
+
+
+if __name__ == "__main__":
+    with make_app().app_context():
+        downgrade() if "--downgrade" in sys.argv else upgrade()
@@ -0,0 +1,28 @@
+"""เพิ่มคอลัมน์ข้อความ OCR ดิบ (บีบอัด) + เวอร์ชัน extractor ให้ฐานข้อมูลที่สร้างไว้ก่อน
+
+แถวเดิมไม่มีข้อความ OCR เก็บไว้ — re-extract (python -m utils.reextract) จะข้ามแถวเหล่านั้น
+
+รัน:  cd backend && python -m migrations.m003_ocr_text [--downgrade]
+"""
+import sys
+
+from database.models import OcrResult, OcrCacheEntry
+from migrations import make_app, add_columns, drop_columns
+
+OCR_RESULT_COLUMNS = ["ocr_text_z", "extractor_version"]
+OCR_CACHE_COLUMNS = ["ocr_text_z"]
+
+
+def upgrade():
+    add_columns(OcrResult.__table__, OCR_RESULT_COLUMNS)
+    add_columns(OcrCacheEntry.__table__, OCR_CACHE_COLUMNS)
+
+
+def downgrade():
+    drop_columns(OcrResult.__table__, OCR_RESULT_COLUMNS)
+    drop_columns(OcrCacheEntry.__table__, OCR_CACHE_COLUMNS)
+
+
+if __name__ == "__main__":
+    with make_app().app_context():
+        downgrade() if "--downgrade" in sys.argv else upgrade()
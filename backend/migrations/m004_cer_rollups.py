@@ -0,0 +1,28 @@
+"""สร้างตาราง cer_rollups (/cer_analytics) แล้วเติมจาก cer_results ที่มีอยู่
+
+รัน:  cd backend && python -m migrations.m004_cer_rollups [--downgrade]
+สร้าง rollup ใหม่ทั้งหมดภายหลังได้ด้วย python -m utils.cer_rollup
+"""
+import sys
+
+from database import db
+from database.models import CerRollup
+from migrations import make_app
+from utils.cer_rollup import backfill
+
+
+def upgrade():
+    CerRollup.__table__.create(bind=db.engine, checkfirst=True)
+    print("[MIGRATE] table cer_rollups: ok")
+    n_results, n_rollups = backfill()
+    print(f"[MIGRATE] cer_rollups backfilled: {n_results} cer_results → {n_rollups} rows")
+
+
+def downgrade():
+    CerRollup.__table__.drop(bind=db.engine, checkfirst=True)
+    print("[MIGRATE] table cer_rollups: dropped")
+
+
+if __name__ == "__main__":
+    with make_app().app_context():
+        downgrade() if "--downgrade" in sys.argv else upgrade()
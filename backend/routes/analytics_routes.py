@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify
+from database.models import CerRollup
+from utils.cer_rollup import FIELDS, SUM_COLUMNS, rollup_query, summarize
+
+analytics_bp = Blueprint("analytics_bp", __name__)
+
+# อ่านจาก cer_rollups เท่านั้น (ไม่สแกน cer_results) — จำนวนแถวที่รวมไม่เกิน วัน × ผู้ใช้ × ฟิลด์ ในช่วงที่ขอ
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def _parse_args():
+    """date_from / date_to (YYYY-MM-DD, รวมทั้งสองวัน — ค่าเริ่มต้น 30 วันล่าสุด), user_id, field"""
+    date_to = request.args.get("date_to")
+    date_to = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else datetime.utcnow().date()
+    date_from = request.args.get("date_from")
+    date_from = (datetime.strptime(date_from, "%Y-%m-%d").date() if date_from
+                 else date_to - timedelta(days=DEFAULT_DAYS - 1))
+    if date_from > date_to or (date_to - date_from).days >= MAX_DAYS:
+        raise ValueError(f"date range must be 1–{MAX_DAYS} days")
+    user_id = request.args.get("user_id")
+    field = request.args.get("field", "avg")
+    if field not in FIELDS:
+        raise ValueError(f"field must be one of {', '.join(FIELDS)}")
+    return date_from, date_to, int(user_id) if user_id else None, field
+
+
+def _filtered(q, date_from, date_to, user_id=None, field=None):
+    q = q.filter(CerRollup.day >= date_from, CerRollup.day <= date_to)
+    if user_id is not None:
+        q = q.filter(CerRollup.user_id == user_id)
+    if field is not None:
+        q = q.filter(CerRollup.field == field)
+    return q
+
+
+def _stats(row, histogram=False):
+    stats = summarize({c: getattr(row, c) for c in SUM_COLUMNS})
+    if not histogram:
+        stats.pop("histogram", None)
+    return stats
+
+
+# ====== /cer_analytics/summary — ทุกฟิลด์ในช่วงวันที่ ======
+@analytics_bp.route("/cer_analytics/summary", methods=["GET"])
+def cer_summary():
+    """query string: date_from, date_to, user_id (ไม่ระบุ = ทุกคน) — histogram: h00 = 0, ช่องละ 0.05, ช่องท้าย > 1.0"""
+    try:
+        date_from, date_to, user_id, _ = _parse_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = {r.field: r for r in _filtered(rollup_query(CerRollup.field), date_from, date_to, user_id).all()}
+    return jsonify({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "user_id": user_id,
+        "fields": {f: _stats(rows[f], histogram=True) if f in rows else summarize({}) for f in FIELDS},
+    })
+
+
+# ====== /cer_analytics/trend — ค่าต่อวันของฟิลด์เดียว ======
+@analytics_bp.route("/cer_analytics/trend", methods=["GET"])
+def cer_trend():
+    """query string: field (ค่าเริ่มต้น avg), date_from, date_to, user_id — วันที่ไม่มีข้อมูลไม่อยู่ในผล"""
+    try:
+        date_from, date_to, user_id, field = _parse_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    q = _filtered(rollup_query(CerRollup.day), date_from, date_to, user_id, field).order_by(CerRollup.day.asc())
+    return jsonify({
+        "field": field,
+        "user_id": user_id,
+        "days": [{"day": r.day.isoformat(), **_stats(r)} for r in q.all()],
+    })
+
+
+# ====== /cer_analytics/users — เทียบผู้ใช้ (operator) ในช่วงวันที่ ======
+@analytics_bp.route("/cer_analytics/users", methods=["GET"])
+def cer_by_user():
+    """query string: field (ค่าเริ่มต้น avg), date_from, date_to — เรียงตาม CER เฉลี่ยมาก → น้อย"""
+    try:
+        date_from, date_to, _, field = _parse_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    users = [{"user_id": r.user_id, **_stats(r)}
+             for r in _filtered(rollup_query(CerRollup.user_id), date_from, date_to, field=field).all()]
+    users.sort(key=lambda u: u["mean"] or 0, reverse=True)
+    return jsonify({"field": field, "users": users})
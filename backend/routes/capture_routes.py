@@ -0,0 +1,172 @@
+import os
+import time
+
+from flask import Blueprint, request, jsonify, current_app
+from database import db
+from routes.ocr_routes import (
+    ALLOWED_EXT,
+    _parse_user_id,
+    _decode_upload,
+    _persist_upload,
+    _build_draft,
+    _commit_draft,
+    _pool_busy,
+    run_ocr,
+    get_ocr_cache,
+)
+from utils.frame_select import MIN_SHARPNESS, best_field_crops, rank_frames, score_frame_bytes, warp_full
+from utils.metrics import metrics, timer
+from utils.ocr_cache import content_hash
+from utils.ocr_pool import PoolBusyError
+from utils.ocr_text import ocr_text_payload
+
+capture_bp = Blueprint("capture_bp", __name__)
+
+CAPTURE_MODES = ("frame", "fields")
+
+metrics.describe("capture_frames_total", "Camera frames received by /upload_ocr_frames (scored / skipped / selected)")
+metrics.describe("capture_bursts_total", "Frame bursts by outcome (ocr / cache_hit / rejected)")
+
+
+def _reject_reason(best):
+    if best["sharpness"] < MIN_SHARPNESS:
+        return "ภาพเบลอเกินไป — ถือกล้องให้นิ่งแล้วถ่ายใหม่"
+    return "แสงสะท้อนบนบัตรมากเกินไป — เอียงบัตรหรือเปลี่ยนมุมแล้วถ่ายใหม่"
+
+
+# ====== /upload_ocr_frames ======
+@capture_bp.route("/upload_ocr_frames", methods=["POST"])
+def upload_ocr_frames():
+    """รับเฟรมกล้องต่อเนื่อง (multipart field "frames" ตามลำดับที่ถ่าย) แล้ว OCR เฉพาะเฟรมที่ดีที่สุด
+
+    - ให้คะแนนทุกเฟรมบนภาพย่อ (ความคม, แสงสะท้อน, ขอบบัตร) — หยุดอ่านเฟรมที่เหลือเมื่อเจอเฟรมที่ดีพอ
+      (score ≥ CAPTURE_ACCEPT_SCORE)
+    - ไม่มีเฟรมที่ใช้ได้ → 422 พร้อมคะแนนทุกเฟรม (ไม่เสีย OCR) ส่ง force=1 เพื่อ OCR เฟรมที่ดีที่สุดอยู่ดี
+    - mode=fields: ต่อบัตรจาก CAPTURE_FIELD_CANDIDATES เฟรมแรก ให้แต่ละฟิลด์ใช้ ROI ที่ดีที่สุด (OCR ครั้งเดียว)
+    - เฟรมที่เลือกถูกบันทึกเป็นต้นฉบับ + draft เหมือน /upload_ocr
+    """
+    frames = request.files.getlist("frames")
+    user_id = _parse_user_id(request.form.get("user_id"))
+    cfg = current_app.config
+    mode = request.form.get("mode") or cfg.get("CAPTURE_MODE", "frame")
+    force = request.form.get("force") == "1"
+
+    if not frames:
+        return jsonify({"error": "No frames uploaded"}), 400
+    if mode not in CAPTURE_MODES:
+        return jsonify({"error": f"mode must be one of {CAPTURE_MODES}"}), 400
+    max_frames = cfg.get("CAPTURE_MAX_FRAMES", 15)
+    if len(frames) > max_frames:
+        return jsonify({"error": f"Too many frames (max {max_frames})"}), 413
+
+    threshold = cfg.get("CARD_FIT_THRESHOLD", 0.6)
+    accept = cfg.get("CAPTURE_ACCEPT_SCORE", 0.75)
+
+    # --- ให้คะแนนทีละเฟรม (decode แบบย่อ) ---
+    t0 = time.perf_counter()
+    raws, scored, quads, shapes = [], [], [], []
+    for i, frame in enumerate(frames):
+        ext = os.path.splitext(frame.filename or "")[1].lower()
+        if ext not in ALLOWED_EXT:
+            return jsonify({"error": f"File type not allowed: {frame.filename}"}), 400
+        raw = frame.read()
+        with timer("frame_score"):
+            scores, quad, shape = score_frame_bytes(raw)
+        raws.append(raw)
+        scored.append(scores)
+        quads.append(quad)
+        shapes.append(shape)
+        metrics.inc("capture_frames_total", result="scored")
+        # mode=fields ต้องการหลายเฟรมให้เลือก ROI — ไม่หยุดก่อน
+        if mode == "frame" and scores and scores["usable"] and scores["fit"] >= threshold and scores["score"] >= accept:
+            metrics.inc("capture_frames_total", len(frames) - i - 1, result="skipped")
+            break
+    score_seconds = time.perf_counter() - t0
+
+    ranked = rank_frames(scored)
+    frame_report = [
+        dict(s, filename=frames[i].filename) if s else {"filename": frames[i].filename, "error": "Cannot read image"}
+        for i, s in enumerate(scored)
+    ]
+    if not ranked:
+        return jsonify({"error": "Cannot read any frame", "frames": frame_report}), 400
+
+    best = ranked[0]
+    if not scored[best]["usable"] and not force:
+        metrics.inc("capture_bursts_total", result="rejected")
+        return jsonify({
+            "error": _reject_reason(scored[best]),
+            "frames": frame_report,
+            "selected": None,
+        }), 422
+    metrics.inc("capture_frames_total", result="selected")
+
+    filename = frames[best].filename
+    raw = raws[best]
+    card = None
+    field_frames = None
+    cache = get_ocr_cache()
+    digest = content_hash(raw)
+    # บัตรที่ต่อจากหลายเฟรมไม่ใช่ผลของไฟล์ใดไฟล์หนึ่ง — ใช้แคชเฉพาะ mode=frame
+    cached = cache.get(digest, commit=False) if mode == "frame" else None
+
+    if cached is not None:
+        text = cached["raw_text"]
+        ocr_text = cached.get("ocr_text")
+        data = dict(cached["fields"])
+    else:
+        db.session.close()   # ไม่ถือ connection ระหว่าง OCR
+        with timer("decode"):
+            img = _decode_upload(raw)
+        if img is None:
+            return jsonify({"error": "Cannot read image", "frames": frame_report}), 400
+
+        # --- ใช้ขอบบัตรที่หาได้ตอนให้คะแนน (ไม่หาใหม่บนภาพเต็ม) ---
+        located = None
+        if quads[best] is not None and scored[best]["fit"] >= threshold:
+            cards, order = [warp_full(img, quads[best], shapes[best])], [best]
+            if mode == "fields":
+                for i in ranked[1:cfg.get("CAPTURE_FIELD_CANDIDATES", 3)]:
+                    if not (scored[i]["usable"] and quads[i] is not None and scored[i]["fit"] >= threshold):
+                        continue
+                    other = _decode_upload(raws[i])
+                    if other is not None:
+                        cards.append(warp_full(other, quads[i], shapes[i]))
+                        order.append(i)
+                with timer("frame_compose"):
+                    composite, chosen = best_field_crops(cards)
+                field_frames = {roi: frames[order[i]].filename for roi, i in chosen.items()}
+                cards = [composite]
+            located = (cards[0], scored[best]["fit"])
+
+        try:
+            _, text, data, card = run_ocr(img, located)
+        except PoolBusyError:
+            return _pool_busy()
+        img = located = None
+        ocr_text = ocr_text_payload(card)
+
+    original_rel, processed_rel = _persist_upload(filename, raw, digest)
+    if cached is None and mode == "frame":
+        cache.put(digest, text, data, processed_rel, ocr_text, commit=False)
+
+    with timer("db_commit"):
+        draft = _build_draft(user_id, filename, data, processed_rel, ocr_text, original_rel)
+        _commit_draft(draft, cache)
+    metrics.inc("capture_bursts_total", result="cache_hit" if cached is not None else "ocr")
+
+    return jsonify({
+        "message": f"OCR processed from frame {best + 1}/{len(frames)}",
+        "filename": filename,
+        "ocr_result_id": draft.id,
+        "raw_text": text,
+        "processed_image_path": processed_rel,
+        "original_image_path": original_rel,
+        "cache_hit": cached is not None,
+        "card": card,
+        "result": data,
+        "selected": best,
+        "frames": frame_report,
+        "field_frames": field_frames,
+        "score_seconds": round(score_seconds, 4),
+    })
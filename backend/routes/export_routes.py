@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from database.models import OcrResult
+
+export_bp = Blueprint("export_bp", __name__)
+
+# ====== คอลัมน์ที่ export ได้: key → (หัวคอลัมน์ภาษาไทย, คอลัมน์ที่ต้อง select) ======
+EXPORT_FIELDS = {
+    "id": ("รหัสรายการ", ["id"]),
+    "filename": ("ชื่อไฟล์", ["filename"]),
+    "id_number": ("เลขบัตรประชาชน", ["id_number"]),
+    "prefix": ("คำนำหน้า", ["prefix"]),
+    "first_name": ("ชื่อ", ["first_name"]),
+    "last_name": ("นามสกุล", ["last_name"]),
+    "full_name": ("ชื่อ-นามสกุล", ["prefix", "first_name", "last_name"]),
+    "dob": ("วันเกิด", ["dob"]),
+    "address": ("ที่อยู่", ["address"]),
+    "is_draft": ("ฉบับร่าง", ["is_draft"]),
+    "created_at": ("วันที่บันทึก", ["created_at"]),
+}
+
+# คอลัมน์เดิมของ /export_csv_final
+DEFAULT_FIELDS = ["id_number", "full_name", "dob", "address"]
+
+
+def _field_value(field, row):
+    if field == "full_name":
+        return f"{row.prefix or ''}{row.first_name or ''} {row.last_name or ''}".strip()
+    value = getattr(row, field)
+    if field == "created_at":
+        return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+    if field == "is_draft":
+        return bool(value)
+    return value if value is not None else ""
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def _export_query(user_id, status, date_from, date_to, fields):
+    """query แบบเลือกเฉพาะคอลัมน์ที่ต้องใช้ อ่านเป็นชุด ๆ ด้วย yield_per (server-side cursor)"""
+    columns = {"id", "created_at"}
+    for f in fields:
+        columns.update(EXPORT_FIELDS[f][1])
+
+    q = OcrResult.query.with_entities(*[getattr(OcrResult, c) for c in sorted(columns)])
+    q = q.filter(OcrResult.user_id == user_id)
+    if status == "final":
+        q = q.filter(OcrResult.is_draft.is_(False))
+    elif status == "draft":
+        q = q.filter(OcrResult.is_draft.is_(True))
+    if date_from:
+        q = q.filter(OcrResult.created_at >= date_from)
+    if date_to:
+        q = q.filter(OcrResult.created_at < date_to + timedelta(days=1))  # รวมทั้งวัน date_to
+    return q.order_by(OcrResult.created_at.desc(), OcrResult.id.desc())
+
+
+def _stream_csv(query, fields, chunk_size):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # BOM ให้ Excel อ่านภาษาไทยถูก
+    writer.writerow([EXPORT_FIELDS[f][0] for f in fields])
+
+    for i, row in enumerate(query.yield_per(chunk_size), 1):
+        writer.writerow([_field_value(f, row) for f in fields])
+        if i % chunk_size == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+    yield buf.getvalue().encode("utf-8")
+
+
+def _stream_ndjson(query, fields, chunk_size):
+    lines = []
+    for row in query.yield_per(chunk_size):
+        lines.append(json.dumps({f: _field_value(f, row) for f in fields}, ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _attachment(download_name, ascii_name):
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(download_name)}"
+
+
+def stream_export(user_id, fmt="csv", status="final", date_from=None, date_to=None, fields=None):
+    fields = fields or DEFAULT_FIELDS
+    chunk_size = current_app.config.get("EXPORT_CHUNK_SIZE", 1000)
+    query = _export_query(user_id, status, date_from, date_to, fields)
+
+    # ตรวจว่ามีข้อมูลอย่างน้อยหนึ่งแถวก่อนเริ่ม stream (เพื่อตอบ 404 ได้)
+    if query.with_entities(OcrResult.id).first() is None:
+        return jsonify({"error": "ไม่พบข้อมูลที่ผ่านการแก้ไขแล้ว"}), 404
+
+    if fmt == "ndjson":
+        body, mimetype, ext = _stream_ndjson(query, fields, chunk_size), "application/x-ndjson", "ndjson"
+    else:
+        body, mimetype, ext = _stream_csv(query, fields, chunk_size), "text/csv", "csv"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": _attachment(f"ผลลัพธ์OCR_user_{user_id}.{ext}", f"ocr_user_{user_id}.{ext}"),
+        },
+    )
+
+
+# ====== /export_csv_final (ใช้โดยหน้า History) ======
+@export_bp.route("/export_csv_final/<int:user_id>", methods=["GET"])
+def export_csv_final(user_id):
+    try:
+        # ✅ ดึงเฉพาะข้อมูลหลังแก้ไขแล้ว (is_draft = False)
+        return stream_export(user_id, fmt="csv", status="final")
+    except Exception as e:
+        print("[ERROR /export_csv_final]", e)
+        return jsonify({"error": "ไม่สามารถสร้างไฟล์ CSV ได้"}), 500
+
+
+# ====== /export_results — CSV / NDJSON พร้อมตัวกรอง ======
+@export_bp.route("/export_results/<int:user_id>", methods=["GET"])
+def export_results(user_id):
+    """query string: format=csv|ndjson, status=final|draft|all, date_from/date_to=YYYY-MM-DD,
+    fields=id_number,full_name,... (ดู EXPORT_FIELDS)"""
+    fmt = request.args.get("format", "csv")
+    status = request.args.get("status", "final")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    if status not in ("final", "draft", "all"):
+        return jsonify({"error": "status must be final, draft or all"}), 400
+
+    try:
+        date_from = _parse_date(request.args.get("date_from"))
+        date_to = _parse_date(request.args.get("date_to"))
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {unknown}", "allowed": list(EXPORT_FIELDS)}), 400
+
+    try:
+        return stream_export(user_id, fmt, status, date_from, date_to, fields)
+    except Exception as e:
+        print("[ERROR /export_results]", e)
+        return jsonify({"error": "ไม่สามารถสร้างไฟล์ export ได้"}), 500
@@ -0,0 +1,56 @@
+import os
+
+from flask import Blueprint, current_app, jsonify, redirect, send_file, send_from_directory
+
+from routes.ocr_routes import get_upload_store
+
+file_bp = Blueprint("file_bp", __name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _send(stored, immutable):
+    """ส่งไฟล์พร้อม ETag / Last-Modified / Range (send_file conditional) — client ที่มีไฟล์แล้วได้ 304"""
+    if stored.url:
+        return redirect(stored.url)
+    resp = send_file(
+        stored.path,
+        mimetype=stored.mimetype,
+        conditional=True,
+        etag=stored.etag,
+        last_modified=stored.last_modified,
+        max_age=current_app.config.get("UPLOAD_CACHE_MAX_AGE", 86400),
+    )
+    resp.cache_control.public = True
+    # ต้นฉบับไม่มีวันเปลี่ยน (ชื่อ = hash ของเนื้อไฟล์) — variant อาจถูกสร้างใหม่เมื่อ version เปลี่ยน (ETag ใหม่)
+    resp.cache_control.immutable = immutable
+    return resp
+
+
+# ====== /files/<key> — ต้นฉบับใน upload store ======
+@file_bp.route("/files/<key>", methods=["GET"])
+def get_file(key):
+    stored = get_upload_store().original(key)
+    if stored is None:
+        return jsonify({"error": "File not found"}), 404
+    return _send(stored, immutable=True)
+
+
+# ====== /files/<key>/<variant> — thumb / processed (สร้างตอนถูกขอครั้งแรก) ======
+@file_bp.route("/files/<key>/<variant>", methods=["GET"])
+def get_file_variant(key, variant):
+    try:
+        stored = get_upload_store().variant(key, variant)
+    except Exception as e:
+        print("[ERROR /files variant]", variant, key, e)
+        return jsonify({"error": "Cannot generate image"}), 500
+    if stored is None:
+        return jsonify({"error": "File not found"}), 404
+    return _send(stored, immutable=False)
+
+
+# ===== เสิร์ฟรูปภาพในโฟลเดอร์ uploads (path แบบเดิมของแถวที่บันทึกก่อนมี upload store) =====
+@file_bp.route("/uploads/<path:filename>", methods=["GET"])
+def serve_upload(filename):
+    upload_dir = os.path.join(BASE_DIR, current_app.config.get("UPLOAD_FOLDER", "uploads"))
+    return send_from_directory(upload_dir, filename, max_age=current_app.config.get("UPLOAD_CACHE_MAX_AGE", 86400))
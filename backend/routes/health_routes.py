@@ -0,0 +1,56 @@
+import os
+import time
+
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+from database import db
+from utils.model_registry import registry, current_rss_mb
+
+health_bp = Blueprint("health_bp", __name__)
+
+STARTED_AT = time.time()
+
+
+# ====== /healthz — liveness: process ยังตอบได้ (ไม่แตะ DB / โมเดล) ======
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    """rss_mb = RSS ของ worker นี้ (อ่าน /proc/self/statm — ไม่แตะโมเดล) ใช้ดูหน่วยความจำต่อ worker"""
+    return jsonify({
+        "status": "ok",
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - STARTED_AT, 1),
+        "rss_mb": current_rss_mb(),
+    })
+
+
+# ====== /readyz — readiness: DB ต่อได้ + โมเดลโหลดเสร็จ (โหมด lazy ไม่รอโมเดล) ======
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    mode = current_app.config.get("MODEL_LOAD_MODE", "background")
+
+    try:
+        db.session.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception as e:
+        print("[ERROR readyz db]", e)
+        database = "error"
+
+    stats = registry.stats()
+    models = {
+        name: {k: s[k] for k in ("state", "error", "load_time_s", "warmup_time_s", "rss_delta_mb")}
+        for name, s in stats["models"].items()
+    }
+    if mode == "lazy":
+        # โหลดตอนใช้ครั้งแรก — พร้อมเสมอ ยกเว้นโมเดลที่ลองโหลดแล้วล้มเหลว
+        models_ready = not any(m["state"] == "failed" for m in models.values())
+    else:
+        models_ready = registry.ready()
+    ready = database == "ok" and models_ready
+
+    return jsonify({
+        "ready": ready,
+        "mode": mode,
+        "database": database,
+        "models": models,
+        "rss_mb": stats["rss_mb"],
+    }), (200 if ready else 503)
@@ -0,0 +1,159 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify
+from sqlalchemy import and_, false, or_
+from database import db
+from database.models import OcrResult, CerResult
+
+history_bp = Blueprint("history_bp", __name__)
+
+MAX_PAGE_SIZE = 200
+
+
+def _latest_cer_avg():
+    """cer_avg ล่าสุดของแต่ละ OcrResult เป็น correlated subquery (ใช้ index ix_cer_results_ocr_result_id)
+    — ดึงมาพร้อมแถวเดียวกัน ไม่ต้อง query แยกต่อแถว"""
+    return (
+        db.session.query(CerResult.cer_avg)
+        .filter(CerResult.ocr_result_id == OcrResult.id)
+        .order_by(CerResult.id.desc())
+        .limit(1)
+        .correlate(OcrResult)
+        .scalar_subquery()
+        .label("cer_avg")
+    )
+
+
+def _history_query(user_id, status="all", date_from=None, date_to=None):
+    """เรียงแบบเดียวกับหน้า History: ไฟล์เดียวกันอยู่คู่กัน draft ก่อน ผลจริงทีหลัง
+    — ตรงกับ index ix_ocr_results_user_file_draft_created"""
+    q = db.session.query(OcrResult, _latest_cer_avg()).filter(OcrResult.user_id == user_id)
+    if status == "final":
+        q = q.filter(OcrResult.is_draft.is_(False))
+    elif status == "draft":
+        q = q.filter(OcrResult.is_draft.is_(True))
+    if date_from:
+        q = q.filter(OcrResult.created_at >= date_from)
+    if date_to:
+        q = q.filter(OcrResult.created_at < date_to + timedelta(days=1))
+    return q.order_by(
+        OcrResult.filename.asc(),
+        OcrResult.is_draft.desc(),
+        OcrResult.created_at.asc(),
+        OcrResult.id.asc(),
+    )
+
+
+def _thumbnail_path(original_image_path):
+    """ภาพย่อของแถวที่อยู่ใน upload store (files/<key>) — แถวเก่า (uploads/...) ใช้ต้นฉบับตามเดิม"""
+    if original_image_path and original_image_path.startswith("files/"):
+        return f"{original_image_path}/thumb"
+    return original_image_path
+
+
+def _row_to_dict(r, cer_avg):
+    return {
+        "id": r.id,
+        "filename": r.filename,
+        "id_number": r.id_number,
+        "prefix": r.prefix,
+        "first_name": r.first_name,
+        "last_name": r.last_name,
+        "dob": r.dob,
+        "address": r.address,
+        "is_draft": r.is_draft,
+        "created_at": r.created_at.strftime("%Y-%m-%d %H:%M"),
+        "cer_avg": cer_avg,
+        "original_image_path": r.original_image_path,
+        "processed_image_path": r.processed_image_path,
+        "thumbnail_path": _thumbnail_path(r.original_image_path),
+    }
+
+
+# ====== Cursor (keyset) ======
+def encode_cursor(r):
+    key = [r.filename, bool(r.is_draft), r.created_at.isoformat(), r.id]
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    filename, is_draft, created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return filename, bool(is_draft), datetime.fromisoformat(created_at), int(row_id)
+
+
+def _after_cursor(filename, is_draft, created_at, row_id):
+    """เงื่อนไข "อยู่หลัง cursor" ตามลำดับ (filename ASC, is_draft DESC, created_at ASC, id ASC)
+
+    filename เป็น NULL ได้ — SQLite / MySQL เรียง NULL ไว้ก่อนเสมอใน ASC จึงเทียบด้วย IS NULL / IS NOT NULL
+    (ไม่ใช้ coalesce เพื่อให้ยังเรียงตาม index ix_ocr_results_user_file_draft_created ได้)
+    """
+    if filename is None:
+        same_file = OcrResult.filename.is_(None)
+        later_file = OcrResult.filename.is_not(None)
+    else:
+        same_file = OcrResult.filename == filename
+        later_file = OcrResult.filename > filename
+    same_draft = and_(same_file, OcrResult.is_draft == is_draft)
+    same_time = and_(same_draft, OcrResult.created_at == created_at)
+    return or_(
+        later_file,
+        # is_draft DESC: หลัง draft คือผลจริง — หลังผลจริงไม่มีอะไรแล้ว (เทียบ < กับ True/False ใน SQLAlchemy ไม่ได้)
+        and_(same_file, OcrResult.is_draft.is_(False)) if is_draft else false(),
+        and_(same_draft, OcrResult.created_at > created_at),
+        and_(same_time, OcrResult.id > row_id),
+    )
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+# ====== /ocr_history — แบ่งหน้าแบบ keyset ======
+@history_bp.route("/ocr_history/<int:user_id>", methods=["GET"])
+def ocr_history(user_id):
+    """query string: limit (≤200), cursor (จาก next_cursor), status=all|draft|final,
+    date_from/date_to=YYYY-MM-DD"""
+    status = request.args.get("status", "all")
+    if status not in ("all", "draft", "final"):
+        return jsonify({"error": "status must be all, draft or final"}), 400
+
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), MAX_PAGE_SIZE)
+        date_from = _parse_date(request.args.get("date_from"))
+        date_to = _parse_date(request.args.get("date_to"))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer and dates YYYY-MM-DD"}), 400
+
+    q = _history_query(user_id, status, date_from, date_to)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            q = q.filter(_after_cursor(*decode_cursor(cursor)))
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    # ดึงเกินมา 1 แถวเพื่อรู้ว่ายังมีหน้าถัดไปหรือไม่
+    rows = q.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return jsonify({
+        "history": [_row_to_dict(r, cer_avg) for r, cer_avg in rows],
+        "next_cursor": encode_cursor(rows[-1][0]) if has_more else None,
+        "has_more": has_more,
+    })
+
+
+# ====== /get_ocr_history (เดิม — ทั้งหมดในครั้งเดียว) ======
+@history_bp.route("/get_ocr_history/<int:user_id>", methods=["GET"])
+def get_ocr_history(user_id):
+    """ดึงประวัติผล OCR ของผู้ใช้ — เรียงไฟล์เดียวกันให้อยู่คู่กัน (draft ก่อน ผลจริงทีหลัง)"""
+    data = [_row_to_dict(r, cer_avg) for r, cer_avg in _history_query(user_id).all()]
+
+    # ✅ จัดเรียงซ้ำใน Python เพื่อความชัวร์ (ไม่สนตัวพิมพ์เล็ก/ใหญ่ของชื่อไฟล์)
+    data.sort(key=lambda x: ((x["filename"] or "").lower(), 1 if x["is_draft"] else 2))
+
+    return jsonify({"history": data})
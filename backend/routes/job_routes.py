@@ -0,0 +1,156 @@
+import os
+import json
+from flask import Blueprint, request, jsonify, current_app, Response
+from database import db
+from routes.ocr_routes import (
+    ALLOWED_EXT,
+    _parse_user_id,
+    _decode_upload,
+    _persist_upload,
+    _build_draft,
+    _commit_draft,
+    run_ocr,
+    get_ocr_cache,
+)
+from utils.ocr_cache import content_hash
+from utils.ocr_text import ocr_text_payload
+from utils.ocr_jobs import OcrJobQueue, QueueFullError, PRIORITY_LANES
+
+job_bp = Blueprint("job_bp", __name__)
+
+
+# ====== งาน OCR ที่รันใน worker ======
+def _run_ocr_job(job, payload):
+    """pipeline เดียวกับ /upload_ocr แต่รันนอก request thread และรายงาน stage ระหว่างทาง"""
+    filename = payload["filename"]
+    job.update(stage="decode")
+    digest = content_hash(payload["data"])
+    cache = get_ocr_cache()
+    cached = cache.get(digest, commit=False)
+    card = None
+    if cached is not None:
+        text = cached["raw_text"]
+        ocr_text = cached.get("ocr_text")
+        data = dict(cached["fields"])
+    else:
+        db.session.close()   # ไม่ถือ connection ระหว่าง OCR
+        img = _decode_upload(payload["data"])
+        if img is None:
+            raise ValueError("Cannot read image")
+
+        job.update(stage="ocr")
+        _, text, data, card = run_ocr(img)
+        ocr_text = ocr_text_payload(card)
+
+    original_rel, processed_rel = _persist_upload(filename, payload["data"], digest)
+    if cached is None:
+        cache.put(digest, text, data, processed_rel, ocr_text, commit=False)
+
+    job.update(stage="db")
+    draft = _build_draft(payload["user_id"], filename, data, processed_rel, ocr_text, original_rel)
+    _commit_draft(draft, cache)
+
+    return {
+        "filename": filename,
+        "ocr_result_id": draft.id,
+        "raw_text": text,
+        "processed_image_path": processed_rel,
+        "original_image_path": original_rel,
+        "cache_hit": cached is not None,
+        "card": card,
+        "result": data,
+    }
+
+
+job_queue = None
+
+
+def get_job_queue():
+    global job_queue
+    if job_queue is None:
+        job_queue = OcrJobQueue(
+            _run_ocr_job,
+            max_depth=current_app.config.get("OCR_JOB_QUEUE_DEPTH", 100),
+            lane_depths=current_app.config.get("OCR_JOB_LANE_DEPTHS"),
+            workers=current_app.config.get("OCR_JOB_WORKERS", 2),
+        )
+    job_queue.start(current_app._get_current_object())
+    return job_queue
+
+
+# ====== POST /ocr_jobs ======
+@job_bp.route("/ocr_jobs", methods=["POST"])
+def submit_ocr_job():
+    """รับไฟล์แล้วตอบ job_id ทันที (202) — ผลลัพธ์ดูได้จาก /ocr_jobs/<id> หรือ SSE /ocr_jobs/<id>/events"""
+    file = request.files.get("file")
+    user_id = _parse_user_id(request.form.get("user_id"))
+    priority = request.form.get("priority", "normal")
+
+    if not file:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    ext = os.path.splitext(file.filename)[1].lower()
+    if ext not in ALLOWED_EXT:
+        return jsonify({"error": "File type not allowed"}), 400
+
+    if priority not in PRIORITY_LANES:
+        return jsonify({"error": f"priority must be one of {list(PRIORITY_LANES)}"}), 400
+
+    payload = {"filename": file.filename, "user_id": user_id, "data": file.read()}
+    try:
+        job = get_job_queue().submit(payload, priority=priority)
+    except QueueFullError:
+        resp = jsonify({"error": "OCR queue is full, please retry later"})
+        resp.headers["Retry-After"] = str(current_app.config.get("OCR_JOB_RETRY_AFTER", 5))
+        return resp, 429
+
+    return jsonify({
+        "message": "OCR job queued",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/ocr_jobs/{job.id}",
+        "events_url": f"/ocr_jobs/{job.id}/events",
+    }), 202
+
+
+# ====== GET /ocr_jobs/<id> ======
+@job_bp.route("/ocr_jobs/<job_id>", methods=["GET"])
+def get_ocr_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "ไม่พบงาน OCR นี้"}), 404
+    return jsonify(job.to_dict())
+
+
+# ====== GET /ocr_jobs/<id>/events (Server-Sent Events) ======
+@job_bp.route("/ocr_jobs/<job_id>/events", methods=["GET"])
+def stream_ocr_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "ไม่พบงาน OCR นี้"}), 404
+
+    heartbeat = current_app.config.get("OCR_JOB_SSE_HEARTBEAT", 15)
+
+    def events():
+        version = -1
+        while True:
+            new_version = job.wait_for_change(version, timeout=heartbeat)
+            if new_version == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = new_version
+            yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+            if job.finished:
+                return
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ====== GET /ocr_jobs_stats ======
+@job_bp.route("/ocr_jobs_stats", methods=["GET"])
+def ocr_jobs_stats():
+    return jsonify(get_job_queue().stats())
@@ -0,0 +1,47 @@
+import json
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+from utils.metrics import metrics
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+# ====== จับเวลาทุก request ======
+@metrics_bp.before_app_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def _record_request(response):
+    start = g.pop("request_start", None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or "unknown"
+    metrics.observe("http_request_seconds", elapsed, endpoint=endpoint)
+    metrics.inc("http_requests_total", endpoint=endpoint, status=str(response.status_code))
+
+    # แนบ timings ต่อ stage ลงใน JSON response (เปิดด้วย ?timings=1 หรือ METRICS_ATTACH_TIMINGS)
+    wants_timings = request.args.get("timings") == "1" or current_app.config.get("METRICS_ATTACH_TIMINGS", False)
+    if wants_timings and response.is_json and not response.is_streamed:
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            timings = dict(g.get("timings", {}))
+            timings["total"] = round(elapsed, 6)
+            body["timings"] = timings
+            response.set_data(json.dumps(body, ensure_ascii=False))
+    return response
+
+
+# ====== /metrics (Prometheus text format) ======
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+# ====== /metrics.json — สรุป p50/p95/p99 สำหรับดูด้วยตา ======
+@metrics_bp.route("/metrics.json", methods=["GET"])
+def metrics_json():
+    return jsonify(metrics.snapshot())
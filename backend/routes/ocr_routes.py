@@ -1,31 +1,93 @@
+import hashlib
 import os
 import re
+import threading
+import time
+from datetime import timedelta
 import cv2
 import numpy as np
-import easyocr
-import torch
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
 from database import db
 from database.models import OcrResult, CerResult
 from pathlib import Path
 import Levenshtein as L
-from utils.normalizer import normalize_pred
-from pythainlp.tag import NER
-from flask import send_file
-import csv
-import io
+from utils.normalizer import NORMALIZER_VERSION
+from utils.field_extractor import extract_fields, extract_roi_fields, invalid_fields, ROI_FIELDS
+from utils.gazetteer import get_gazetteer, snap_address
+from utils.model_registry import registry, get_ner, get_reader
+from utils.ocr_pool import PoolBusyError
+from utils.ocr_engines import build_engine
+from utils.preprocess import preprocess_adaptive, apply_recipe, retry_recipes
+from utils.ocr_cache import OcrResultCache, content_hash
+from utils.ocr_text import ocr_text_payload, pack_ocr_text
+from utils.reextract import run_reextract
+from utils.cer_rollup import record_cer
+from utils.card_detect import locate_card, crop_field_rois
+from utils.image_io import decode_image_bytes
+from utils.upload_store import LocalUploadStore, thumbnail
+from utils.metrics import timer, metrics
+
+# โมเดล (ThaiNER, EasyOCR) ไม่โหลดตอน import — ดู MODEL_LOAD_MODE / init_models ใน app.py
 
-# ====== Thai NER model ======
-thai_ner = NER("thainer")
+ocr_bp = Blueprint("ocr_bp", __name__)
+
+# เพิ่มเลขนี้ทุกครั้งที่แก้ extract_fields_from_text / preprocess
+EXTRACTOR_VERSION = "7"
+PIPELINE_VERSION_MAX = 100   # ความยาวคอลัมน์ OcrCacheEntry.pipeline_version
+
+
+def pipeline_version():
+    """เวอร์ชันรวมของ pipeline (โมเดล + extractor + normalizer) — ใช้เป็นส่วนหนึ่งของ cache key"""
+    models = "+".join(registry.version(name) for name in sorted(registry.names()))
+    cfg = current_app.config
+    preprocess = f"{cfg.get('OCR_PREPROCESS', 'adaptive')}{cfg.get('OCR_PREPROCESS_RETRIES', 1)}"
+    version = (f"{models}|{extraction_version()}"
+               f"|eng-{get_ocr_engine().version}|pre-{preprocess}")
+    if len(version) > PIPELINE_VERSION_MAX:
+        # config ยาว (เช่น cascade ทุกฟิลด์) — ย่อท้ายเป็น hash ให้ยังแยกเวอร์ชันได้
+        version = version[:PIPELINE_VERSION_MAX - 13] + "~" + hashlib.sha1(version.encode()).hexdigest()[:12]
+    return version
+
+
+def extraction_version():
+    """เวอร์ชันของขั้น extract (ข้อความ → ฟิลด์) — เก็บใน OcrResult.extractor_version ให้ re-extract รู้ว่าแถวไหนเก่า"""
+    # ปิด GAZETTEER_SNAP แล้วที่อยู่ไม่ถูกแทนชื่อ — ผลต่างจากตอนเปิด จึงแยกเวอร์ชัน
+    snap = "" if current_app.config.get("GAZETTEER_SNAP", True) else "-nosnap"
+    return f"ext-{EXTRACTOR_VERSION}{snap}|norm-{NORMALIZER_VERSION}"
+
+
+ocr_engine = None
+
+
+def get_ocr_engine():
+    """engine ตาม OCR_ENGINE (easyocr | tesseract | cascade) — สร้างครั้งแรกที่ใช้"""
+    global ocr_engine
+    if ocr_engine is None:
+        cfg = current_app.config
+        ocr_engine = build_engine(
+            cfg.get("OCR_ENGINE", "cascade"),
+            get_reader,
+            cascade_fields=[f.strip() for f in cfg.get("OCR_CASCADE_FIELDS", "id_number,dob").split(",") if f.strip()],
+            min_confidence=cfg.get("OCR_CASCADE_MIN_CONF", 0.75),
+            tesseract_cmd=cfg.get("TESSERACT_CMD"),
+        )
+    return ocr_engine
 
-# ====== ตรวจสอบ GPU (MPS) บน Mac ======
-USE_GPU = torch.backends.mps.is_available()
-print(f"🔥 EasyOCR is using {'GPU (MPS)' if USE_GPU else 'CPU'}")
 
-# ====== EasyOCR Reader ======
-reader = easyocr.Reader(['th'], gpu=USE_GPU)
+ocr_cache = None
 
-ocr_bp = Blueprint("ocr_bp", __name__)
+
+def get_ocr_cache():
+    global ocr_cache
+    if ocr_cache is None:
+        ocr_cache = OcrResultCache(
+            pipeline_version(),
+            memory_max_bytes=current_app.config.get("OCR_CACHE_MEMORY_MB", 32) * 1024 * 1024,
+            db_max_bytes=current_app.config.get("OCR_CACHE_DB_MB", 256) * 1024 * 1024,
+            stale_after=timedelta(hours=current_app.config.get("OCR_CACHE_STALE_HOURS", 24)),
+        )
+    return ocr_cache
 
 # ====== Gaussian Preprocess ======
 def preprocess_gaussian(img):
@@ -33,6 +95,16 @@ def preprocess_gaussian(img):
     blur = cv2.GaussianBlur(gray, (5, 5), 0)
     return blur
 
+
+def preprocess_image(img, deskew=True):
+    """preprocess ตาม OCR_PREPROCESS — คืน (processed, gray, recipe, quality)
+
+    adaptive: เลือก recipe จากคุณภาพภาพ (utils/preprocess.py) | gaussian: แบบเดิม (gray / quality = None)
+    """
+    if current_app.config.get("OCR_PREPROCESS", "adaptive") == "gaussian":
+        return preprocess_gaussian(img), None, "gaussian", None
+    return preprocess_adaptive(img, deskew=deskew)
+
 # ====== CER Calculation ======
 def compute_cer(pred: str, truth: str) -> float:
     pred = re.sub(r"\s+", "", (pred or "").strip())
@@ -42,204 +114,454 @@ def compute_cer(pred: str, truth: str) -> float:
     return round(L.distance(pred, truth) / len(truth), 4)
 
 # ====== Extract Fields with Regex + NER ======
-def extract_fields_from_text(text):
-    from pythainlp.tag import NER
-    import Levenshtein as L
-    import re
-
-    thai_ner = NER("thainer")
-    data = {}
-
-    # --- Clean up unwanted chars ---
-    text = re.sub(r"[^\u0E00-\u0E7F0-9\s\.\/\-]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-
-    # =============================
-    # 🔹 1. หมายเลขบัตรประชาชน
-    # =============================
-    id_match = re.search(r"\b[1-8]\s?[0-9]{4}\s?[0-9]{5}\s?[0-9]{2}\s?[0-9]\b", text)
-    if id_match:
-        data["id_number"] = re.sub(r"\s+", "", id_match.group(0))
-    else:
-        id_match2 = re.search(r"\d{12,}", text)
-        data["id_number"] = id_match2.group(0) if id_match2 else ""
-
-    # =============================
-    # 🔹 2. ใช้ NER หาคำนำหน้า / ชื่อ / นามสกุล (พร้อม fallback)
-    # =============================
-    prefix, first_name, last_name = "", "", ""
-    ner_result = thai_ner.tag(text)
-
-    for token, tag in ner_result:
-        if tag == "TITLE":
-            prefix = token
-        elif tag == "NAME" and not first_name:
-            first_name = token
-        elif tag == "SURNAME" and not last_name:
-            last_name = token
-
-    if not prefix or not first_name or not last_name:
-        name_match = re.search(
-            r"(นาย|นางสาว|นาง|น\.ส\.|นส)\s*([ก-๙]{2,})\s*([ก-๙]{2,})", text
-        )
-        if name_match:
-            prefix = prefix or name_match.group(1)
-            first_name = first_name or name_match.group(2)
-            last_name = last_name or name_match.group(3)
-
-    data["prefix"] = prefix
-    data["first_name"] = first_name
-    data["last_name"] = last_name
-
-    # =============================
-    # 🔹 3. วันเดือนปีเกิด
-    # =============================
-    text_fixed = re.sub(r"ก\.ุพ\.", "ก.พ.", text)
-    text_fixed = re.sub(r"เม\.ย\.", "เม.ย.", text_fixed)
-    dob_match = re.search(
-        r"(\d{1,2}\s*(ม\.ค\.|ก\.พ\.|มี\.ค\.|เม\.ย\.|พ\.ค\.|มิ\.ย\.|ก\.ค\.|ส\.ค\.|ก\.ย\.|ต\.ค\.|พ\.ย\.|ธ\.ค\.)\s*\d{2,4})",
-        text_fixed
-    )
-    data["dob"] = dob_match.group(1) if dob_match else ""
-
-    # =============================
-    # 🔹 4. ที่อยู่ (ปรับปรุงใหม่ - กลยุทธ์ "นักสืบหาชิ้นส่วน")
-    # =============================
-    address = ""
-    text_for_addr = re.sub(r"\s+", " ", text) 
-    
-    # --- Step 1: หา Anchor "ที่อยู่" เพื่อกำหนดพื้นที่ค้นหา ---
-    address_anchor = "ที่อยู่"
-    best_match_ratio = 0.6
-    best_match_start_index = -1
-
-    tokens = text_for_addr.split()
-    for token in tokens:
-        # ใช้ Fuzzy matching หาคำที่คล้าย "ที่อยู่" ที่สุด
-        ratio = L.ratio(token, address_anchor)
-        if ratio > best_match_ratio:
-            best_match_ratio = ratio
-            best_match_start_index = text_for_addr.find(token)
-            
-    # --- Step 2: ถ้าเจอ Anchor, สร้าง "หน้าต่างค้นหา" และเริ่มตามล่าชิ้นส่วน ---
-    if best_match_start_index != -1:
-        # กำหนดหน้าต่างค้นหาประมาณ 150 ตัวอักษรหลัง Anchor
-        search_window = text_for_addr[best_match_start_index : best_match_start_index + 150]
-        
-        # --- เตรียมข้อมูลในหน้าต่าง: แก้คำผิดที่เจอบ่อย ---
-        search_window = search_window.replace("หม่ที", "หมู่ที่").replace("ด.", "ต.").replace("ทบคลอ", "ทับคล้อ")
-
-        # --- ตามล่าหาแต่ละชิ้นส่วนด้วย Regex เฉพาะทาง ---
-        house_no_match = re.search(r"\d+[\/\d-]*", search_window)
-        moo_match = re.search(r"(?:หมู่ที่|หมู่ที|หมู่|ม\.)\s*\d+", search_window)
-        tambon_match = re.search(r"(?:ต\.?|ตำบล|แขวง)\s*[\u0E00-\u0E7F]+", search_window)
-        amphoe_match = re.search(r"(?:อ\.|อำเภอ)\s*[\u0E00-\u0E7F]+", search_window)
-        province_match = re.search(r"(?:จ\.?|จังหวัด)\s*[\u0E00-\u0E7F]+", search_window)
-        
-        # --- Step 3: ประกอบร่างชิ้นส่วนที่หาเจอ ---
-        address_parts = []
-        if house_no_match:
-            address_parts.append(house_no_match.group(0))
-        if moo_match:
-            address_parts.append(moo_match.group(0))
-        if tambon_match:
-            address_parts.append(tambon_match.group(0))
-        if amphoe_match:
-            address_parts.append(amphoe_match.group(0))
-        if province_match:
-            # นำผลลัพธ์ของจังหวัดมาตัดคำว่า "จังหวัด" หรือ "จ." ซ้ำซ้อนออก
-            clean_province = province_match.group(0).replace("จังหวัด", "จ.").strip()
-            address_parts.append(clean_province)
-            
-        # รวมทุกชิ้นส่วนและทำความสะอาดครั้งสุดท้าย
-        address = " ".join(address_parts)
-        address = re.sub(r"\s+", " ", address).strip()
-
-    data["address"] = address
-
-    # =============================
-    # 🔹 5. Normalize ทุกฟิลด์
-    # =============================
-    for k in data:
-        data[k] = normalize_pred(k, data[k])
-
-    return data
+def extract_fields_from_text(text, raw=None):
+    """ข้อความ OCR ทั้งใบ → ฟิลด์ที่ normalize แล้ว (ตัว engine อยู่ใน utils/field_extractor.py)"""
+    return extract_fields(text, get_ner(), raw=raw)
+
+# ====== Extract Fields จาก ROI ของบัตร ======
+def extract_fields_from_rois(crops, engine, raw=None):
+    """OCR เฉพาะ ROI ของแต่ละฟิลด์แล้วส่งข้อความเข้า normalizer ของฟิลด์นั้นตรง ๆ
+
+    crops ส่งมาแค่บาง ROI ได้ (ตอนอ่านซ้ำ) — data มีเฉพาะฟิลด์ของ ROI ที่ส่งมา
+    คืน (texts, data, engines) — engines บอกว่าแต่ละ ROI อ่านด้วย engine ไหน
+    """
+    texts, engines = engine.read_fields(crops)
+    return texts, extract_roi_fields(texts, raw), engines
 
-# ====== /upload_ocr ======
-# ====== /upload_ocr ======
-@ocr_bp.route("/upload_ocr", methods=["POST"])
-def upload_ocr():
-    file = request.files.get("file")
-    user_id = request.form.get("user_id")  # ✅ ดึง user_id จาก frontend
 
-    # 🔹 แปลง user_id จาก string → int
+# ====== OCR ทั้ง pipeline สำหรับภาพหนึ่งใบ ======
+def locate_and_preprocess(img, located=None):
+    """หาบัตร + preprocess — คืน (roi_mode, fit, (processed, gray, recipe, quality))
+
+    ใช้ทั้งใน run_ocr และตอนสร้างภาพ processed ให้ frontend (variant "processed" ของ upload store)
+    located = (บัตรที่ warp แล้ว, fit) ถ้าหาบัตรไว้ก่อนแล้ว (เช่นตอนเลือกเฟรมจาก burst) — ข้ามการหาบัตร
+    """
+    threshold = current_app.config.get("CARD_FIT_THRESHOLD", 0.6)
+
+    if located is None:
+        with timer("card_detect"):
+            card_img, fit = locate_card(img)
+    else:
+        card_img, fit = located
+    roi_mode = card_img is not None and fit >= threshold
+
+    # บัตรที่ warp แล้วตรงอยู่แล้ว — deskew เฉพาะตอน OCR ทั้งภาพ
+    with timer("preprocess"):
+        return roi_mode, fit, preprocess_image(card_img if roi_mode else img, deskew=not roi_mode)
+
+
+def run_ocr(img, located=None):
+    """หาบัตร → preprocess ตามคุณภาพภาพ → OCR เฉพาะ ROI; ถ้าบัตรเข้ากับแม่แบบไม่ดีพอ ค่อย OCR ทั้งภาพ
+
+    ฟิลด์ที่ไม่ผ่าน invalid_fields จะถูกอ่านซ้ำด้วย recipe สำรอง (ไม่เกิน OCR_PREPROCESS_RETRIES ครั้ง)
+    โหมด ROI อ่านซ้ำเฉพาะ ROI ของฟิลด์ที่ไม่ผ่าน และรับค่าใหม่เฉพาะฟิลด์ที่ผ่านการตรวจ
+
+    คืน (processed, raw_text, fields, card) โดย card = {"mode": "roi"|"full", "fit": คะแนน 0–1,
+    "engines": {roi: engine ที่อ่าน}, "texts": {roi: ข้อความ} (หรือ {"full": ...}),
+    "preprocess": {"recipe", "quality", "retried", "fields", "alt_texts"}}
+    alt_texts = ข้อความทั้งภาพจาก recipe สำรอง (โหมด full) — เก็บไว้ให้ re-extract ทำซ้ำได้ (utils/ocr_text.py)
+    located = ดู locate_and_preprocess
+    """
+    return _run_prepared(get_ocr_engine(), locate_and_preprocess(img, located))
+
+
+def run_ocr_batch(images, **batch):
+    """run_ocr หลายภาพ — รอบแรกของภาพที่ต้อง OCR ทั้งใบอ่านด้วย engine.read_many ครั้งเดียว
+    (batch = n_width / n_height / batch_size) ส่วนที่เหลือ (ROI, อ่านซ้ำ, extract) เหมือน run_ocr ทุกอย่าง
+    """
+    engine = get_ocr_engine()
+    prepared = [locate_and_preprocess(img) for img in images]
+    full = [i for i, (roi_mode, _, _) in enumerate(prepared) if not roi_mode]
+    first = {}
+    if full:
+        with timer("ocr"):
+            first = dict(zip(full, engine.read_many([prepared[i][2][0] for i in full], **batch)))
+    return [_run_prepared(engine, p, first.get(i)) for i, p in enumerate(prepared)]
+
+
+def _run_prepared(engine, prepared, first_read=None):
+    """ขั้นหลัง locate_and_preprocess ของ run_ocr — first_read = (text, conf) ที่อ่านทั้งภาพมาแล้ว (run_ocr_batch)"""
+    roi_mode, fit, (processed, gray, recipe, quality) = prepared
+
+    raw = {}
+    if roi_mode:
+        texts, data, engines = extract_fields_from_rois(crop_field_rois(processed), engine, raw)
+    else:
+        if first_read is None:
+            with timer("ocr"):
+                first_read = engine.read(processed)
+        text, _ = first_read
+        with timer("extract"):
+            data = extract_fields_from_text(text, raw)
+        engines = {"full": getattr(engine, "expensive", engine).name}
+
+    prep = {"recipe": recipe, "quality": quality, "retried": [], "fields": {}, "alt_texts": []}
+    bad = invalid_fields(data, raw) if gray is not None else []
+    for alt in retry_recipes(recipe, current_app.config.get("OCR_PREPROCESS_RETRIES", 1)):
+        if not bad:
+            break
+        prep["retried"].append(alt)
+        with timer("preprocess_retry"):
+            alt_img = apply_recipe(gray, alt, quality)
+        alt_raw = {}
+        if roi_mode:
+            rois = [roi for roi, fields in ROI_FIELDS.items() if set(fields) & set(bad)]
+            alt_crops = {roi: crop for roi, crop in crop_field_rois(alt_img).items() if roi in rois}
+            alt_texts, alt_data, alt_engines = extract_fields_from_rois(alt_crops, engine, alt_raw)
+        else:
+            with timer("ocr"):
+                alt_text, _ = engine.read(alt_img)
+            prep["alt_texts"].append(alt_text)
+            with timer("extract"):
+                alt_data = extract_fields_from_text(alt_text, alt_raw)
+
+        alt_bad = set(invalid_fields(alt_data, alt_raw))
+        fixed = [f for f in bad if f in alt_data and f not in alt_bad]
+        for f in fixed:
+            data[f] = alt_data[f]
+            prep["fields"][f] = alt
+        if roi_mode:
+            for roi in rois:
+                if set(ROI_FIELDS[roi]) & set(fixed):
+                    texts[roi], engines[roi] = alt_texts[roi], alt_engines[roi]
+        bad = [f for f in bad if f not in fixed]
+
+    if not roi_mode:
+        texts = {"full": text}
+    raw_text = "\n".join(texts.values())
+    return processed, raw_text, data, {
+        "mode": "roi" if roi_mode else "full", "fit": fit, "engines": engines, "texts": texts, "preprocess": prep,
+    }
+
+ALLOWED_EXT = {".jpg", ".jpeg", ".png"}
+
+
+def _parse_user_id(raw):
+    """แปลง user_id จาก string → int (ค่าไม่ถูกต้องถือเป็น None)"""
     try:
-        user_id = int(user_id) if user_id else None
+        return int(raw) if raw else None
     except ValueError:
-        user_id = None
+        return None
 
-    # 🔹 Debug ดูค่าที่ Flask ได้รับ
-    print(f"[DEBUG] /upload_ocr: user_id={user_id}, type={type(user_id)}")
 
-    if not file:
-        return jsonify({"error": "No file uploaded"}), 400
+upload_store = None
 
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in {".jpg", ".jpeg", ".png"}:
-        return jsonify({"error": "File type not allowed"}), 400
 
-    BASE_DIR = Path(__file__).resolve().parents[1]
-    save_dir = BASE_DIR / "uploads"
-    save_dir.mkdir(exist_ok=True)
-    os.chmod(save_dir, 0o777)
+def get_upload_store():
+    """ที่เก็บไฟล์อัปโหลด (content-addressed) — สร้างครั้งแรกที่ใช้ที่ <backend>/<UPLOAD_FOLDER>
 
-    filename = file.filename
-    save_path = str(save_dir / filename)
-    file.save(save_path)
+    variant "processed" สร้างจากต้นฉบับด้วย locate_and_preprocess ตอนถูกขอครั้งแรก (ไม่เขียนตอนอัปโหลด)
+    version ผูกกับ EXTRACTOR_VERSION / OCR_PREPROCESS — เปลี่ยน preprocess แล้วภาพเก่าไม่ถูกใช้อีก
+    """
+    global upload_store
+    if upload_store is None:
+        cfg = current_app.config
+        root = Path(__file__).resolve().parents[1] / cfg.get("UPLOAD_FOLDER", "uploads")
+        store = LocalUploadStore(
+            root,
+            variants_max_bytes=cfg.get("UPLOAD_VARIANTS_MAX_MB", 512) * 1024 * 1024,
+            max_side=cfg.get("UPLOAD_MAX_SIDE", 2000),
+        )
+        store.register_variant("thumb", thumbnail(cfg.get("UPLOAD_THUMB_SIDE", 320)),
+                               encode_params=(cv2.IMWRITE_JPEG_QUALITY, 80))
+        store.register_variant("processed", lambda img: locate_and_preprocess(img)[2][0],
+                               version=f"ext{EXTRACTOR_VERSION}-{cfg.get('OCR_PREPROCESS', 'adaptive')}",
+                               encode_params=(cv2.IMWRITE_JPEG_QUALITY, 90))
+        upload_store = store
+    return upload_store
+
+
+def _decode_upload(raw):
+    """decode ไฟล์ที่อัปโหลดในหน่วยความจำ (ย่อภาพใหญ่ระหว่าง decode ตาม UPLOAD_MAX_SIDE)"""
+    return decode_image_bytes(raw, max_side=current_app.config.get("UPLOAD_MAX_SIDE", 2000))
 
-    # --- อ่านภาพ + Preprocess ---
-    img = cv2.imread(save_path)
-    if img is None:
-        return jsonify({"error": "Cannot read image"}), 400
 
-    processed = preprocess_gaussian(img)
-    processed_path = str(save_dir / f"processed_{filename}")
-    cv2.imwrite(processed_path, processed)
+def _persist_upload(filename, raw, digest=None):
+    """เก็บต้นฉบับลง upload store แบบ background ถ้าเปิด PERSIST_UPLOADS (ชื่อไฟล์ = SHA-256 ของเนื้อไฟล์)
 
-    # --- OCR ---
-    result = reader.readtext(processed, detail=0, paragraph=True)
-    text = "\n".join(result)
+    คืน (path ต้นฉบับ, path ภาพ processed) สำหรับ frontend / DB หรือ (None, None) ถ้าไม่ได้บันทึก
+    digest = content_hash(raw) ถ้าคำนวณไว้แล้ว (ไม่ต้อง hash ซ้ำ)
+    """
+    if not current_app.config.get("PERSIST_UPLOADS", True):
+        return None, None
+    store = get_upload_store()
+    key = store.put_async(raw, os.path.splitext(filename)[1], digest)
+    return store.url(key), store.url(key, "processed")
 
-    # --- Extract fields ---
-    data = extract_fields_from_text(text)
 
-    # ✅ สร้าง Draft Record (เก็บ OCR ดิบก่อนแก้)
-    from database.models import OcrResult
-    ocr_draft = OcrResult(
+def _build_draft(user_id, filename, data, processed_image_path=None, ocr_text=None, original_image_path=None):
+    """สร้าง Draft Record (เก็บ OCR ดิบก่อนแก้) — ยังไม่ add/commit
+
+    ocr_text = payload จาก utils/ocr_text.py (ข้อความ OCR ดิบ) เก็บแบบบีบอัดไว้ใช้ re-extract
+    """
+    return OcrResult(
         user_id=user_id,
         filename=filename,
-        original_image_path=f"uploads/{filename}",
-        processed_image_path=f"uploads/processed_{filename}",
+        original_image_path=original_image_path,
+        processed_image_path=processed_image_path,
         id_number=data.get("id_number"),
         prefix=data.get("prefix"),
         first_name=data.get("first_name"),
         last_name=data.get("last_name"),
         dob=data.get("dob"),
         address=data.get("address"),
-        is_draft=bool(True),  # ✅ เก็บสถานะเป็น Draft
+        is_draft=True,  # ✅ เก็บสถานะเป็น Draft
+        ocr_text_z=pack_ocr_text(ocr_text),
+        extractor_version=extraction_version(),
     )
-    db.session.add(ocr_draft)
-    db.session.commit()
+
+
+def _commit_draft(draft, cache=None):
+    """บันทึก draft พร้อมแถวแคชที่ put(commit=False) ไว้ใน transaction เดียว (commit ครั้งเดียวต่อ upload)"""
+    _commit_drafts([draft], cache)
+
+
+def _commit_drafts(drafts, cache=None):
+    """_commit_draft หลายแถว (/upload_ocr_batch)
+
+    request อื่นที่อัปโหลดไฟล์เดียวกันพร้อมกันอาจเขียนแถวแคชเดียวกันไปก่อน (unique constraint) —
+    กรณีนั้น rollback แล้วบันทึกเฉพาะ draft
+    """
+    db.session.add_all(drafts)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        db.session.add_all(drafts)
+        db.session.commit()
+        return
+    if cache is not None:
+        cache.evict()
+
+
+def _pool_busy():
+    """OCR pool มีงานค้างเต็ม (OCR_POOL_MAX_INFLIGHT) — ให้ client ลองใหม่ภายหลัง"""
+    resp = jsonify({"error": "OCR workers are busy, please retry later"})
+    resp.headers["Retry-After"] = str(int(current_app.config.get("OCR_POOL_SUBMIT_TIMEOUT", 10)))
+    return resp, 503
+
+
+# ====== /upload_ocr ======
+@ocr_bp.route("/upload_ocr", methods=["POST"])
+def upload_ocr():
+    file = request.files.get("file")
+    user_id = _parse_user_id(request.form.get("user_id"))  # ✅ ดึง user_id จาก frontend
+
+    # 🔹 Debug ดูค่าที่ Flask ได้รับ
+    print(f"[DEBUG] /upload_ocr: user_id={user_id}, type={type(user_id)}")
+
+    if not file:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    ext = os.path.splitext(file.filename)[1].lower()
+    if ext not in ALLOWED_EXT:
+        return jsonify({"error": "File type not allowed"}), 400
+
+    filename = file.filename
+    raw = file.read()
+
+    # --- ไฟล์เดิม (เนื้อหาเดียวกัน) เคย OCR แล้ว → ใช้ผลจากแคช ---
+    with timer("cache_lookup"):
+        digest = content_hash(raw)
+        cache = get_ocr_cache()
+        cached = cache.get(digest, commit=False)
+
+    card = None
+    if cached is not None:
+        text = cached["raw_text"]
+        ocr_text = cached.get("ocr_text")
+        data = dict(cached["fields"])
+    else:
+        # ไม่ถือ connection ของ pool ไว้ระหว่าง OCR (หลายวินาที) — ใช้ใหม่ตอนบันทึก
+        db.session.close()
+
+        # --- decode ในหน่วยความจำ (ไม่ผ่านไฟล์ชั่วคราว) ---
+        with timer("decode"):
+            img = _decode_upload(raw)
+        if img is None:
+            return jsonify({"error": "Cannot read image"}), 400
+
+        # --- หาบัตร + Preprocess + OCR + Extract fields ---
+        try:
+            processed, text, data, card = run_ocr(img)
+        except PoolBusyError:
+            return _pool_busy()
+        img = processed = None
+        ocr_text = ocr_text_payload(card)
+
+    # ไฟล์เนื้อหาเดียวกันได้ path เดิม (เขียนครั้งเดียว) — cache hit ก็ใช้ path จาก upload store ปัจจุบัน
+    original_rel, processed_rel = _persist_upload(filename, raw, digest)
+    if cached is None:
+        cache.put(digest, text, data, processed_rel, ocr_text, commit=False)
+
+    # ✅ สร้าง Draft Record (เก็บ OCR ดิบก่อนแก้) — commit พร้อมแถวแคช / ตัวนับ hit
+    with timer("db_commit"):
+        _commit_draft(_build_draft(user_id, filename, data, processed_rel, ocr_text, original_rel), cache)
 
     return jsonify({
         "message": "OCR (Gaussian + EasyOCR) processed successfully!",
         "filename": filename,
         "raw_text": text,
-        "processed_image_path": os.path.join("uploads", f"processed_{filename}"),
+        "processed_image_path": processed_rel,
+        "original_image_path": original_rel,
+        "cache_hit": cached is not None,
+        "card": card,
         "result": data
     })
 
 
+# ====== /upload_ocr_batch ======
+def _stage_throughput(seconds, n_images):
+    return {
+        "seconds": round(seconds, 4),
+        "images_per_sec": round(n_images / seconds, 2) if seconds > 0 else None,
+    }
+
+
+@ocr_bp.route("/upload_ocr_batch", methods=["POST"])
+def upload_ocr_batch():
+    """OCR หลายภาพในคำขอเดียว (multipart field "files")
+
+    - แต่ละไฟล์ผ่านทางเดียวกับ /upload_ocr: ดูแคชก่อน → ไม่เจอค่อย run_ocr (หาบัตร / ROI / engine / อ่านซ้ำ)
+    - ไฟล์เนื้อหาเดียวกันในคำขอ OCR ครั้งเดียว
+    - ไฟล์ที่ไม่มีในแคช decode / preprocess / OCR ทีละ OCR_BATCH_SIZE ไฟล์ แล้วทิ้งภาพของชุดนั้นก่อนชุดถัดไป
+      (หน่วยความจำคงที่ตามขนาดชุด ไม่ใช่ตามจำนวนไฟล์ — OCR_BATCH_MAX_FILES ไฟล์ก็ไม่ถือภาพทั้งหมดพร้อมกัน)
+    - เฉพาะการอ่านทั้งภาพรอบแรกรวมเป็น batch (engine.read_many → reader.readtext_batched)
+      ภาพในชุดนั้นถูก resize เป็นขนาดเดียวกัน (OCR_BATCH_WIDTH x OCR_BATCH_HEIGHT) ตามที่ EasyOCR ต้องการ
+    - ข้อจำกัด: บัตรที่เข้าโหมด ROI ยังอ่านทีละ crop (engine.read_fields ต่อใบ) ไม่รวม crop ของฟิลด์เดียวกัน
+      ข้ามใบเป็น batch — read_fields มี cascade (Tesseract → EasyOCR) และการอ่านซ้ำต่อฟิลด์ที่ตัดสินใจทีละ crop
+      ชุดที่เป็นบัตรโหมด ROI ทั้งหมดจึงได้แค่การประหยัดหน่วยความจำ ไม่ได้ throughput เพิ่ม
+    - Draft ทั้งหมด + แถวแคชใหม่ insert ใน transaction เดียว
+    """
+    files = request.files.getlist("files")
+    user_id = _parse_user_id(request.form.get("user_id"))
+
+    if not files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    max_files = current_app.config.get("OCR_BATCH_MAX_FILES", 200)
+    if len(files) > max_files:
+        return jsonify({"error": f"Too many files (max {max_files})"}), 413
+
+    batch = {
+        "n_width": current_app.config.get("OCR_BATCH_WIDTH", 1280),
+        "n_height": current_app.config.get("OCR_BATCH_HEIGHT", 810),
+        "batch_size": current_app.config.get("OCR_BATCH_SIZE", 8),
+    }
+
+    timings = {}
+    results = []      # ผลต่อไฟล์ เรียงตามลำดับที่ส่งมา
+    accepted = []     # (index, filename, raw, digest)
+    found = {}        # digest → {"raw_text", "ocr_text", "fields", "card", "cache_hit"}
+
+    # --- Stage 1: ดูแคช (SHA-256 ของไฟล์) — ไฟล์ที่ไม่มีในแคชเก็บแค่ bytes ไว้ decode ทีละชุดใน stage 2 ---
+    t0 = time.perf_counter()
+    cache = get_ocr_cache()
+    misses = {}       # digest → bytes ของไฟล์ (ยังไม่ decode)
+    for i, file in enumerate(files):
+        filename = file.filename or f"file_{i}"
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in ALLOWED_EXT:
+            results.append({"filename": filename, "error": "File type not allowed"})
+            continue
+        raw = file.read()
+        digest = content_hash(raw)
+        if digest not in found and digest not in misses:
+            cached = cache.get(digest, commit=False)
+            if cached is not None:
+                found[digest] = {"raw_text": cached["raw_text"], "ocr_text": cached.get("ocr_text"),
+                                 "fields": cached["fields"], "card": None, "cache_hit": True}
+            else:
+                misses[digest] = raw
+        results.append({"filename": filename})
+        accepted.append((len(results) - 1, filename, raw, digest))
+    timings["decode"] = time.perf_counter() - t0
+    timings["ocr"] = 0.0
+
+    # --- Stage 2: decode → preprocess → OCR ทีละ OCR_BATCH_SIZE ไฟล์ (อ่านทั้งภาพรอบแรกเป็น batch) ---
+    # ภาพ decode แล้ว + ภาพ processed / gray ของ locate_and_preprocess มีแค่ของชุดปัจจุบันในหน่วยความจำ
+    if misses:
+        # ตัวนับ hit ของแคชบันทึกก่อน แล้วไม่ถือ connection ของ pool ไว้ระหว่าง OCR — ใช้ใหม่ตอนบันทึก
+        db.session.commit()
+        db.session.close()
+        pending = list(misses.items())
+        misses = None
+        for start in range(0, len(pending), batch["batch_size"]):
+            t0 = time.perf_counter()
+            chunk = {}    # digest → ภาพที่ decode แล้ว
+            for digest, raw in pending[start:start + batch["batch_size"]]:
+                img = _decode_upload(raw)
+                if img is None:
+                    found[digest] = None
+                else:
+                    chunk[digest] = img
+            timings["decode"] += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            if chunk:
+                try:
+                    ocr_results = run_ocr_batch(list(chunk.values()), **batch)
+                except PoolBusyError:
+                    return _pool_busy()
+                for digest, (_, text, data, card) in zip(chunk, ocr_results):
+                    found[digest] = {"raw_text": text, "ocr_text": ocr_text_payload(card),
+                                     "fields": data, "card": card, "cache_hit": False}
+            chunk = ocr_results = None
+            timings["ocr"] += time.perf_counter() - t0
+
+    # ไฟล์ที่ decode ไม่ได้ → error ต่อไฟล์ (เหมือน /upload_ocr)
+    for idx, _, _, digest in accepted:
+        if found[digest] is None:
+            results[idx]["error"] = "Cannot read image"
+    accepted = [a for a in accepted if found[a[3]] is not None]
+
+    # --- Stage 3: บันทึกต้นฉบับ + แถวแคชใหม่ + Draft ทั้งหมดใน transaction เดียว ---
+    t0 = time.perf_counter()
+    drafts = []
+    put = set()
+    for idx, filename, raw, digest in accepted:
+        item = found[digest]
+        original_rel, processed_rel = _persist_upload(filename, raw, digest)
+        if not item["cache_hit"] and digest not in put:
+            cache.put(digest, item["raw_text"], item["fields"], processed_rel, item["ocr_text"], commit=False)
+            put.add(digest)
+        data = dict(item["fields"])
+        drafts.append(_build_draft(user_id, filename, data, processed_rel, item["ocr_text"], original_rel))
+        results[idx].update({
+            "raw_text": item["raw_text"],
+            "processed_image_path": processed_rel,
+            "original_image_path": original_rel,
+            "cache_hit": item["cache_hit"],
+            "card": item["card"],
+            "result": data,
+        })
+    if drafts:
+        try:
+            _commit_drafts(drafts, cache)
+        except Exception as e:
+            db.session.rollback()
+            print("[ERROR /upload_ocr_batch]", e)
+            return jsonify({"error": "ไม่สามารถบันทึกผล OCR ได้"}), 500
+        for (idx, _, _, _), draft in zip(accepted, drafts):
+            results[idx]["ocr_result_id"] = draft.id
+    timings["db"] = time.perf_counter() - t0
+
+    n_ok = len(accepted)
+    total = sum(timings.values())
+    for stage, sec in timings.items():
+        metrics.observe("ocr_batch_stage_seconds", sec, stage=stage)
+    throughput = {stage: _stage_throughput(sec, n_ok) for stage, sec in timings.items()}
+    throughput["total"] = _stage_throughput(total, n_ok)
+
+    return jsonify({
+        "message": f"OCR batch processed: {n_ok}/{len(files)} images",
+        "processed": n_ok,
+        "failed": len(files) - n_ok,
+        "results": results,
+        "throughput": throughput,
+    })
+
+
 # ====== /save_ocr ======
 @ocr_bp.route("/save_ocr", methods=["POST"])
 def save_ocr():
@@ -261,12 +583,23 @@ def save_ocr():
         .first()
     )
 
+    # ✅ คำนวณ CER เทียบกับ draft (baseline) ก่อนเขียน — transaction สั้นที่สุด
+    fields = ["id_number", "prefix", "first_name", "last_name", "dob", "address"]
+    field_cer = {}
+
+    for f in fields:
+        pred = getattr(draft, f) if draft else ""   # baseline = draft
+        truth = data.get(f, "")
+        field_cer[f] = compute_cer(pred or "", truth or "")
+
+    cer_avg = round(sum(field_cer.values()) / len(field_cer), 4)
+
     # ✅ สร้างบันทึกใหม่ (ผลที่ผู้ใช้แก้ไขแล้ว)
     ocr_result = OcrResult(
         user_id=user_id,
         filename=filename,
-        original_image_path=f"uploads/{filename}",
-        processed_image_path=f"uploads/processed_{filename}",
+        original_image_path=draft.original_image_path if draft else None,
+        processed_image_path=draft.processed_image_path if draft else None,
         id_number=data["id_number"],
         prefix=data["prefix"],
         first_name=data["first_name"],
@@ -275,23 +608,9 @@ def save_ocr():
         address=data["address"],
         is_draft=False,  # ✅ อันนี้คือผลจริง ไม่ใช่ draft
     )
-    db.session.add(ocr_result)
-    db.session.commit()
-
-    # ✅ คำนวณ CER เทียบกับ draft (baseline)
-    fields = ["id_number", "prefix", "first_name", "last_name", "dob", "address"]
-    field_cer = {}
-
-    for f in fields:
-        pred = getattr(draft, f) if draft else ""   # baseline = draft
-        truth = data.get(f, "")
-        field_cer[f] = compute_cer(pred or "", truth or "")
-
-    cer_avg = round(sum(field_cer.values()) / len(field_cer), 4)
 
-    # ✅ บันทึกผล CER ลงตาราง cer_results
+    # ✅ ผล CER (ตาราง cer_results)
     cer_summary = CerResult(
-        ocr_result_id=ocr_result.id,
         filename=filename,
         cer_id_number=field_cer["id_number"],
         cer_prefix=field_cer["prefix"],
@@ -301,14 +620,25 @@ def save_ocr():
         cer_address=field_cer["address"],
         cer_avg=cer_avg,
     )
-    db.session.add(cer_summary)
+
+    # ✅ บันทึกทั้งสองแถว + rollup ของ CER (/cer_analytics) ใน transaction เดียว
+    #    — flush เพื่อได้ id ของ OcrResult ก่อน insert CerResult
+    try:
+        db.session.add(ocr_result)
+        db.session.flush()
+        cer_summary.ocr_result_id = ocr_result.id
+        db.session.add(cer_summary)
+        record_cer(cer_summary, _parse_user_id(user_id))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("[ERROR /save_ocr]", e)
+        return jsonify({"error": "ไม่สามารถบันทึกผล OCR ได้"}), 500
 
     # ✅ ปิดสถานะ draft (ไม่ให้ใช้ซ้ำ)
     # if draft:
     #     draft.is_draft = False
 
-    db.session.commit()
-
     return jsonify({
         "message": "OCR + CER summary saved successfully!",
         "filename": filename,
@@ -316,95 +646,11 @@ def save_ocr():
         "cer_avg": cer_avg,
         "fields_cer": field_cer,
         "saved_data": data,
-        "processed_image_path": f"uploads/processed_{filename}",
-        "original_image_path": f"uploads/{filename}"
+        "processed_image_path": ocr_result.processed_image_path,
+        "original_image_path": ocr_result.original_image_path
     })
 
 
-# ====== /get_ocr_history ======
-
-@ocr_bp.route("/get_ocr_history/<int:user_id>", methods=["GET"])
-def get_ocr_history(user_id):
-    """ดึงประวัติผล OCR ของผู้ใช้ — เรียงไฟล์เดียวกันให้อยู่คู่กัน (draft ก่อน ผลจริงทีหลัง)"""
-    results = (
-        OcrResult.query
-        .filter_by(user_id=user_id)
-        .order_by(OcrResult.filename.asc(), OcrResult.is_draft.desc(), OcrResult.created_at.asc())
-        .all()
-    )
-
-    data = []
-    for r in results:
-        cer = (
-            CerResult.query.filter_by(ocr_result_id=r.id)
-            .order_by(CerResult.id.desc())
-            .first()
-        )
-        data.append({
-            "id": r.id,
-            "filename": r.filename,
-            "id_number": r.id_number,
-            "id_number": r.id_number,
-            "prefix": r.prefix,
-            "first_name": r.first_name,
-            "last_name": r.last_name,
-            "dob": r.dob,
-            "address": r.address,
-            "is_draft": r.is_draft,
-            "created_at": r.created_at.strftime("%Y-%m-%d %H:%M"),
-            "cer_avg": cer.cer_avg if cer else None
-        })
-
-    # ✅ จัดเรียงซ้ำใน Python เพื่อความชัวร์
-    data.sort(key=lambda x: (x["filename"].lower(), 1 if x["is_draft"] else 2))
-
-    return jsonify({"history": data})
-
-
-@ocr_bp.route("/export_csv_final/<int:user_id>", methods=["GET"])
-def export_csv_final(user_id):
-    try:
-        # ✅ ดึงเฉพาะข้อมูลหลังแก้ไขแล้ว (is_draft = 'Final')
-        results = (
-            OcrResult.query
-            .filter(OcrResult.user_id == user_id, OcrResult.is_draft == "Final")
-            .order_by(OcrResult.created_at.desc())
-            .all()
-        )
-
-        if not results:
-            return jsonify({"error": "ไม่พบข้อมูลที่ผ่านการแก้ไขแล้ว"}), 404
-
-        # ✅ สร้างไฟล์ CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Header ภาษาไทย
-        writer.writerow(["เลขบัตรประชาชน", "ชื่อ-นามสกุล", "วันเกิด", "ที่อยู่"])
-
-        for r in results:
-            full_name = f"{r.prefix or ''}{r.first_name or ''} {r.last_name or ''}".strip()
-            writer.writerow([
-                r.id_number or "",
-                full_name,
-                r.dob or "",
-                r.address or "",
-            ])
-
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode("utf-8-sig")),
-            mimetype="text/csv",
-            as_attachment=True,
-            download_name=f"ผลลัพธ์OCR_user_{user_id}.csv"
-        )
-
-    except Exception as e:
-        print("[ERROR /export_csv_final]", e)
-        return jsonify({"error": "ไม่สามารถสร้างไฟล์ CSV ได้"}), 500
-
-
-
 @ocr_bp.route("/get_cer_details/<int:ocr_id>", methods=["GET"])
 def get_cer_details(ocr_id):
     try:
@@ -428,3 +674,89 @@ def get_cer_details(ocr_id):
     except Exception as e:
         print("[ERROR /get_cer_details]", e)
         return jsonify({"error": "เกิดข้อผิดพลาดภายในเซิร์ฟเวอร์"}), 500
+
+
+# ====== /model_stats ======
+@ocr_bp.route("/model_stats", methods=["GET"])
+def model_stats():
+    """รายงานสถานะโมเดลที่โหลดแล้ว — เวลาโหลด, เวลา warm-up, RSS ที่เพิ่มขึ้น, NER cache (+ สถานะ OCR pool ถ้าเปิดใช้)"""
+    stats = registry.stats()
+    stats["ner_cache"] = get_ner().stats()
+    if registry.is_loaded("easyocr_th"):
+        pool = getattr(get_reader(), "pool", None)
+        if pool is not None:
+            stats["ocr_pool"] = pool.stats()
+    return jsonify(stats)
+
+
+# ====== /ocr_cache ======
+@ocr_bp.route("/ocr_cache/stats", methods=["GET"])
+def ocr_cache_stats():
+    return jsonify(get_ocr_cache().stats())
+
+
+@ocr_bp.route("/ocr_cache/clear", methods=["POST"])
+def ocr_cache_clear():
+    get_ocr_cache().clear()
+    return jsonify({"message": "OCR cache cleared"})
+
+
+# ====== /reextract — ดึงฟิลด์ใหม่จากข้อความ OCR ที่เก็บไว้ (ไม่ OCR ภาพซ้ำ) ======
+reextract_state = {"status": "idle"}
+reextract_lock = threading.Lock()
+
+
+def _run_reextract(app, version, limit, dry_run):
+    with app.app_context():
+        try:
+            stats = run_reextract(
+                version,
+                workers=app.config.get("REEXTRACT_WORKERS", 2),
+                chunk_size=app.config.get("REEXTRACT_CHUNK_SIZE", 500),
+                limit=limit,
+                dry_run=dry_run,
+                progress=reextract_state.update,
+            )
+            reextract_state.update(stats, status="done", finished_at=time.time())
+        except Exception as e:
+            print("[ERROR /reextract]", e)
+            reextract_state.update(status="error", error=str(e), finished_at=time.time())
+        finally:
+            db.session.remove()
+
+
+@ocr_bp.route("/reextract", methods=["POST"])
+def start_reextract():
+    """เริ่ม re-extract แถว draft ที่ extractor_version เก่ากว่าปัจจุบัน — body: {"limit": n, "dry_run": bool}"""
+    body = request.get_json(silent=True) or {}
+    limit = body.get("limit")
+    if limit is not None and (not isinstance(limit, int) or limit <= 0):
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    with reextract_lock:
+        if reextract_state["status"] == "running":
+            return jsonify({"error": "re-extract is already running", **reextract_state}), 409
+        reextract_state.clear()
+        reextract_state.update(status="running", started_at=time.time())
+    threading.Thread(
+        target=_run_reextract,
+        args=(current_app._get_current_object(), extraction_version(), limit, bool(body.get("dry_run"))),
+        name="reextract",
+        daemon=True,
+    ).start()
+    return jsonify(reextract_state), 202
+
+
+@ocr_bp.route("/reextract", methods=["GET"])
+def reextract_status():
+    return jsonify(reextract_state)
+
+
+# ====== ตรวจชื่อสถานที่กับ gazetteer (ใช้ตอนแก้ที่อยู่ในหน้า review) ======
+@ocr_bp.route("/resolve_address", methods=["POST"])
+def resolve_address():
+    body = request.get_json(silent=True) or {}
+    address = (body.get("address") or "").strip()
+    if not address:
+        return jsonify({"error": "address is required"}), 400
+    snapped, parts = snap_address(address)
+    return jsonify({"address": snapped, "parts": parts, "gazetteer": get_gazetteer().stats()})
@@ -0,0 +1,28 @@
+"""record_cer บวกค่าเข้าแถวเดิมของ วัน × ผู้ใช้ × ฟิลด์ (upsert แบบ executemany)
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+from datetime import date
+
+from benchmarks import make_app
+from database import db
+from database.models import CerResult, CerRollup
+from utils.cer_rollup import FIELDS, record_cer
+
+
+def test_record_cer_accumulates():
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+    with app.app_context():
+        db.create_all()
+        day = date(2026, 1, 2)
+        record_cer(CerResult(**{f"cer_{f}": 0.0 for f in FIELDS}), 7, day)
+        record_cer(CerResult(**{f"cer_{f}": 0.5 for f in FIELDS}), 7, day)
+        record_cer(CerResult(cer_avg=0.25), None, day)
+        db.session.commit()
+
+        rows = {(r.user_id, r.field): r for r in CerRollup.query.all()}
+        assert len(rows) == len(FIELDS) + 1
+        r = rows[(7, "address")]
+        assert (r.n, r.cer_sum, r.cer_sum_sq, r.h00, r.h10) == (2, 0.5, 0.25, 1, 1)
+        assert rows[(0, "avg")].n == 1
@@ -0,0 +1,62 @@
+"""/export_results กรองตาม status / ช่วงวันที่ (date_to รวมทั้งวัน) และ stream ทีละ EXPORT_CHUNK_SIZE แถว
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from benchmarks import make_app
+from database import db
+from database.models import OcrResult
+from routes.export_routes import export_bp
+
+
+def _client():
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}, EXPORT_CHUNK_SIZE=2)
+    app.register_blueprint(export_bp)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            OcrResult(user_id=1, filename="a.jpg", first_name="ก", is_draft=False, created_at=datetime(2026, 1, 1, 9)),
+            OcrResult(user_id=1, filename="b.jpg", first_name="ข", is_draft=True, created_at=datetime(2026, 1, 2, 9)),
+            OcrResult(user_id=1, filename="c.jpg", first_name="ค", is_draft=False, created_at=datetime(2026, 1, 3, 23, 59)),
+            OcrResult(user_id=1, filename="d.jpg", first_name="ง", is_draft=False, created_at=datetime(2026, 1, 4, 0, 0)),
+            OcrResult(user_id=2, filename="e.jpg", first_name="จ", is_draft=False, created_at=datetime(2026, 1, 2, 9)),
+        ])
+        db.session.commit()
+    return app.test_client()
+
+
+def _ndjson(client, **args):
+    resp = client.get("/export_results/1", query_string={"format": "ndjson", "fields": "filename", **args})
+    assert resp.status_code == 200
+    return [json.loads(line)["filename"] for line in resp.get_data(as_text=True).splitlines()]
+
+
+def test_status_filters():
+    client = _client()
+    # ใหม่สุดก่อน
+    assert _ndjson(client) == ["d.jpg", "c.jpg", "a.jpg"]
+    assert _ndjson(client, status="draft") == ["b.jpg"]
+    assert _ndjson(client, status="all") == ["d.jpg", "c.jpg", "b.jpg", "a.jpg"]
+
+
+def test_date_filters_include_whole_end_day():
+    client = _client()
+    assert _ndjson(client, status="all", date_from="2026-01-02", date_to="2026-01-03") == ["c.jpg", "b.jpg"]
+    assert _ndjson(client, date_from="2026-01-04") == ["d.jpg"]
+    assert client.get("/export_results/1", query_string={"date_to": "2025-12-31"}).status_code == 404
+    assert client.get("/export_results/1", query_string={"date_from": "02/01/2026"}).status_code == 400
+
+
+def test_csv_has_bom_and_thai_headers():
+    client = _client()
+    resp = client.get("/export_results/1", query_string={"fields": "filename,first_name", "status": "all"})
+    text = resp.get_data().decode("utf-8")
+    assert text.startswith("\ufeff")
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == ["ชื่อไฟล์", "ชื่อ"]
+    assert [r[0] for r in rows[1:]] == ["d.jpg", "c.jpg", "b.jpg", "a.jpg"]
@@ -0,0 +1,22 @@
+"""extract_fields ให้ผลเหมือน extractor รุ่นเดิมบน golden set ยกเว้นความต่างที่ตั้งใจเท่านั้น
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+from benchmarks.bench_extract import FakeNer, golden_differences, golden_set, legacy_extract
+from utils.field_extractor import clean_text, extract_fields
+
+
+def test_golden_differences_are_intended():
+    ner = FakeNer()
+    texts, _ = golden_set(500, 0)
+    old = [legacy_extract(t, ner) for t in texts]
+    new = [extract_fields(t, ner, snap_places=False) for t in texts]
+    kinds = golden_differences(texts, old, new, ner)
+    assert kinds["unexplained"] == 0
+    # ทั้งสองแบบเกิดจริงใน golden set (ถ้าเป็น 0 แปลว่า test ไม่ได้ตรวจอะไร)
+    assert kinds["id_ranking"] > 0 and kinds["scanner_found"] > 0
+
+
+def test_clean_text_collapses_in_one_pass():
+    assert clean_text(" ที่อยู่:  12/3\n\nหมู่ที่ 4 (abc) ") == "ที่อยู่ 12/3 หมู่ที่ 4"
@@ -0,0 +1,63 @@
+"""snap_address แทนชื่อสถานที่เฉพาะเมื่อ ตำบล / อำเภอ / จังหวัด เข้ากันเป็นสายเดียว
+และ index ที่ pickle ไว้อยู่ใน GAZETTEER_CACHE ไม่ใช่โฟลเดอร์ของ CSV
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import os
+
+from utils.gazetteer import Gazetteer, is_consistent, snap_address
+
+GAZ = Gazetteer([
+    ("สงขลา", "หาดใหญ่", "ท่าข้าม"),
+    ("สงขลา", "หาดใหญ่", "คอหงส์"),
+    ("สมุทรปราการ", "บางพลี", "บางพลีใหญ่"),
+])
+
+
+def test_snaps_consistent_chain():
+    text, resolution = snap_address("8 ต.บางพสีใหญ่ อ.บางพลี จ.สมุทปราการ", GAZ, replace=True)
+    assert text == "8 ต.บางพลีใหญ่ อ.บางพลี จ.สมุทรปราการ"
+    assert is_consistent(resolution)
+
+
+def test_keeps_text_when_a_level_is_unknown():
+    # อ.บางกล่ำ ไม่มีใน gazetteer — ห้ามแทน ท่าช้าง ด้วย ท่าข้าม (ตำบลของอำเภออื่น)
+    text, resolution = snap_address("8 ต.ท่าช้าง อ.บางกล่ำ จ.สงขลา", GAZ, replace=True)
+    assert text == "8 ต.ท่าช้าง อ.บางกล่ำ จ.สงขลา"
+    assert resolution["amphoe"]["name"] is None
+    assert resolution["tambon"]["confidence"] > 0
+
+
+def test_keeps_text_when_a_level_is_missing():
+    text, _ = snap_address("8 ต.บางพสีใหญ่ จ.สมุทปราการ", GAZ, replace=True)
+    assert text == "8 ต.บางพสีใหญ่ จ.สมุทปราการ"
+
+
+def test_switch_off_returns_resolution_only():
+    text, resolution = snap_address("8 ต.บางพสีใหญ่ อ.บางพลี จ.สมุทปราการ", GAZ, replace=False)
+    assert text == "8 ต.บางพสีใหญ่ อ.บางพลี จ.สมุทปราการ"
+    assert resolution["tambon"]["name"] == "บางพลีใหญ่"
+
+
+def test_index_cache_lives_in_cache_dir(tmp_path):
+    from benchmarks import make_app
+    from utils.gazetteer import cache_path_for
+
+    data = tmp_path / "data"
+    data.mkdir()
+    csv_path = data / "gaz.csv"
+    csv_path.write_text("province,amphoe,tambon\nสงขลา,หาดใหญ่,คอหงส์\n", encoding="utf-8")
+
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={},
+                   GAZETTEER_CACHE=str(tmp_path / "cache"))
+    with app.app_context():
+        cache_path = cache_path_for(str(csv_path))
+    assert cache_path.startswith(str(tmp_path / "cache"))
+
+    first = Gazetteer.load(str(csv_path), cache_path)
+    assert os.path.exists(cache_path)
+    again = Gazetteer.load(str(csv_path), cache_path)
+    assert again.stats() == first.stats() == {"provinces": 1, "amphoes": 1, "tambons": 1}
+    # ไม่มีไฟล์ใหม่ในโฟลเดอร์ของ CSV
+    assert [p.name for p in data.iterdir()] == ["gaz.csv"]
@@ -0,0 +1,39 @@
+"""/ocr_history แบ่งหน้าด้วย cursor ได้ครบทุกแถว รวมแถวที่ filename เป็น NULL (เรียงไว้ก่อน)
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+from datetime import datetime, timedelta
+
+from benchmarks import make_app
+from database import db
+from database.models import OcrResult
+from routes.history_routes import history_bp
+
+
+def test_pages_across_null_filenames():
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+    app.register_blueprint(history_bp)
+    with app.app_context():
+        db.create_all()
+        t0 = datetime(2026, 1, 2)
+        names = [None, None, None, "", "a.jpg", "a.jpg", "b.jpg"]
+        db.session.add_all([
+            OcrResult(user_id=1, filename=name, is_draft=bool(i % 2), created_at=t0 + timedelta(minutes=i))
+            for i, name in enumerate(names)
+        ])
+        db.session.add(OcrResult(user_id=2, filename=None, created_at=t0))
+        db.session.commit()
+        expected = [r.id for r in OcrResult.query.filter_by(user_id=1).order_by(
+            OcrResult.filename, OcrResult.is_draft.desc(), OcrResult.created_at, OcrResult.id)]
+
+    client = app.test_client()
+    seen, cursor = [], None
+    while True:
+        page = client.get("/ocr_history/1", query_string={"limit": 2, **({"cursor": cursor} if cursor else {})}).get_json()
+        seen += [row["id"] for row in page["history"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == expected
+    assert len(seen) == len(names)
@@ -0,0 +1,59 @@
+"""Metrics.render_prometheus ออก text format 0.0.4 ที่ scraper อ่านได้
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import re
+
+from utils.metrics import DEFAULT_BUCKETS, Metrics
+
+# name{label="value",...} value — ค่า label escape แล้ว (\\ \" \n)
+RE_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*",?)*)\})? (\S+)$')
+RE_LABEL = re.compile(r'([a-zA-Z_]\w*)="((?:[^"\\]|\\.)*)"')
+
+
+def _parse(text):
+    """คืน (types: {family: type}, samples: [(name, {label: value}, float)]) — ทุกบรรทัดต้องถูกรูปแบบ"""
+    assert text.endswith("\n")
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in types, f"TYPE ซ้ำ: {name}"
+            types[name] = kind
+        elif line.startswith("# HELP "):
+            continue
+        else:
+            m = RE_SAMPLE.match(line)
+            assert m, line
+            name, labels, value = m.groups()
+            family = re.sub(r"_(bucket|sum|count)$", "", name)
+            assert name in types or family in types, f"series ก่อน TYPE: {line}"
+            samples.append((name, dict(RE_LABEL.findall(labels or "")), float(value)))
+    return types, samples
+
+
+def test_counter_and_histogram_text_format():
+    m = Metrics()
+    m.describe("jobs_total", "Jobs per lane\nand status")
+    m.inc("jobs_total", lane="high")
+    m.inc("jobs_total", 2, lane='we"ird\\lane')
+    for v in (0.002, 0.02, 0.2, 99.0):
+        m.observe("stage_seconds", v, stage="ocr")
+
+    text = m.render_prometheus()
+    assert "# HELP jobs_total Jobs per lane\\nand status\n" in text
+    types, samples = _parse(text)
+    assert types == {"jobs_total": "counter", "stage_seconds": "histogram", "stage_seconds_recent": "summary"}
+
+    counters = {s[1]["lane"]: s[2] for s in samples if s[0] == "jobs_total"}
+    assert counters == {"high": 1, 'we\\"ird\\\\lane': 2}
+
+    buckets = [(s[1]["le"], s[2]) for s in samples if s[0] == "stage_seconds_bucket"]
+    assert [le for le, _ in buckets] == [str(b) for b in DEFAULT_BUCKETS] + ["+Inf"]
+    counts = [c for _, c in buckets]
+    assert counts == sorted(counts) and counts[-1] == 4   # สะสม, +Inf = count
+    assert dict((s[0], s[2]) for s in samples if s[0] in ("stage_seconds_count", "stage_seconds_recent_count")) == {
+        "stage_seconds_count": 4, "stage_seconds_recent_count": 4}
+    quantiles = {s[1]["quantile"] for s in samples if s[0] == "stage_seconds_recent"}
+    assert quantiles == {"0.5", "0.95", "0.99"}
@@ -0,0 +1,83 @@
+"""OcrResultCache: put / get สองชั้น, ลบแถวเกินขนาด (LRU ตาม last_hit_at) และลบเวอร์ชันที่เลิกใช้
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+from datetime import datetime, timedelta
+
+from benchmarks import make_app
+from database import db
+from database.models import OcrCacheEntry
+from utils import ocr_cache
+from utils.ocr_cache import OcrResultCache
+
+FIELDS = {"id_number": "1101700203451", "first_name": "สมชาย"}
+
+
+def _app():
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_put_then_get_from_memory_and_db():
+    with _app().app_context():
+        cache = OcrResultCache("v1")
+        assert cache.get("a" * 64) is None
+        cache.put("a" * 64, "raw", FIELDS, "files/a/processed", {"full": "raw"})
+        assert cache.get("a" * 64)["fields"] == FIELDS
+
+        # process ใหม่ (tier 1 ว่าง) อ่านจากตาราง
+        fresh = OcrResultCache("v1")
+        item = fresh.get("a" * 64)
+        assert (item["raw_text"], item["fields"], item["ocr_text"]) == ("raw", FIELDS, {"full": "raw"})
+        assert fresh.counters["db_hits"] == 1
+        assert OcrCacheEntry.query.one().hit_count == 1
+        # เวอร์ชันอื่นไม่เห็นแถวของ v1
+        assert OcrResultCache("v2").get("a" * 64) is None
+
+
+def test_evicts_least_recently_hit_rows(monkeypatch):
+    monkeypatch.setattr(ocr_cache, "EVICT_EVERY", 1)
+    with _app().app_context():
+        cache = OcrResultCache("v1", memory_max_bytes=0, db_max_bytes=10 ** 9)
+        t0 = datetime(2026, 1, 2)
+        for i, digest in enumerate(("a", "b", "c")):
+            cache.put(digest * 64, "x" * 100, {})
+            OcrCacheEntry.query.filter_by(content_hash=digest * 64).update({"last_hit_at": t0 + timedelta(hours=i)})
+        db.session.commit()
+        size = OcrCacheEntry.query.first().size_bytes
+
+        cache.db_max_bytes = 2 * size
+        cache.evict()
+        assert {r.content_hash[0] for r in OcrCacheEntry.query} == {"b", "c"}
+        assert cache.counters["db_evictions"] == 1
+        # memory_max_bytes=0 — ไม่มีอะไรค้างใน tier 1
+        assert cache.stats()["memory"]["entries"] == 0
+
+
+def test_memory_tier_is_bounded():
+    with _app().app_context():
+        cache = OcrResultCache("v1", memory_max_bytes=250)
+        for digest in ("a", "b", "c"):
+            cache.put(digest * 64, "x" * 100, {})
+        assert cache.stats()["memory"]["entries"] == 2
+        assert cache.counters["memory_evictions"] == 1
+
+
+def test_purges_only_stale_versions():
+    with _app().app_context():
+        old = datetime.utcnow() - timedelta(days=2)
+        db.session.add_all([
+            OcrCacheEntry(content_hash="a" * 64, pipeline_version="v0", last_hit_at=old),
+            OcrCacheEntry(content_hash="b" * 64, pipeline_version="v0", last_hit_at=old),
+            # อีก process ที่ยังรันเวอร์ชันนี้ระหว่าง deploy — ยังถูกใช้อยู่
+            OcrCacheEntry(content_hash="a" * 64, pipeline_version="v1", last_hit_at=datetime.utcnow()),
+        ])
+        db.session.commit()
+
+        cache = OcrResultCache("v2", stale_after=timedelta(hours=24))
+        cache.put("c" * 64, "raw", FIELDS)
+        assert sorted(r.pipeline_version for r in OcrCacheEntry.query) == ["v1", "v2"]
+        assert cache.counters["invalidated"] == 2
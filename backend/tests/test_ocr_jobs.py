@@ -0,0 +1,66 @@
+"""OcrJobQueue: high → normal → low (FIFO ใน lane เดียวกัน) และคิวเต็มแยกต่อ lane (429)
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import io
+import threading
+
+import pytest
+
+from benchmarks import make_app
+from routes import job_routes
+from utils.ocr_jobs import JOB_DONE, OcrJobQueue, QueueFullError
+
+
+def test_runs_by_priority_then_fifo():
+    order = []
+    queue = OcrJobQueue(lambda job, payload: order.append(payload), workers=1)
+    for payload, priority in [("low-1", "low"), ("normal-1", "normal"), ("high-1", "high"),
+                              ("low-2", "low"), ("high-2", "high")]:
+        queue.submit(payload, priority)
+
+    # เริ่ม worker หลังงานเข้าคิวครบ — ลำดับจึงขึ้นกับ priority เท่านั้น
+    queue.start(make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}))
+    queue._queue.join()
+    assert order == ["high-1", "high-2", "normal-1", "low-1", "low-2"]
+    assert queue.stats()["jobs"] == {JOB_DONE: 5}
+    assert queue.depth() == 0
+
+
+def test_full_low_lane_still_accepts_high():
+    queue = OcrJobQueue(lambda job, payload: None, lane_depths={"low": 2, "high": 1})
+    queue.submit("a", "low")
+    queue.submit("b", "low")
+    with pytest.raises(QueueFullError):
+        queue.submit("c", "low")
+    queue.submit("d", "high")
+    with pytest.raises(QueueFullError):
+        queue.submit("e", "high")
+    # lane ที่ไม่ระบุใช้ max_depth (ค่าเริ่มต้น 100)
+    queue.submit("f", "normal")
+    lanes = queue.stats()["lanes"]
+    assert {lane: v["depth"] for lane, v in lanes.items()} == {"high": 1, "normal": 1, "low": 2}
+    # งานที่ถูกปฏิเสธไม่ค้างอยู่ในรายการงาน
+    assert len(queue._jobs) == 4
+
+
+def test_route_answers_429_per_lane(monkeypatch):
+    release = threading.Event()
+    queue = OcrJobQueue(lambda job, payload: release.wait(5), lane_depths={"low": 0})
+    monkeypatch.setattr(job_routes, "job_queue", queue)
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}, OCR_JOB_RETRY_AFTER=7)
+    app.register_blueprint(job_routes.job_bp)
+    client = app.test_client()
+
+    def post(priority):
+        return client.post("/ocr_jobs", data={"priority": priority, "file": (io.BytesIO(b"x"), "card.jpg")},
+                           content_type="multipart/form-data")
+
+    try:
+        resp = post("low")
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "7"
+        assert post("high").status_code == 202
+    finally:
+        release.set()
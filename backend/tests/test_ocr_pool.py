@@ -0,0 +1,58 @@
+"""OcrProcessPool: worker ที่ตายระหว่างงานถูกแทนด้วยตัวใหม่ งานนั้นลองซ้ำได้ TASK_RETRIES ครั้ง
+
+worker ใช้ reader ปลอม (ไม่ต้องมี torch / easyocr) — pixel แรก = 255 ทำให้ worker ตายทุกครั้ง
+ส่ง crash_marker = path ของไฟล์ที่มีอยู่ → worker ลบไฟล์แล้วตาย (ตายแค่ครั้งแรก)
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import os
+
+import numpy as np
+import pytest
+
+from utils.ocr_pool import OcrProcessPool, WorkerCrashedError
+
+
+class CrashingReader:
+    def readtext(self, img, crash_marker=None, **kwargs):
+        if crash_marker and os.path.exists(crash_marker):
+            os.remove(crash_marker)
+            os._exit(1)
+        if img[0, 0] == 255:
+            os._exit(1)
+        return [f"ok {img.shape[0]}x{img.shape[1]}"]
+
+
+def load_crashing_reader(torch_threads):
+    return CrashingReader()
+
+
+@pytest.fixture
+def pool():
+    pool = OcrProcessPool(workers=1, max_inflight=4, load_reader=load_crashing_reader).start()
+    assert pool.wait_ready(60)
+    yield pool
+    pool.shutdown()
+
+
+def test_restarts_worker_and_retries_task(pool, tmp_path):
+    marker = tmp_path / "crash-once"
+    marker.touch()
+    pid = pool.stats()["pids"][0]
+
+    assert pool.readtext(np.zeros((4, 6), np.uint8), timeout=60, crash_marker=str(marker)) == ["ok 4x6"]
+    stats = pool.stats()
+    assert (stats["restarts"], stats["retried"], stats["completed"]) == (1, 1, 1)
+    assert stats["pids"][0] != pid
+    assert stats["in_flight"] == 0
+
+
+def test_gives_up_on_task_that_always_crashes(pool):
+    poison = np.full((4, 6), 255, np.uint8)
+    with pytest.raises(WorkerCrashedError):
+        pool.readtext(poison, timeout=60)
+    # worker ตัวใหม่ยังรับงานถัดไปได้ และ slot ของงานที่ล้มถูกคืนแล้ว
+    assert pool.readtext(np.zeros((2, 3), np.uint8), timeout=60) == ["ok 2x3"]
+    stats = pool.stats()
+    assert (stats["restarts"], stats["failed"], stats["in_flight"]) == (2, 1, 0)
@@ -0,0 +1,103 @@
+"""correct_ids_batch (NumPy) ต้องให้ผลเดียวกับ correct_id ทีละรายการ
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import random
+
+import numpy as np
+import pytest
+
+from utils.normalizer import th_id_valid
+from utils.thai_id import (
+    TRANSPOSITION_PRIOR,
+    check_digit,
+    checksum_sum,
+    correct_id,
+    correct_ids_batch,
+    id_candidates,
+    is_valid,
+    validate_ids_batch,
+)
+
+
+def _valid_id(rng):
+    digits = [rng.randint(0, 8)] + [rng.randint(0, 9) for _ in range(11)]
+    return "".join(map(str, digits + [check_digit(checksum_sum(digits))]))
+
+
+def _corrupt(d13, rng):
+    """ความผิดพลาดแบบที่ OCR ทำ: ผิดหนึ่งหลัก / สลับหลักติดกัน (รวมหลักตรวจสอบ) / ผิดสองหลัก"""
+    d = list(d13)
+    kind = rng.choice(["sub", "swap", "two"])
+    if kind == "swap":
+        i = rng.randrange(12)
+        d[i], d[i + 1] = d[i + 1], d[i]
+    else:
+        for i in rng.sample(range(13), 1 if kind == "sub" else 2):
+            d[i] = str(rng.randrange(10))
+    return "".join(d)
+
+
+def _inputs(n, seed):
+    rng = random.Random(seed)
+    ids = [_corrupt(_valid_id(rng), rng) for _ in range(n)]
+    ids += ["".join(rng.choice("0123456789") for _ in range(13)) for _ in range(n)]
+    ids += ["", "123", "12345678901234", "11037O2071561", "๑๑๐๓๗๐๒๐๗๑๕๖๑"]
+    return ids
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_matches_scalar(seed):
+    ids = _inputs(3000, seed)
+    corrected, valid, changed, score = correct_ids_batch(ids)
+    for i, d13 in enumerate(ids):
+        expected = correct_id(d13)
+        assert corrected[i] == expected, d13
+        assert bool(valid[i]) == is_valid(d13), d13
+        assert bool(changed[i]) == (expected != d13 and not is_valid(d13)), d13
+        if changed[i]:
+            assert score[i] == pytest.approx(id_candidates(d13, top_k=1)[0]["score"], abs=1e-4), d13
+
+
+def test_swap_with_check_digit():
+    # สลับหลักที่ 12 กับหลักตรวจสอบ — เคยแก้ได้เฉพาะทาง scalar
+    cands = id_candidates("4635025018942")
+    assert cands[0] == {"id": "4635025018924", "score": TRANSPOSITION_PRIOR,
+                        "confidence": cands[0]["confidence"], "edit": "swap@11"}
+    assert correct_ids_batch(["4635025018942"])[0] == ["4635025018924"]
+
+
+def test_validation_rules_agree():
+    rng = random.Random(3)
+    ids = _inputs(2000, 3) + ["9" + _valid_id(rng)[1:], "0" + _valid_id(rng)[1:]]
+    batch = validate_ids_batch(ids)
+    for d13, ok in zip(ids, batch):
+        assert is_valid(d13) == th_id_valid(d13) == bool(ok), d13
+
+
+def test_empty_batch():
+    corrected, valid, changed, score = correct_ids_batch([])
+    assert corrected == [] and valid.size == changed.size == score.size == 0
+    assert validate_ids_batch([]).dtype == np.bool_
+
+
+def test_first_digit_rule():
+    # หลักแรก 9 ไม่มีในเลขบัตรจริง — checksum ผ่านก็ไม่ถือว่าถูก (normalizer ใช้กฎเดียวกัน)
+    assert is_valid("1103702071561") and th_id_valid("1103702071561")
+    nine = "9" + "103702071561"
+    nine = nine[:12] + str(check_digit(checksum_sum([int(c) for c in nine[:12]])))
+    assert not is_valid(nine) and not th_id_valid(nine)
+    fixed = correct_id(nine)
+    assert fixed == nine or is_valid(fixed)
+    assert is_valid("0" + nine[1:12] + str(check_digit(checksum_sum([0] + [int(c) for c in nine[1:12]]))))
+
+
+def test_correct_id_matches_candidates():
+    for d13 in _inputs(2000, 4):
+        for kwargs in ({}, {"transpositions": False}):
+            cands = id_candidates(d13, top_k=1, **kwargs)
+            assert correct_id(d13, **kwargs) == (cands[0]["id"] if cands else d13), d13
+    for d13 in _inputs(50, 5)[:50]:
+        cands = id_candidates(d13, top_k=1, two_digit=True)
+        assert correct_id(d13, two_digit=True) == (cands[0]["id"] if cands else d13), d13
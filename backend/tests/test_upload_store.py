@@ -0,0 +1,79 @@
+"""LocalUploadStore: ETag ของต้นฉบับ / variant (304 เมื่อ client มีไฟล์แล้ว) และการลบ variant เกินขนาด
+
+รัน (จากโฟลเดอร์ backend):
+    python -m pytest -q tests
+"""
+import hashlib
+import os
+
+import cv2
+import numpy as np
+
+from benchmarks import make_app
+from routes import file_routes
+from utils.upload_store import LocalUploadStore, thumbnail
+
+
+def _jpeg(seed, side=200):
+    img = np.random.default_rng(seed).integers(0, 255, (side, side, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+def test_etags_follow_content_and_variant_version(tmp_path):
+    store = LocalUploadStore(tmp_path)
+    store.register_variant("thumb", thumbnail(32))
+    data = _jpeg(0)
+    key = store.put(data, ".JPG")
+    digest = hashlib.sha256(data).hexdigest()
+    assert key == digest + ".jpg"
+    # ไฟล์เดิมซ้ำได้ key เดิม (ไม่เขียนซ้ำ)
+    assert store.put(data, ".jpg") == key
+    assert store.original(key).etag == digest
+
+    thumb = store.variant(key, "thumb")
+    assert thumb.etag == f"{digest}-thumb-1"
+    assert max(cv2.imread(thumb.path).shape[:2]) == 32
+
+    # เปลี่ยนวิธีสร้าง → version ใหม่ = ETag + ไฟล์ใหม่ (client ที่ cache ตัวเก่าไว้ได้ภาพใหม่)
+    store.register_variant("thumb", thumbnail(16), version="2")
+    thumb2 = store.variant(key, "thumb")
+    assert thumb2.etag == f"{digest}-thumb-2" and thumb2.path != thumb.path
+    assert store.variant(key, "missing") is None
+    assert store.original("../" + key) is None
+
+
+def test_evicts_least_recently_used_variants(tmp_path):
+    store = LocalUploadStore(tmp_path, variants_max_bytes=1)
+    store.register_variant("thumb", thumbnail(64))
+    keys = [store.put(_jpeg(i), ".jpg") for i in range(3)]
+    size = os.path.getsize(store.variant(keys[0], "thumb").path)   # thumb ขนาดใกล้กันทุกภาพ (seed คงที่)
+
+    # store ใหม่ (process ใหม่) เริ่มนับจากไฟล์ที่มีอยู่ในดิสก์ — จุได้ราว 2 ไฟล์
+    store = LocalUploadStore(tmp_path, variants_max_bytes=int(size * 2.5))
+    store.register_variant("thumb", thumbnail(64))
+    paths = [store.variant(k, "thumb").path for k in keys[:2]]
+    store.variant(keys[0], "thumb")            # ใช้ตัวแรกอีกครั้ง → ตัวที่สองเก่าสุด
+    store.variant(keys[2], "thumb")
+    assert [os.path.exists(p) for p in paths] == [True, False]
+    assert store.stats()["variants"]["evictions"] >= 1
+    # ตัวที่ถูกลบสร้างใหม่ได้เมื่อถูกขออีก — ต้นฉบับไม่ถูกลบ
+    assert os.path.exists(store.variant(keys[1], "thumb").path)
+    assert all(store.original(k) is not None for k in keys)
+
+
+def test_route_answers_304_for_matching_etag(tmp_path, monkeypatch):
+    store = LocalUploadStore(tmp_path)
+    store.register_variant("thumb", thumbnail(32))
+    key = store.put(_jpeg(1), ".jpg")
+    monkeypatch.setattr(file_routes, "get_upload_store", lambda: store)
+    app = make_app(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+    app.register_blueprint(file_routes.file_bp)
+    client = app.test_client()
+
+    for path, immutable in ((f"/files/{key}", True), (f"/files/{key}/thumb", False)):
+        first = client.get(path)
+        assert first.status_code == 200 and first.headers["ETag"]
+        assert ("immutable" in first.headers["Cache-Control"]) is immutable
+        again = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+    assert client.get(f"/files/{'0' * 64}.jpg").status_code == 404
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+# ====== ขนาดบัตรมาตรฐาน (ID-1: 85.6 x 54 มม.) หลัง warp ======
+CARD_W, CARD_H = 1012, 638
+CARD_ASPECT = CARD_W / CARD_H
+
+# ====== ตำแหน่งฟิลด์บนบัตรที่ warp แล้ว (สัดส่วน x0, y0, x1, y1) ======
+# ประมาณจากภาพตัวอย่างที่มี label ใน roi.json แล้วเผื่อขอบเล็กน้อย
+FIELD_ROIS = {
+    "id_number": (0.48, 0.11, 0.96, 0.25),
+    "name": (0.28, 0.24, 0.92, 0.37),       # คำนำหน้า + ชื่อ + นามสกุล (ภาษาไทย)
+    "dob": (0.46, 0.50, 0.80, 0.64),
+    "address": (0.08, 0.72, 0.80, 0.96),
+}
+
+# ลดขนาดภาพก่อนหา contour — เร็วขึ้นมากกับรูปจากมือถือ
+DETECT_MAX_SIDE = 800
+
+
+def _order_corners(pts):
+    """เรียงมุมเป็น tl, tr, br, bl"""
+    s = pts.sum(axis=1)
+    d = np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]], dtype=np.float32)
+
+
+def find_card_quad(img):
+    """หาสี่เหลี่ยมของบัตรที่ใหญ่ที่สุดในภาพ คืน (corners 4x2 ตามพิกัดภาพเดิม หรือ None)"""
+    h, w = img.shape[:2]
+    scale = min(1.0, DETECT_MAX_SIDE / max(h, w))
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+
+    gray = small if small.ndim == 2 else cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for c in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        peri = cv2.arcLength(c, True)
+        approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return _order_corners(approx.reshape(4, 2).astype(np.float32) / scale)
+    return None
+
+
+def card_fit_score(quad, image_shape):
+    """คะแนน 0–1 ว่าสี่เหลี่ยมที่เจอเข้ากับแม่แบบบัตรแค่ไหน (ขนาด, สัดส่วน, มุมฉาก)"""
+    h, w = image_shape[:2]
+    tl, tr, br, bl = quad
+    width = (np.linalg.norm(tr - tl) + np.linalg.norm(br - bl)) / 2
+    height = (np.linalg.norm(bl - tl) + np.linalg.norm(br - tr)) / 2
+    if width < 1 or height < 1:
+        return 0.0
+
+    area_ratio = cv2.contourArea(quad) / float(w * h)
+    s_area = min(1.0, area_ratio / 0.3)
+
+    aspect = max(width, height) / min(width, height)
+    s_aspect = max(0.0, 1.0 - abs(aspect - CARD_ASPECT) / CARD_ASPECT * 4)
+
+    worst_cos = 0.0
+    for i in range(4):
+        a, b, c = quad[i - 1], quad[i], quad[(i + 1) % 4]
+        v1, v2 = a - b, c - b
+        cos = abs(float(np.dot(v1, v2)) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6))
+        worst_cos = max(worst_cos, cos)
+    s_angle = 1.0 - worst_cos
+
+    return round(float(s_area * s_aspect * s_angle), 4)
+
+
+def warp_card(img, quad):
+    """ดัดบัตรให้ตรงด้วย homography เป็นขนาด CARD_W x CARD_H (ด้านยาวเป็นแนวนอน)"""
+    tl, tr, br, bl = quad
+    if np.linalg.norm(bl - tl) > np.linalg.norm(tr - tl):
+        # บัตรแนวตั้ง — หมุนลำดับมุมให้ด้านยาวเป็นด้านบน
+        quad = np.array([bl, tl, tr, br], dtype=np.float32)
+    dst = np.array([[0, 0], [CARD_W - 1, 0], [CARD_W - 1, CARD_H - 1], [0, CARD_H - 1]], dtype=np.float32)
+    H = cv2.getPerspectiveTransform(quad, dst)
+    return cv2.warpPerspective(img, H, (CARD_W, CARD_H))
+
+
+def crop_field_rois(card):
+    """ตัดภาพแต่ละฟิลด์จากบัตรที่ warp แล้ว"""
+    h, w = card.shape[:2]
+    crops = {}
+    for field, (x0, y0, x1, y1) in FIELD_ROIS.items():
+        crops[field] = card[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)]
+    return crops
+
+
+def locate_card(img):
+    """หาบัตร + warp คืน (card_image หรือ None, fit_score)"""
+    quad = find_card_quad(img)
+    if quad is None:
+        return None, 0.0
+    fit = card_fit_score(quad, img.shape)
+    return warp_card(img, quad), fit
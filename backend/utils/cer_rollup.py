@@ -0,0 +1,206 @@
+"""Rollup ของ CER ต่อ วัน × ผู้ใช้ × ฟิลด์ — ตอบค่าเฉลี่ย / percentile / แนวโน้มโดยไม่ต้องสแกน cer_results
+
+แต่ละแถวของ cer_rollups เก็บ n, ผลรวม, ผลรวมกำลังสอง และ histogram 22 ช่อง (ดู CER_HIST_BUCKETS)
+- record_cer: save_ocr เรียกใน transaction เดียวกับ insert CerResult — upsert 7 แถว (6 ฟิลด์ + avg)
+  ด้วย INSERT … ON CONFLICT / ON DUPLICATE KEY ที่สร้างครั้งเดียวต่อ dialect แล้ว executemany
+  (บวกค่าแบบ atomic ไม่ต้องอ่านก่อน)
+- summarize: รวมหลายแถว → count, mean, std, p50/p90/p95 (ประมาณจาก histogram, ละเอียดระดับ 0.05)
+- backfill: สร้าง rollup ใหม่ทั้งหมดจาก cer_results ที่มีอยู่
+
+รัน backfill (จากโฟลเดอร์ backend):  python -m utils.cer_rollup [--chunk-size 5000]
+"""
+import argparse
+import math
+import sys
+from datetime import datetime
+
+from sqlalchemy import func
+
+from database import db
+from database.models import CER_HIST_BUCKETS, CerResult, CerRollup, OcrResult
+
+FIELDS = ["id_number", "prefix", "first_name", "last_name", "dob", "address", "avg"]
+BUCKET_WIDTH = 0.05
+HIST_COLUMNS = [f"h{i:02d}" for i in range(CER_HIST_BUCKETS)]
+SUM_COLUMNS = ["n", "cer_sum", "cer_sum_sq"] + HIST_COLUMNS
+PERCENTILES = (0.5, 0.9, 0.95)
+
+
+def bucket_index(cer):
+    """h00 = CER 0 พอดี (ไม่ได้แก้), h01–h20 = (0, 0.05], …, (0.95, 1.0], h21 = เกิน 1.0"""
+    if cer <= 0:
+        return 0
+    if cer > 1.0:
+        return CER_HIST_BUCKETS - 1
+    return min(CER_HIST_BUCKETS - 2, max(1, math.ceil(round(cer / BUCKET_WIDTH, 9))))
+
+
+def _cer_values(cer):
+    """CerResult → {field: ค่า CER} (ข้ามฟิลด์ที่เป็น None)"""
+    values = {f: getattr(cer, f"cer_{f}") for f in FIELDS}
+    return {f: v for f, v in values.items() if v is not None}
+
+
+def _new_row(day, user_id, field):
+    row = {"day": day, "user_id": user_id or 0, "field": field, "n": 0, "cer_sum": 0.0, "cer_sum_sq": 0.0}
+    row.update({h: 0 for h in HIST_COLUMNS})
+    return row
+
+
+def _add(row, cer):
+    row["n"] += 1
+    row["cer_sum"] += cer
+    row["cer_sum_sq"] += cer * cer
+    row[HIST_COLUMNS[bucket_index(cer)]] += 1
+    return row
+
+
+_UPSERT = {}   # dialect → คำสั่ง upsert (สร้างครั้งเดียว — ค่าของแต่ละแถวส่งเป็น parameter)
+
+
+def _upsert_stmt(dialect):
+    """INSERT … ON CONFLICT / ON DUPLICATE KEY ที่บวกค่าเข้าแถวเดิม — SQLite / MySQL / PostgreSQL
+
+    ไม่ใส่ .values(rows) ในคำสั่ง (จะได้คำสั่งใหม่ + compile ใหม่ทุกครั้ง) แต่ส่ง rows เป็น parameter set
+    ให้ execute แบบ executemany — คำสั่งเดียวกันจึงใช้ compiled cache ของ SQLAlchemy ได้ตลอด
+    """
+    stmt = _UPSERT.get(dialect)
+    if stmt is not None:
+        return stmt
+    table = CerRollup.__table__
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in SUM_COLUMNS})
+    else:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            raise RuntimeError(f"cer_rollups upsert not supported on {dialect}")
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "user_id", "field"],
+            set_={c: table.c[c] + stmt.excluded[c] for c in SUM_COLUMNS},
+        )
+    _UPSERT[dialect] = stmt
+    return stmt
+
+
+def _upsert(rows):
+    """บวก rows เข้าแถวที่มีอยู่ (หรือ insert ถ้ายังไม่มี) — rows ทุกตัวต้องมี key ชุดเดียวกัน (_new_row)"""
+    if not rows:
+        return
+    db.session.execute(_upsert_stmt(db.session.get_bind().dialect.name), rows)
+
+
+def record_cer(cer, user_id, day=None):
+    """เพิ่ม CerResult หนึ่งแถวเข้า rollup — ไม่ commit (ให้ commit พร้อม insert CerResult)"""
+    day = day or (cer.created_at or datetime.utcnow()).date()
+    _upsert([_add(_new_row(day, user_id, f), v) for f, v in _cer_values(cer).items()])
+
+
+# ====== อ่าน rollup ======
+def _percentile(hist, n, q):
+    """ประมาณ percentile จาก histogram — เฉลี่ยเชิงเส้นภายในช่อง (ช่องเกิน 1.0 ตอบ 1.0)"""
+    target = q * n
+    seen = 0
+    for i, count in enumerate(hist):
+        if count and seen + count >= target:
+            if i == 0:
+                return 0.0
+            if i == CER_HIST_BUCKETS - 1:
+                return 1.0
+            lo = (i - 1) * BUCKET_WIDTH
+            return round(lo + BUCKET_WIDTH * (target - seen) / count, 4)
+        seen += count
+    return None
+
+
+def summarize(totals):
+    """totals = {"n", "cer_sum", "cer_sum_sq", "h00"…} (ผลรวมของหลายแถว) → สถิติ"""
+    n = totals.get("n") or 0
+    if not n:
+        return {"count": 0, "mean": None, "std": None, **{f"p{int(q * 100)}": None for q in PERCENTILES}}
+    mean = totals["cer_sum"] / n
+    var = max(0.0, totals["cer_sum_sq"] / n - mean * mean)
+    hist = [int(totals[h] or 0) for h in HIST_COLUMNS]
+    return {
+        "count": int(n),
+        "mean": round(mean, 4),
+        "std": round(math.sqrt(var), 4),
+        **{f"p{int(q * 100)}": _percentile(hist, n, q) for q in PERCENTILES},
+        "histogram": hist,
+    }
+
+
+def rollup_query(*group_by):
+    """SELECT group_by…, SUM(n), SUM(cer_sum), … FROM cer_rollups — เพิ่ม filter / group ต่อได้"""
+    sums = [func.sum(getattr(CerRollup, c)).label(c) for c in SUM_COLUMNS]
+    q = db.session.query(*group_by, *sums)
+    return q.group_by(*group_by) if group_by else q
+
+
+# ====== Backfill ======
+def _stream_cer(chunk_size):
+    """(CerResult, user_id) ทีละ chunk ตาม id — user_id จาก OcrResult ที่ CerResult อ้างถึง"""
+    after_id = 0
+    while True:
+        rows = (
+            db.session.query(CerResult, OcrResult.user_id)
+            .outerjoin(OcrResult, OcrResult.id == CerResult.ocr_result_id)
+            .filter(CerResult.id > after_id)
+            .order_by(CerResult.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0].id
+        db.session.expunge_all()
+
+
+def backfill(chunk_size=5000):
+    """สร้าง rollup ใหม่ทั้งหมดจาก cer_results (ลบของเดิม) — คืนจำนวน CerResult / แถว rollup
+
+    รวมในหน่วยความจำ (หนึ่ง dict ต่อ วัน × ผู้ใช้ × ฟิลด์ — ไม่ขึ้นกับจำนวน CerResult) แล้วเขียนใน
+    transaction เดียว — ควรรันตอนไม่มีคน save (rollup ที่ save_ocr บวกระหว่างนั้นอาจถูกลบทับ)
+    """
+    groups = {}
+    n_results = 0
+    for rows in _stream_cer(chunk_size):
+        for cer, user_id in rows:
+            day = (cer.created_at or datetime.utcnow()).date()
+            for f, v in _cer_values(cer).items():
+                key = (day, user_id or 0, f)
+                if key not in groups:
+                    groups[key] = _new_row(*key)
+                _add(groups[key], v)
+        n_results += len(rows)
+
+    rollups = list(groups.values())
+    CerRollup.query.delete(synchronize_session=False)
+    for i in range(0, len(rollups), chunk_size):
+        db.session.execute(CerRollup.__table__.insert(), rollups[i:i + chunk_size])
+    db.session.commit()
+    return n_results, len(rollups)
+
+
+def main(argv=None):
+    from migrations import make_app
+
+    parser = argparse.ArgumentParser(description="Rebuild cer_rollups from cer_results")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with make_app().app_context():
+        CerRollup.__table__.create(bind=db.engine, checkfirst=True)
+        n_results, n_rollups = backfill(args.chunk_size)
+    print(f"[CER ROLLUP] {n_results} cer_results → {n_rollups} rollup rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""ดึงฟิลด์จากข้อความ OCR ของบัตรประชาชน (regex + NER)
+
+pattern ทั้งหมด compile ครั้งเดียวตอน import และแยก token ครั้งเดียวต่อเอกสาร
+ตำแหน่ง label บนบัตรหาด้วย utils/label_scanner.py แล้วค้นแต่ละฟิลด์ในช่วงระหว่าง label
+ตรวจเทียบรุ่นก่อน / วัดความเร็วด้วย python -m benchmarks.bench_extract
+"""
+import re
+
+from utils.gazetteer import snap_address
+from utils.label_scanner import scan_labels, field_windows
+from utils.metrics import timer
+from utils.normalizer import normalize_pred, fix_digits, th_id_valid
+
+# ====== Patterns ======
+# ช่วงของอักขระที่ไม่ต้องการ + ช่องว่าง → ช่องว่างเดียว ในการ sub รอบเดียว
+RE_UNWANTED = re.compile(r"[^\u0E00-\u0E7F0-9\.\/\-]+")
+RE_SPACES = re.compile(r"\s+")
+
+RE_ID = re.compile(r"\b[1-8]\s?[0-9]{4}\s?[0-9]{5}\s?[0-9]{2}\s?[0-9]\b")
+RE_ID_LOOSE = re.compile(r"\d{12,}")
+
+RE_NAME = re.compile(r"(นาย|นางสาว|นาง|น\.ส\.|นส)\s*([ก-๙]{2,})\s*([ก-๙]{2,})")
+RE_PREFIX = re.compile(r"นาย|นางสาว|นาง|น\.ส\.|นส")
+NAME_WINDOW = 80   # จำนวนตัวอักษรที่ส่งเข้า NER (บรรทัดชื่อ + เผื่อ)
+
+THAI_MONTHS = r"(ม\.ค\.|ก\.พ\.|มี\.ค\.|เม\.ย\.|พ\.ค\.|มิ\.ย\.|ก\.ค\.|ส\.ค\.|ก\.ย\.|ต\.ค\.|พ\.ย\.|ธ\.ค\.)"
+RE_FEB_TYPO = re.compile(r"ก\.ุพ\.")
+RE_DOB = re.compile(r"(\d{1,2}\s*" + THAI_MONTHS + r"\s*\d{2,4})")
+
+ADDRESS_WINDOW = 150
+# ชื่อสถานที่ที่อ่านผิดแก้ด้วย gazetteer (utils/gazetteer.py) — ที่นี่แก้เฉพาะ label
+ADDRESS_WINDOW_FIXES = (("หม่ที", "หมู่ที่"), ("ด.", "ต."))
+
+RE_HOUSE_NO = re.compile(r"\d+[\/\d-]*")
+RE_MOO = re.compile(r"(?:หมู่ที่|หมู่ที|หมู่|ม\.)\s*\d+")
+RE_TAMBON = re.compile(r"(?:ต\.?|ตำบล|แขวง)\s*[\u0E00-\u0E7F]+")
+RE_AMPHOE = re.compile(r"(?:อ\.|อำเภอ)\s*[\u0E00-\u0E7F]+")
+RE_PROVINCE = re.compile(r"(?:จ\.?|จังหวัด)\s*[\u0E00-\u0E7F]+")
+
+
+def clean_text(text):
+    """ตัดอักขระที่ไม่ใช่ไทย / ตัวเลข / . / - แล้วยุบช่องว่าง"""
+    return RE_UNWANTED.sub(" ", text).strip()
+
+
+def tokenize(text):
+    """แยก token ครั้งเดียวจากข้อความที่ clean แล้ว (คั่นด้วยช่องว่างเดียว) คืน [(offset, token), ...]"""
+    tokens = []
+    pos = 0
+    for tok in text.split(" "):
+        tokens.append((pos, tok))
+        pos += len(tok) + 1
+    return tokens
+
+
+# ====== แต่ละฟิลด์ ======
+def extract_id(text):
+    m = RE_ID.search(text)
+    if m:
+        return RE_SPACES.sub("", m.group(0))
+    m = RE_ID_LOOSE.search(text)
+    return m.group(0) if m else ""
+
+
+def name_target(text, window=""):
+    """ช่วงข้อความที่ส่งเข้า NER: หลัง label ชื่อ → ตั้งแต่คำนำหน้าแรก → ทั้งข้อความ (ไม่มีทั้งสองอย่าง)"""
+    if window:
+        return window[:NAME_WINDOW]
+    m = RE_PREFIX.search(text)
+    if m:
+        return text[m.start():m.start() + NAME_WINDOW]
+    return text
+
+
+def extract_name(text, ner, window="", ner_result=None):
+    """ner_result = ผล tag ของ name_target ที่ได้มาแล้ว (จาก tag_each) — ไม่ส่งมาจะ tag เอง"""
+    prefix, first_name, last_name = "", "", ""
+    if ner_result is None:
+        with timer("ner"):
+            ner_result = ner.tag(name_target(text, window))
+
+    for token, tag in ner_result:
+        if tag == "TITLE":
+            prefix = token
+        elif tag == "NAME" and not first_name:
+            first_name = token
+        elif tag == "SURNAME" and not last_name:
+            last_name = token
+
+    if not prefix or not first_name or not last_name:
+        m = RE_NAME.search(window) or RE_NAME.search(text)
+        if m:
+            prefix = prefix or m.group(1)
+            first_name = first_name or m.group(2)
+            last_name = last_name or m.group(3)
+    return prefix, first_name, last_name
+
+
+def extract_dob(text):
+    m = RE_DOB.search(RE_FEB_TYPO.sub("ก.พ.", text))
+    return m.group(1) if m else ""
+
+
+def extract_address(window, snap_places=True):
+    """window = ข้อความหลัง label "ที่อยู่" (None ถ้าไม่พบ label)"""
+    if window is None:
+        return ""
+
+    window = window[:ADDRESS_WINDOW]
+    for wrong, right in ADDRESS_WINDOW_FIXES:
+        window = window.replace(wrong, right)
+
+    parts = []
+    for pattern in (RE_HOUSE_NO, RE_MOO, RE_TAMBON, RE_AMPHOE):
+        m = pattern.search(window)
+        if m:
+            parts.append(m.group(0))
+    m = RE_PROVINCE.search(window)
+    if m:
+        parts.append(m.group(0).replace("จังหวัด", "จ.").strip())
+    address = RE_SPACES.sub(" ", " ".join(parts)).strip()
+    if snap_places:
+        address, _ = snap_address(address)
+    return address
+
+
+# ====== รวมทุกฟิลด์ ======
+def extract_fields(text, ner, snap_places=True, raw=None):
+    """ข้อความ OCR ดิบ → dict ของ 6 ฟิลด์ที่ normalize แล้ว
+
+    snap_places=False ปิดการแก้ชื่อสถานที่ด้วย gazetteer (ใช้เทียบกับ extractor รุ่นก่อน)
+    raw (dict) ถ้าส่งมาจะถูกเติมค่าก่อน normalize — ใช้กับ invalid_fields
+    """
+    text = clean_text(text)
+    # หา label ทุกตัวในรอบเดียว แล้วค้นแต่ละฟิลด์ในช่วงของตัวเองก่อน (ไม่เจอค่อยค้นทั้งข้อความ)
+    windows = field_windows(text, scan_labels(tokenize(text)))
+    return _extract_cleaned(text, windows, ner, snap_places, raw)
+
+
+def extract_fields_many(texts, ner, snap_places=True):
+    """extract_fields หลายเอกสาร — ส่งช่วงชื่อของทุกเอกสารเข้า ner.tag_each ครั้งเดียว (ถ้า ner มี: ตัดตัวซ้ำ + cache)"""
+    cleaned = [clean_text(t) for t in texts]
+    windows = [field_windows(t, scan_labels(tokenize(t))) for t in cleaned]
+    if hasattr(ner, "tag_each"):
+        with timer("ner"):
+            tagged = ner.tag_each([name_target(t, w.get("name", "")) for t, w in zip(cleaned, windows)])
+    else:
+        tagged = [None] * len(cleaned)
+    return [_extract_cleaned(t, w, ner, snap_places, ner_result=r) for t, w, r in zip(cleaned, windows, tagged)]
+
+
+def _extract_cleaned(text, windows, ner, snap_places=True, raw=None, ner_result=None):
+    prefix, first_name, last_name = extract_name(text, ner, windows.get("name", ""), ner_result)
+    data = {
+        "id_number": extract_id(windows.get("id_number", "")) or extract_id(text),
+        "prefix": prefix,
+        "first_name": first_name,
+        "last_name": last_name,
+        "dob": extract_dob(windows.get("dob", "")) or extract_dob(text),
+        "address": extract_address(windows.get("address"), snap_places),
+    }
+    if raw is not None:
+        raw.update(data)
+
+    with timer("normalize"):
+        for k in data:
+            data[k] = normalize_pred(k, data[k])
+    return data
+
+
+# ====== ข้อความจาก ROI ของบัตร (หนึ่งข้อความต่อ ROI) ======
+# ROI → ฟิลด์ที่ได้จาก ROI นั้น
+ROI_FIELDS = {
+    "id_number": ("id_number",),
+    "name": ("prefix", "first_name", "last_name"),
+    "dob": ("dob",),
+    "address": ("address",),
+}
+RE_ADDRESS_LABEL = re.compile(r"^\s*ที่อยู่\s*")
+
+
+def split_name_line(text):
+    """แยก คำนำหน้า / ชื่อ / นามสกุล จากข้อความบรรทัดชื่อ (ROI เดียว)"""
+    m = RE_NAME.search(text)
+    if m:
+        return m.group(1), m.group(2), m.group(3)
+    # ไม่มีคำนำหน้า → ตัด label ออกแล้วใช้สองคำสุดท้าย
+    toks = [t for t in re.findall(r"[ก-๙]{2,}", text) if "ชื่อ" not in t]
+    if len(toks) >= 2:
+        return "", toks[-2], toks[-1]
+    return "", (toks[0] if toks else ""), ""
+
+
+def extract_roi_fields(texts, raw=None):
+    """{roi: ข้อความ} → ฟิลด์ที่ normalize แล้ว (เฉพาะฟิลด์ของ ROI ที่ส่งมา) — ไม่ใช้ NER"""
+    data = {}
+    for roi, text in texts.items():
+        if roi == "name":
+            data.update(zip(ROI_FIELDS["name"], split_name_line(text)))
+        elif roi == "address":
+            data["address"] = snap_address(RE_ADDRESS_LABEL.sub("", text))[0]
+        else:
+            data[roi] = text
+    if raw is not None:
+        raw.update(data)
+    with timer("normalize"):
+        for k in data:
+            data[k] = normalize_pred(k, data[k])
+    return data
+
+
+# ====== ตรวจผลที่ normalize แล้ว (ไม่ผ่าน → ควรอ่านซ้ำด้วย preprocess แบบอื่น) ======
+RE_DOB_FULL = re.compile(r"\d{1,2} " + THAI_MONTHS + r" 25\d{2}")
+
+
+def invalid_fields(data, raw=None):
+    """รายชื่อฟิลด์ที่ว่าง / รูปแบบผิด — ฟิลด์ที่ไม่มีใน data ถือว่าไม่ผ่าน
+
+    raw = ค่าก่อน normalize (ถ้ามี): normalize_pred เติม 0 ให้เลขบัตรครบ 13 หลักแล้วแก้ checksum
+    จึงต้องดูว่า OCR อ่านได้ครบ 13 หลักจริงด้วย
+    """
+    bad = []
+    raw_id = fix_digits(((raw if raw is not None else data).get("id_number")) or "")
+    if len(raw_id) != 13 or not th_id_valid(data.get("id_number") or ""):
+        bad.append("id_number")
+    for field in ("prefix", "first_name", "last_name"):
+        if not data.get(field):
+            bad.append(field)
+    if not RE_DOB_FULL.fullmatch(data.get("dob") or ""):
+        bad.append("dob")
+    if not data.get("address"):
+        bad.append("address")
+    return bad
@@ -0,0 +1,146 @@
+"""เลือกเฟรมที่ดีที่สุดจากภาพกล้องต่อเนื่อง (burst) ก่อน OCR — OCR เฟรมเดียวแทนการอัปโหลดซ้ำทีละภาพ
+
+ให้คะแนนแต่ละเฟรมด้วย OpenCV บนภาพย่อ (decode แบบ reduced, ~10 ms ต่อเฟรม):
+- fit:       เจอขอบบัตรและเข้ากับแม่แบบแค่ไหน (card_fit_score)
+- sharpness: variance ของ Laplacian บนบัตรที่ warp แล้ว (ไม่เจอบัตร = ทั้งภาพ)
+- glare:     สัดส่วนพิกเซลที่สว่างจนอิ่มตัว (แสงสะท้อนบนบัตร)
+score = (0.25 + 0.75 fit) x sharpness / (sharpness + SHARP_REF) x max(0, 1 - glare / GLARE_MAX)
+(ความคมไม่อิ่มตัว — เฟรมที่คมกว่าชนะเสมอเมื่อปัจจัยอื่นเท่ากัน)
+
+best_field_crops: ต่อบัตรจากหลายเฟรม — แต่ละ ROI ใช้ภาพจากเฟรมที่ ROI นั้นคมสุด / สะท้อนแสงน้อยสุด
+
+ลองกับลำดับเฟรมที่บันทึกไว้ในไดเรกทอรี (เรียงตามชื่อไฟล์) โดยไม่ต้องรัน server:
+    python -m utils.frame_select path/to/frames/ [--fit-threshold 0.6]
+"""
+import argparse
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+from utils.card_detect import CARD_H, CARD_W, FIELD_ROIS, card_fit_score, crop_field_rois, find_card_quad, warp_card
+from utils.image_io import decode_image_bytes
+from utils.preprocess import to_gray
+
+SCORE_MAX_SIDE = 800      # ขนาดภาพตอนให้คะแนน (เท่ากับ DETECT_MAX_SIDE ของ card_detect — ไม่ต้องย่อซ้ำ)
+SCORE_CARD_SCALE = 0.5    # warp บัตรที่ครึ่งขนาดมาตรฐานก่อนวัดความคม
+SHARP_REF = 150.0         # variance ของ Laplacian (บนบัตรครึ่งขนาด) ที่ได้ครึ่งคะแนนความคม
+MIN_SHARPNESS = 40.0      # ต่ำกว่านี้เบลอเกินจะอ่านได้
+GLARE_LEVEL = 250         # ระดับเทาที่ถือว่าอิ่มตัว
+GLARE_MAX = 0.08          # สัดส่วนพิกเซลอิ่มตัวบนบัตรที่ยอมได้
+FRAME_EXT = {".jpg", ".jpeg", ".png"}
+
+
+def _sharpness(gray):
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def _glare(gray):
+    return float(np.count_nonzero(gray >= GLARE_LEVEL)) / max(1, gray.size)
+
+
+def _combine(fit, sharpness, glare):
+    return round((0.25 + 0.75 * fit) * sharpness / (sharpness + SHARP_REF) * max(0.0, 1.0 - glare / GLARE_MAX), 4)
+
+
+def score_frame(small):
+    """คะแนนของเฟรม (ภาพย่อ BGR) คืน {"fit", "sharpness", "glare", "score", "usable"} และ quad (พิกัดภาพย่อ)"""
+    quad = find_card_quad(small)
+    if quad is not None:
+        fit = card_fit_score(quad, small.shape)
+        size = (int(CARD_W * SCORE_CARD_SCALE), int(CARD_H * SCORE_CARD_SCALE))
+        tl, tr, br, bl = quad
+        if np.linalg.norm(bl - tl) > np.linalg.norm(tr - tl):
+            quad_w = np.array([bl, tl, tr, br], dtype=np.float32)
+        else:
+            quad_w = quad
+        dst = np.array([[0, 0], [size[0] - 1, 0], [size[0] - 1, size[1] - 1], [0, size[1] - 1]], dtype=np.float32)
+        region = cv2.warpPerspective(to_gray(small), cv2.getPerspectiveTransform(quad_w, dst), size)
+    else:
+        fit, region = 0.0, to_gray(small)
+    sharpness, glare = _sharpness(region), _glare(region)
+    return {
+        "fit": round(fit, 4),
+        "sharpness": round(sharpness, 1),
+        "glare": round(glare, 4),
+        "score": _combine(fit, sharpness, glare),
+        "usable": sharpness >= MIN_SHARPNESS and glare <= GLARE_MAX,
+    }, quad
+
+
+def score_frame_bytes(raw):
+    """decode แบบย่อแล้วให้คะแนน คืน (scores, quad, ขนาดภาพย่อ (h, w)) หรือ (None, None, None) ถ้า decode ไม่ได้"""
+    small = decode_image_bytes(raw, max_side=SCORE_MAX_SIDE)
+    if small is None:
+        return None, None, None
+    scores, quad = score_frame(small)
+    return scores, quad, small.shape[:2]
+
+
+def rank_frames(scored):
+    """เรียง index ของเฟรม (เฉพาะที่ decode ได้) จากดีที่สุด — usable ก่อน แล้วตาม score, ความคม"""
+    valid = [i for i, s in enumerate(scored) if s is not None]
+    return sorted(valid, key=lambda i: (scored[i]["usable"], scored[i]["score"], scored[i]["sharpness"]), reverse=True)
+
+
+def warp_full(img, quad, small_shape):
+    """warp บัตรจากภาพเต็มด้วย quad ที่หาได้บนภาพย่อ (ไม่ต้องหาขอบบัตรซ้ำ)"""
+    scale = img.shape[0] / small_shape[0]
+    return warp_card(img, quad * scale)
+
+
+def best_field_crops(cards):
+    """ต่อบัตรจากหลายเฟรมที่ warp แล้ว (เรียงจากเฟรมที่ดีที่สุด) — คืน (บัตรรวม, {roi: index ใน cards})
+
+    ROI เทียบกันด้วย score เดียวกับเฟรม (fit = 1) — เฟรมแรกชนะเมื่อเท่ากัน
+    """
+    composite = cards[0].copy()
+    h, w = composite.shape[:2]
+    crops = [crop_field_rois(card) for card in cards]
+    chosen = {}
+    for roi, (x0, y0, x1, y1) in FIELD_ROIS.items():
+        best = max(range(len(cards)), key=lambda i: (
+            _combine(1.0, _sharpness(to_gray(crops[i][roi])), _glare(to_gray(crops[i][roi]))), -i))
+        chosen[roi] = best
+        if best:
+            composite[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)] = crops[best][roi]
+    return composite, chosen
+
+
+def load_frames(path):
+    """ไบต์ของเฟรมในไดเรกทอรี เรียงตามชื่อไฟล์ — คืน [(ชื่อไฟล์, bytes)]"""
+    frames = []
+    for name in sorted(os.listdir(path)):
+        if os.path.splitext(name)[1].lower() in FRAME_EXT:
+            with open(os.path.join(path, name), "rb") as f:
+                frames.append((name, f.read()))
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a recorded camera burst and pick the frame to OCR")
+    parser.add_argument("path", help="ไดเรกทอรีที่มีเฟรม (.jpg / .png) เรียงตามชื่อไฟล์")
+    parser.add_argument("--fit-threshold", type=float, default=0.6, help="CARD_FIT_THRESHOLD")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.path)
+    if not frames:
+        print(f"[FRAMES] ไม่พบไฟล์ภาพใน {args.path}")
+        return 1
+    scored = [score_frame_bytes(raw)[0] for _, raw in frames]
+    for (name, _), s in zip(frames, scored):
+        print(f"[FRAMES] {name:30s} {json.dumps(s)}")
+    ranked = rank_frames(scored)
+    if not ranked:
+        print("[FRAMES] decode ไม่ได้สักเฟรม")
+        return 1
+    best = scored[ranked[0]]
+    mode = "roi" if best["fit"] >= args.fit_threshold else "full"
+    print(f"[FRAMES] selected {frames[ranked[0]][0]} (score {best['score']}, usable {best['usable']}, ocr {mode})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
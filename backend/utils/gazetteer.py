@@ -0,0 +1,277 @@
+"""ทะเบียนชื่อ จังหวัด / อำเภอ / ตำบล + fuzzy index (BK-tree บน Levenshtein distance)
+
+ใช้ "snap" ชื่อสถานที่ที่ OCR อ่านผิดให้เป็นชื่อที่มีจริงและอยู่ในลำดับชั้นเดียวกัน
+(ตำบลต้องอยู่ในอำเภอ และอำเภออยู่ในจังหวัดที่เลือก) พร้อมคะแนนความมั่นใจต่อส่วน
+
+index สร้างจาก data/thai_gazetteer.csv ครั้งเดียวแล้ว pickle เก็บไว้ใน GAZETTEER_CACHE (ไม่ตั้ง = instance folder)
+— process ถัดไปโหลดจาก pickle ไม่เขียน / อ่าน pickle ในโฟลเดอร์ source (data/) ที่ไฟล์อาจมาจากที่อื่น
+
+ข้อจำกัด: ไฟล์ที่ bundle มามีครบ 77 จังหวัด แต่อำเภอ / ตำบลแค่ราว 110 แถว — ตำบล / อำเภอที่ไม่อยู่ในไฟล์
+snap ไม่ได้ (snap_address คงข้อความเดิมเมื่อชื่อระดับใดไม่อยู่ในสายเดียวกัน) ใช้งานจริงควรตั้ง GAZETTEER_PATH
+เป็นทะเบียนเต็ม (รูปแบบเดียวกัน) ของกรมการปกครอง
+"""
+import csv
+import hashlib
+import os
+import pickle
+import re
+import threading
+from pathlib import Path
+
+import Levenshtein as L
+from flask import current_app, has_app_context
+
+from config import Config
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "thai_gazetteer.csv"
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "instance"   # = app.instance_path ของ app.py
+INDEX_VERSION = 1            # เพิ่มเมื่อโครงสร้าง index เปลี่ยน — pickle เก่าจะถูกสร้างใหม่
+MAX_EDIT_RATIO = 0.4         # ยอมให้แก้ได้ไม่เกิน 40% ของความยาวคำที่อ่านได้
+MIN_CONFIDENCE = 0.6         # ต่ำกว่านี้ไม่แทนชื่อ (คงข้อความที่ OCR อ่านได้)
+
+LEVELS = ("tambon", "amphoe", "province")
+
+
+# ====== BK-tree ======
+class BKTree:
+    """ค้นคำที่ระยะ Levenshtein ≤ k โดยตัดกิ่งด้วย triangle inequality
+
+    node = [word, {distance: child_node}]
+    """
+
+    def __init__(self, words=()):
+        self.root = None
+        self.size = 0
+        for w in words:
+            self.add(w)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = [word, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = L.distance(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [word, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word, max_dist):
+        """คืน [(distance, word), ...] เรียงจากใกล้ที่สุด"""
+        if self.root is None:
+            return []
+        out = []
+        stack = [self.root]
+        while stack:
+            w, children = stack.pop()
+            d = L.distance(word, w)
+            if d <= max_dist:
+                out.append((d, w))
+            lo, hi = d - max_dist, d + max_dist
+            for k, child in children.items():
+                if lo <= k <= hi:
+                    stack.append(child)
+        out.sort()
+        return out
+
+
+def max_edits(query):
+    return max(1, int(len(query) * MAX_EDIT_RATIO + 0.5))
+
+
+def confidence(query, name, dist):
+    return round(1.0 - dist / max(len(query), len(name), 1), 4)
+
+
+# ====== Gazetteer ======
+class Gazetteer:
+    def __init__(self, rows):
+        """rows = [(province, amphoe, tambon), ...] — amphoe / tambon ว่างได้"""
+        self.provinces = []
+        self.amphoe_parents = {}   # ชื่ออำเภอ → [จังหวัด, ...]
+        self.tambon_parents = {}   # ชื่อตำบล → [(อำเภอ, จังหวัด), ...]
+        for province, amphoe, tambon in rows:
+            if province and province not in self.provinces:
+                self.provinces.append(province)
+            if amphoe:
+                parents = self.amphoe_parents.setdefault(amphoe, [])
+                if province not in parents:
+                    parents.append(province)
+            if tambon and amphoe:
+                parents = self.tambon_parents.setdefault(tambon, [])
+                if (amphoe, province) not in parents:
+                    parents.append((amphoe, province))
+
+        self.trees = {
+            "province": BKTree(self.provinces),
+            "amphoe": BKTree(self.amphoe_parents),
+            "tambon": BKTree(self.tambon_parents),
+        }
+
+    @classmethod
+    def from_csv(cls, path):
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            lines = (line for line in f if line.strip() and not line.startswith("#"))
+            for row in csv.DictReader(lines):
+                rows.append((row["province"].strip(), (row["amphoe"] or "").strip(), (row["tambon"] or "").strip()))
+        return cls(rows)
+
+    @classmethod
+    def load(cls, path, cache_path=None):
+        """โหลดจาก pickle ถ้าตรงกับไฟล์ต้นทาง (ขนาด + mtime + INDEX_VERSION) ไม่งั้นสร้างใหม่แล้วเขียน pickle
+
+        cache_path = None ไม่ใช้ pickle (สร้างจาก CSV ทุกครั้ง)
+        """
+        if cache_path is None:
+            return cls.from_csv(path)
+        st = os.stat(path)
+        signature = (INDEX_VERSION, st.st_size, st.st_mtime_ns)
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("signature") == signature:
+                return cached["gazetteer"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+        gaz = cls.from_csv(path)
+        try:
+            os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                pickle.dump({"signature": signature, "gazetteer": gaz}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print("[ERROR gazetteer cache]", e)
+        return gaz
+
+    def candidates(self, level, query):
+        """{ชื่อ: (distance, confidence)} ของชื่อในระดับนั้นที่อยู่ในระยะแก้ไขที่ยอมรับ"""
+        if not query:
+            return {}
+        return {
+            name: (d, confidence(query, name, d))
+            for d, name in self.trees[level].search(query, max_edits(query))
+        }
+
+    def resolve(self, tambon="", amphoe="", province=""):
+        """เลือก (ตำบล, อำเภอ, จังหวัด) ที่สอดคล้องกันและได้คะแนนรวมสูงสุด
+
+        คืน {level: {"input", "name", "confidence"}} เฉพาะส่วนที่ส่งเข้ามา
+        name เป็น None เมื่อไม่มีชื่อที่เข้ากับลำดับชั้นที่เลือกหรือความมั่นใจต่ำกว่า MIN_CONFIDENCE
+        """
+        queries = {"tambon": tambon, "amphoe": amphoe, "province": province}
+        cands = {level: self.candidates(level, q) for level, q in queries.items()}
+
+        triples = []
+        for t in cands["tambon"]:
+            triples.extend((t, a, p) for a, p in self.tambon_parents[t])
+        for a in cands["amphoe"]:
+            triples.extend((None, a, p) for p in self.amphoe_parents[a])
+        triples.extend((None, None, p) for p in cands["province"])
+
+        def score(triple):
+            return sum(cands[level][name][1] for level, name in zip(LEVELS, triple) if name in cands[level])
+
+        best = max(triples, key=score) if triples else (None, None, None)
+
+        out = {}
+        for level, name in zip(LEVELS, best):
+            if not queries[level]:
+                continue
+            conf = cands[level][name][1] if name in cands[level] else 0.0
+            out[level] = {
+                "input": queries[level],
+                "name": name if conf >= MIN_CONFIDENCE else None,
+                "confidence": conf,
+            }
+        return out
+
+    def stats(self):
+        return {
+            "provinces": len(self.provinces),
+            "amphoes": len(self.amphoe_parents),
+            "tambons": len(self.tambon_parents),
+        }
+
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def _config(key):
+    """ค่าจาก app.config — นอก app context (worker ของ re-extract, benchmark) ใช้ค่าของ Config"""
+    return current_app.config.get(key) if has_app_context() else getattr(Config, key, None)
+
+
+def cache_path_for(path):
+    """path ของ pickle สำหรับ CSV นี้ใน GAZETTEER_CACHE / instance folder (แยกตาม path เต็มของ CSV)"""
+    if _config("GAZETTEER_CACHE"):
+        cache_dir = _config("GAZETTEER_CACHE")
+    elif has_app_context():
+        cache_dir = current_app.instance_path
+    else:
+        cache_dir = str(DEFAULT_CACHE_DIR)
+    key = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{Path(path).stem}.{key}.idx.pkl")
+
+
+def get_gazetteer():
+    """Gazetteer ที่ใช้ร่วมกันทั้ง process — ไฟล์อื่นระบุได้ด้วย GAZETTEER_PATH"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                path = _config("GAZETTEER_PATH") or str(DEFAULT_PATH)
+                _gazetteer = Gazetteer.load(path, cache_path_for(path))
+    return _gazetteer
+
+
+# ====== Snap ชื่อสถานที่ในข้อความที่อยู่ ======
+# label ต้องอยู่ต้นข้อความหรือหลังช่องว่าง และต้องมีจุด (ต. / อ. / จ.) เพื่อไม่ให้ไปจับคำทั่วไปที่ขึ้นต้นด้วย ต/อ/จ
+RE_PLACE = {
+    "tambon": re.compile(r"(?:^|(?<=\s))(ตำบล|แขวง|ต\.)\s*([\u0E00-\u0E7F]+)"),
+    "amphoe": re.compile(r"(?:^|(?<=\s))(อำเภอ|เขต|อ\.)\s*([\u0E00-\u0E7F]+)"),
+    "province": re.compile(r"(?:^|(?<=\s))(จังหวัด|จ\.)\s*([\u0E00-\u0E7F]+)"),
+}
+
+
+def is_consistent(resolution):
+    """ตำบล อำเภอ และจังหวัดพบครบและอยู่ในสายเดียวกันของ gazetteer (resolve เลือกให้อยู่ในสายเดียวกันเสมอ)"""
+    return all(level in resolution and resolution[level]["name"] for level in LEVELS)
+
+
+def resolve_address(text, gazetteer=None):
+    """หาชื่อ ตำบล / อำเภอ / จังหวัด ในข้อความแล้ว resolve กับ gazetteer — คืน (match ต่อระดับ, ผล resolve)"""
+    gazetteer = gazetteer or get_gazetteer()
+    matches = {level: pat.search(text) for level, pat in RE_PLACE.items()}
+    return matches, gazetteer.resolve(**{level: m.group(2) if m else "" for level, m in matches.items()})
+
+
+def snap_address(text, gazetteer=None, replace=None):
+    """แทนชื่อ ตำบล / อำเภอ / จังหวัด ในข้อความด้วยชื่อจาก gazetteer — คืน (ข้อความใหม่, ผล resolve)
+
+    แทนเฉพาะเมื่อทั้งสามระดับเข้ากันเป็นสายเดียว (is_consistent) — ถ้าบางส่วนไม่มีใน gazetteer
+    (เช่นตำบลที่ไม่อยู่ในไฟล์) การแทนส่วนที่เหลือจะได้ชื่อจากอำเภออื่น จึงคงข้อความที่ OCR อ่านได้ไว้
+    replace=None ใช้ค่า GAZETTEER_SNAP (False = คืนเฉพาะผล resolve / ความมั่นใจ ไม่แก้ข้อความ)
+    """
+    matches, resolution = resolve_address(text, gazetteer)
+    if replace is None:
+        replace = _config("GAZETTEER_SNAP")
+    if not replace or not is_consistent(resolution):
+        return text, resolution
+
+    # แทนจากท้ายข้อความมาหน้า เพื่อให้ตำแหน่งของส่วนที่ยังไม่แทนไม่เลื่อน
+    spans = sorted(
+        ((m.span(2), resolution[level]["name"]) for level, m in matches.items()
+         if m and resolution[level]["name"]),
+        reverse=True,
+    )
+    for (start, end), name in spans:
+        text = text[:start] + name + text[end:]
+    return text, resolution
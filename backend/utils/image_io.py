@@ -0,0 +1,50 @@
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# โหมด decode แบบลดความละเอียด (libjpeg ย่อระหว่าง decode ได้เลย ไม่ต้องถอดเต็มขนาดก่อน)
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def peek_image_size(data):
+    """อ่านเฉพาะ header เพื่อรู้ขนาดภาพ (w, h) โดยไม่ decode ทั้งภาพ"""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            return im.size
+    except Exception:
+        return None
+
+
+def decode_image_bytes(data, max_side=None):
+    """decode ไบต์ของไฟล์ภาพเป็น BGR ndarray ในหน่วยความจำ
+
+    ถ้ากำหนด max_side จะเลือกโหมด reduced decode ที่ใหญ่ที่สุดซึ่งยังไม่เล็กกว่า max_side
+    แล้วย่อส่วนที่เหลือด้วย INTER_AREA — ด้านยาวของผลลัพธ์จะไม่เกิน max_side
+    """
+    buf = np.frombuffer(data, np.uint8)
+    flag = cv2.IMREAD_COLOR
+    if max_side:
+        size = peek_image_size(data)
+        if size:
+            longest = max(size)
+            for factor, reduced_flag in _REDUCED_FLAGS:
+                if longest // factor >= max_side:
+                    flag = reduced_flag
+                    break
+
+    img = cv2.imdecode(buf, flag)
+    if img is None:
+        return None
+
+    h, w = img.shape[:2]
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return img
+
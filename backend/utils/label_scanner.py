@@ -0,0 +1,145 @@
+"""หา label หัวข้อบนบัตร (เลขประจำตัวประชาชน / ชื่อตัวและชื่อสกุล / ... ) ทั้งหมดในรอบเดียว
+
+เดิน token ครั้งเดียวจากซ้ายไปขวา — ที่แต่ละตำแหน่งลองต่อ token ได้ไม่เกิน MAX_SPAN ตัว
+(OCR มักแยก label เป็นหลายคำ เช่น "ชื่อตัว และชื่อสกุล") แล้วเทียบกับทุก label ด้วย Levenshtein
+ที่มี score_cutoff จึงหยุดคำนวณทันทีเมื่อเกินระยะที่ยอมรับ — งานต่อ token คงที่ จึงเป็น O(จำนวน token)
+label ที่ติดกับข้อความ (เช่น "ที่อยู่12/3") เทียบเฉพาะส่วนต้นที่ยาวเท่า label และคืน offset ภายใน token
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import Levenshtein as L
+
+LABELS = {
+    "id_number": "เลขประจำตัวประชาชน",
+    "name": "ชื่อตัวและชื่อสกุล",
+    "dob": "เกิดวันที่",
+    "address": "ที่อยู่",
+    "issue_date": "วันออกบัตร",
+    "expiry_date": "วันบัตรหมดอายุ",
+}
+MAX_EDIT_RATIO = 0.3   # ระยะแก้ไขสูงสุด = 30% ของความยาว label (อย่างน้อย 1)
+MAX_SPAN = 3           # label หนึ่งตัวแตกเป็น token ได้ไม่เกินเท่านี้
+
+Anchor = namedtuple("Anchor", "field label start end distance")
+
+_BOUNDS = {field: max(1, int(len(label) * MAX_EDIT_RATIO + 0.5)) for field, label in LABELS.items()}
+_MAX_LEN = max(len(label) + _BOUNDS[field] for field, label in LABELS.items())
+_PREFIX_MIN_LEN = min(len(label) + _BOUNDS[field] for field, label in LABELS.items()) + 1
+
+# ความยาวของข้อความ → label ที่อาจอยู่ในระยะ (ไม่ต้องวนทุก label ทุกครั้ง)
+_BY_LENGTH = {}
+for _field, _label in LABELS.items():
+    for _n in range(len(_label) - _BOUNDS[_field], len(_label) + _BOUNDS[_field] + 1):
+        _BY_LENGTH.setdefault(_n, []).append((_field, _label, _BOUNDS[_field]))
+
+# label ทุกตัวต้องขึ้นต้นตรงกันอย่างน้อยหนึ่งในสองตัวแรก — ตำแหน่งที่ไม่ผ่านข้ามได้ทันที
+# (OCR ทำตัวแรกหาย เช่น "ี่อยู่" → ตัวแรกของ token ตรงกับตัวที่สองของ label ก็ผ่าน)
+_FIRST = {label[0] for label in LABELS.values()}
+_SECOND = {label[1] for label in LABELS.values()}
+_START = _FIRST | _SECOND
+_EXACT = {label: field for field, label in LABELS.items()}   # OCR อ่าน label ถูกทั้งคำ (กรณีส่วนใหญ่)
+
+
+def _text_offset(tokens, i, k):
+    """แปลงตำแหน่ง k ใน token i..j ที่ต่อกันแบบไม่มีช่องว่าง → offset ในข้อความ"""
+    for offset, tok in tokens[i:]:
+        if k <= len(tok):
+            return offset + k
+        k -= len(tok)
+    return tokens[-1][0] + len(tokens[-1][1])
+
+
+# ข้อความบนบัตรซ้ำกันมาก (label, "บัตรประจำตัวประชาชน", ชื่อจังหวัด) — จำผลต่อข้อความไว้
+@lru_cache(maxsize=8192)
+def _best_label(joined):
+    """label ที่ใกล้ joined ที่สุดภายในระยะที่ยอมรับ → (distance, field, ความยาวที่ใช้) หรือ None"""
+    best = None
+    for field, label, bound in _BY_LENGTH.get(len(joined), ()):
+        d = L.distance(joined, label, score_cutoff=bound)
+        if d <= bound and (best is None or d < best[0]):
+            best = (d, field, len(joined))
+    return best
+
+
+@lru_cache(maxsize=8192)
+def _best_label_prefix(token):
+    """label ที่ติดกับข้อความที่ตามมาใน token เดียว (เช่น "ที่อยู่12/3")
+
+    เทียบเฉพาะส่วนต้นยาว ±1 จาก label, ยอมผิดได้ครึ่งเดียวของปกติ และต้องตรงกับ label ตัวนั้นอย่างน้อย
+    หนึ่งในสองตัวแรก เพื่อไม่จับคำที่แค่ขึ้นต้นคล้ายกัน — ระยะเท่ากันเลือกส่วนที่สั้นกว่า
+    """
+    best = None
+    for field, label in LABELS.items():
+        bound = _BOUNDS[field] // 2
+        if len(token) <= len(label) + _BOUNDS[field] or (token[0] != label[0] and token[1] != label[1]):
+            continue
+        d, length = min((L.distance(token[:k], label, score_cutoff=bound), k)
+                        for k in (len(label) - 1, len(label), len(label) + 1))
+        if d <= bound and (best is None or d < best[0]):
+            best = (d, field, length)
+    return best
+
+
+@lru_cache(maxsize=8192)
+def _best_span(toks):
+    """ผู้สมัครที่ดีที่สุดเมื่อต่อ toks[0], toks[0]+toks[1], ... → (distance, span, field, length) หรือ None
+
+    จำผลต่อชุด token (ข้อความรอบ label บนบัตรซ้ำกันมาก) — scan_labels ไม่ต้องต่อสตริงใหม่ทุกตำแหน่ง
+    """
+    best = None
+    joined = ""
+    for span, tok in enumerate(toks):
+        joined += tok
+        # เช็กความยาวก่อนเรียก — token ส่วนใหญ่สั้น / ยาวเกินกว่าจะเป็น label ได้
+        hit = _best_label(joined) if len(joined) in _BY_LENGTH else None
+        if span == 0 and hit is None and len(joined) >= _PREFIX_MIN_LEN:
+            hit = _best_label_prefix(joined)
+        if hit and (best is None or hit[0] < best[0]):
+            best = (hit[0], span, hit[1], hit[2])
+        if len(joined) >= _MAX_LEN:
+            break
+    return best
+
+
+def scan_labels(tokens):
+    """tokens = [(offset, token), ...] จาก field_extractor.tokenize
+
+    รอบแรกเดินทุกตำแหน่งเก็บผู้สมัครที่ดีที่สุดของแต่ละตำแหน่ง แล้วเลือกผู้สมัครที่ระยะน้อยที่สุดก่อน
+    โดยตัดตัวที่ทับ token กัน (เช่น "06 6 ชื่อตัวและชื่อสกุล" แพ้ "ชื่อตัวและชื่อสกุล")
+    คืน {field: Anchor} — field เดียวเจอหลายที่ใช้ตัวที่ระยะน้อยที่สุด (เท่ากันใช้ตัวแรก)
+    """
+    candidates = []
+    n = len(tokens)
+    for i in range(n):
+        tok = tokens[i][1]
+        if tok[:1] not in _START and tok[1:2] not in _SECOND:
+            continue
+        if tok in _EXACT:   # ระยะ 0 — ต่อ token เพิ่มก็ไม่ดีกว่านี้
+            candidates.append((0, i, i, _EXACT[tok], len(tok)))
+            continue
+        best = _best_span(tuple(t for _, t in tokens[i:i + MAX_SPAN]))
+        if best:
+            d, span, field, length = best
+            candidates.append((d, i, i + span, field, length))
+
+    anchors = {}
+    taken = set()
+    for d, i, j, field, length in sorted(candidates):
+        if field in anchors or any(k in taken for k in range(i, j + 1)):
+            continue
+        taken.update(range(i, j + 1))
+        anchors[field] = Anchor(field, LABELS[field], tokens[i][0], _text_offset(tokens, i, length), d)
+    return anchors
+
+
+def field_windows(text, anchors, max_len=None):
+    """ข้อความหลัง label แต่ละตัวจนถึง label ถัดไป (หรือท้ายข้อความ) → {field: window}"""
+    ordered = sorted(anchors.values(), key=lambda a: a.start)
+    windows = {}
+    for k, a in enumerate(ordered):
+        end = ordered[k + 1].start if k + 1 < len(ordered) else len(text)
+        if max_len is not None:
+            end = min(end, a.end + max_len)
+        windows[a.field] = text[a.end:end].strip()
+    return windows
@@ -0,0 +1,176 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ขอบ bucket (วินาที) — ครอบคลุมตั้งแต่ regex ระดับ ms จนถึง OCR บน CPU หลายวินาที
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# ====== Histogram: bucket สะสม + ตัวอย่างล่าสุดสำหรับ p50/p95/p99 ======
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # ช่องสุดท้าย = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self):
+        samples = sorted(self.recent)
+        if not samples:
+            return {q: None for q in QUANTILES}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+
+# ====== Metrics Registry ======
+class Metrics:
+    """counter + histogram แบบมี label ในหน่วยความจำของ process (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) → float
+        self._histograms = {}  # (name, labels) → Histogram
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def snapshot(self):
+        """สรุปเป็น dict (ใช้กับ JSON) — ต่อ histogram: count, sum, p50/p95/p99"""
+        with self._lock:
+            out = {"counters": {}, "histograms": {}}
+            for (name, labels), v in self._counters.items():
+                out["counters"][_series(name, labels)] = v
+            for (name, labels), h in self._histograms.items():
+                q = h.quantiles()
+                out["histograms"][_series(name, labels)] = {
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "p50": q[0.5], "p95": q[0.95], "p99": q[0.99],
+                }
+            return out
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), v in sorted(self._counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {_escape_help(self._help.get(name, name))}")
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{_series(name, labels)} {v}")
+
+            for (name, labels), h in sorted(self._histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {_escape_help(self._help.get(name, name))}")
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for le, c in zip(self.bucket_labels(h), h.counts):
+                    cumulative += c
+                    lines.append(f"{_series(name + '_bucket', labels + (('le', le),))} {cumulative}")
+                lines.append(f"{_series(name + '_sum', labels)} {h.sum}")
+                lines.append(f"{_series(name + '_count', labels)} {h.count}")
+
+            # quantile จากตัวอย่างล่าสุด (รูปแบบ summary แยกชื่อ — _sum / _count ของหน้าต่างเดียวกัน)
+            for (name, labels), h in sorted(self._histograms.items()):
+                qname = f"{name}_recent"
+                if qname not in seen:
+                    seen.add(qname)
+                    lines.append(f"# TYPE {qname} summary")
+                for q, v in h.quantiles().items():
+                    if v is not None:
+                        lines.append(f"{_series(qname, labels + (('quantile', str(q)),))} {v}")
+                lines.append(f"{_series(qname + '_sum', labels)} {sum(h.recent)}")
+                lines.append(f"{_series(qname + '_count', labels)} {len(h.recent)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def bucket_labels(hist):
+        return [str(b) for b in hist.buckets] + ["+Inf"]
+
+
+def _escape_label(value):
+    """ค่า label ใน text format ต้อง escape \\ , " และขึ้นบรรทัดใหม่ — ไม่ escape แล้ว scraper อ่านทั้งหน้าไม่ได้"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    body = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+    return f"{name}{{{body}}}"
+
+
+metrics = Metrics()
+metrics.describe("ocr_stage_seconds", "Time spent in each OCR pipeline stage")
+metrics.describe("ocr_batch_stage_seconds", "Time per stage for a whole /upload_ocr_batch request")
+metrics.describe("db_query_seconds", "Time spent executing SQL statements")
+metrics.describe("http_request_seconds", "HTTP request latency per endpoint")
+metrics.describe("http_requests_total", "HTTP requests per endpoint and status")
+
+
+# ====== จับเวลาแต่ละ stage ======
+@contextmanager
+def timer(stage):
+    """จับเวลา stage ของ pipeline — บันทึกลง histogram และลง g.timings ของ request ปัจจุบัน (ถ้ามี)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        metrics.observe("ocr_stage_seconds", elapsed, stage=stage)
+        if has_request_context():
+            timings = g.setdefault("timings", {})
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 6)
+
+
+# ====== จับเวลาทุก SQL statement ผ่าน SQLAlchemy event ======
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    verb = statement.lstrip().split(" ", 1)[0].upper()
+    metrics.observe("db_query_seconds", elapsed, op=verb)
+    if has_request_context():
+        timings = g.setdefault("timings", {})
+        timings["db"] = round(timings.get("db", 0.0) + elapsed, 6)
@@ -0,0 +1,240 @@
+import gc
+import os
+import time
+import threading
+
+from config import Config
+from utils.metrics import metrics
+from utils.ner_cache import CachedNer
+
+# ====== อ่านหน่วยความจำ (RSS) ของ process ปัจจุบัน ======
+def current_rss_mb():
+    """คืนค่า RSS ปัจจุบันเป็น MB (Linux อ่านจาก /proc, ที่อื่นใช้ ru_maxrss แทน)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 2)
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS รายงานเป็น bytes, Linux เป็น KB
+        return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 2)
+
+
+# ====== Model Registry ======
+class ModelRegistry:
+    """เก็บโมเดลที่โหลดแล้วไว้ใช้ร่วมกันทั้ง process
+
+    - โหลดแต่ละโมเดลครั้งเดียว (thread-safe) แล้วแจก instance เดิมให้ทุก request
+    - warm-up ด้วย dummy inference ได้ (ใน thread พื้นหลังก็ได้ — ดู start_background_warmup)
+    - เก็บสถานะ (not_loaded / loading / loaded / warming / ready / failed), เวลาโหลด / warm-up
+      และ RSS ที่เพิ่มขึ้นต่อโมเดล — โมเดลที่มี warmup จะ ready หลัง warm-up เสร็จเท่านั้น
+      (loaded = โหลดแล้วแต่ยังไม่ warm-up เช่นโหมด lazy)
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._models = {}
+        self._locks = {}
+        self._stats = {}
+        self._warmup_thread = None
+        self._warmup_lock = threading.Lock()
+
+    def register(self, name, loader, warmup=None, version="1"):
+        """ลงทะเบียนโมเดล — loader() ต้องคืน instance, warmup(model) ใช้รัน dummy inference"""
+        self._specs[name] = {"loader": loader, "warmup": warmup, "version": version}
+        self._locks[name] = threading.Lock()
+        self._stats[name] = {
+            "state": "not_loaded",
+            "loaded": False,
+            "error": None,
+            "version": version,
+            "load_time_s": None,
+            "rss_delta_mb": None,
+            "warmup_time_s": None,
+        }
+
+    def names(self):
+        return list(self._specs)
+
+    def version(self, name):
+        return self._specs[name]["version"]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """คืน instance ที่แชร์กันทั้ง process — โหลดเฉพาะครั้งแรก"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self._specs:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._stats[name].update({"state": "loading", "error": None})
+            rss_before = current_rss_mb()
+            t0 = time.perf_counter()
+            try:
+                model = self._specs[name]["loader"]()
+            except Exception as e:
+                self._stats[name].update({"state": "failed", "error": str(e)})
+                raise
+            load_time = time.perf_counter() - t0
+
+            self._models[name] = model
+            metrics.observe("model_load_seconds", load_time, model=name)
+            self._stats[name].update({
+                "state": "ready" if self._specs[name]["warmup"] is None else "loaded",
+                "loaded": True,
+                "load_time_s": round(load_time, 3),
+                "rss_delta_mb": round(current_rss_mb() - rss_before, 2),
+            })
+            print(f"[MODEL] loaded {name} in {load_time:.2f}s")
+            return model
+
+    def warmup(self, name):
+        """โหลด (ถ้ายังไม่ได้โหลด) แล้วรัน dummy inference หนึ่งครั้ง"""
+        model = self.get(name)
+        warmup_fn = self._specs[name]["warmup"]
+        if warmup_fn is None:
+            return model
+        with self._locks[name]:
+            if self._stats[name]["state"] == "ready":
+                return model
+            self._stats[name]["state"] = "warming"
+            t0 = time.perf_counter()
+            try:
+                warmup_fn(model)
+            except Exception as e:
+                self._stats[name].update({"state": "failed", "error": str(e)})
+                raise
+            self._stats[name].update({"state": "ready", "warmup_time_s": round(time.perf_counter() - t0, 3)})
+        return model
+
+    def warmup_all(self):
+        for name in self._specs:
+            self.warmup(name)
+
+    def start_background_warmup(self):
+        """โหลด + warm-up ทุกโมเดลใน daemon thread (เรียกซ้ำได้ — เริ่มแค่ครั้งเดียว)
+
+        request ที่ต้องใช้โมเดลระหว่างนี้จะรอ lock ของโมเดลนั้นใน get() ส่วน request อื่นตอบได้ทันที
+        """
+        with self._warmup_lock:
+            if self._warmup_thread is not None:
+                return self._warmup_thread
+
+            def run():
+                for name in self._specs:
+                    try:
+                        self.warmup(name)
+                    except Exception as e:
+                        print("[ERROR model warmup]", name, e)
+
+            self._warmup_thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+            self._warmup_thread.start()
+            return self._warmup_thread
+
+    def ready(self):
+        return all(s["state"] == "ready" for s in self._stats.values())
+
+    def stats(self):
+        return {
+            "rss_mb": current_rss_mb(),
+            "models": {name: dict(s) for name, s in self._stats.items()},
+        }
+
+
+# ====== Loader ของโมเดลที่ระบบใช้ ======
+def _load_thai_ner():
+    from pythainlp.tag import NER
+    return NER("thainer")
+
+
+def _warmup_thai_ner(ner):
+    ner.tag("นาย สมชาย ใจดี")
+
+
+def _load_easyocr():
+    import easyocr
+    import torch
+
+    # ====== ตรวจสอบ GPU (MPS) บน Mac — OCR_DEVICE=cpu บังคับใช้ CPU (เช่นตอนรัน benchmark) ======
+    use_gpu = os.getenv("OCR_DEVICE", "auto") != "cpu" and torch.backends.mps.is_available()
+    print(f"🔥 EasyOCR is using {'GPU (MPS)' if use_gpu else 'CPU'}")
+    return easyocr.Reader(['th'], gpu=use_gpu)
+
+
+def _warmup_easyocr(reader):
+    import numpy as np
+    blank = np.full((64, 256), 255, dtype=np.uint8)
+    reader.readtext(blank, detail=0, paragraph=True)
+
+
+registry = ModelRegistry()
+MODEL_LOAD_MODES = ("lazy", "background", "preload")
+registry.register("thai_ner", _load_thai_ner, warmup=_warmup_thai_ner, version="thainer")
+registry.register("easyocr_th", _load_easyocr, warmup=_warmup_easyocr, version="easyocr-1.7.2-th")
+
+
+# tag ผ่าน LRU cache — โมเดลโหลดจาก registry ตอน cache ไม่มีผลครั้งแรก
+# สร้างตอน import (worker ของ re-extract ไม่มี app) จึงอ่านขนาดจาก Config ตรง ๆ
+ner_cache = CachedNer(
+    lambda: registry.get("thai_ner"),
+    max_entries=Config.NER_CACHE_ENTRIES,
+    max_bytes=Config.NER_CACHE_MB * 1024 * 1024,
+)
+
+
+def get_ner():
+    return ner_cache
+
+
+def get_reader():
+    return registry.get("easyocr_th")
+
+
+# ====== โหมดการโหลดโมเดลตอน start server (MODEL_LOAD_MODE) ======
+def init_models(mode):
+    """lazy: โหลดตอนใช้ครั้งแรก | background: warm-up ใน thread (server รับ request ได้ทันที)
+    preload: โหลดให้เสร็จก่อนกลับ แล้ว gc.freeze() — ใช้กับ gunicorn --preload เพื่อให้ worker ที่ fork
+    ออกไปใช้ weight ชุดเดียวกันแบบ copy-on-write (ห้ามใช้ background กับ --preload: thread ไม่ตามไปหลัง fork)
+    """
+    if mode not in MODEL_LOAD_MODES:
+        raise ValueError(f"MODEL_LOAD_MODE must be one of {MODEL_LOAD_MODES}, got {mode!r}")
+    if mode == "background":
+        registry.start_background_warmup()
+    elif mode == "preload":
+        registry.warmup_all()
+        # ย้าย object ที่มีอยู่ออกจากการสแกนของ GC — ไม่งั้น GC ใน worker จะเขียน header ของ object
+        # ทำให้ page ที่แชร์กับ master ถูก copy
+        gc.freeze()
+
+
+# ====== OCR ใน process pool (OCR_POOL_WORKERS > 0) ======
+def use_ocr_pool(workers, torch_threads=1, max_inflight=None, submit_timeout=10.0, task_timeout=120.0,
+                 max_tasks=0, max_rss_mb=0, ready_timeout=600.0):
+    """แทน loader ของ easyocr_th ด้วย OcrProcessPool — get_reader() คืน PooledReader แทน easyocr.Reader
+
+    ต้องเรียกก่อน init_models; สถานะ ready / failed ของ easyocr_th จึงครอบคลุมทั้ง pool (รอทุก worker โหลดเสร็จ)
+    """
+    def load():
+        import atexit
+        from utils.ocr_pool import OcrProcessPool, PooledReader
+
+        pool = OcrProcessPool(workers, torch_threads, max_inflight, submit_timeout, max_tasks, max_rss_mb).start()
+        atexit.register(pool.shutdown)
+        if not pool.wait_ready(ready_timeout):
+            pool.shutdown()
+            raise RuntimeError(pool.error or f"OCR pool not ready after {ready_timeout}s")
+        print(f"[MODEL] OCR pool ready: {workers} workers x {torch_threads} torch threads")
+        return PooledReader(pool, task_timeout)
+
+    # worker แต่ละตัว warm-up ของตัวเองแล้ว ไม่ต้อง warm-up ซ้ำผ่าน pool
+    registry.register("easyocr_th", load, warmup=None, version=registry.version("easyocr_th"))
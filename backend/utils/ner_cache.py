@@ -0,0 +1,105 @@
+"""LRU cache หน้า ThaiNER — ข้อความเดิม (หลังยุบช่องว่าง) ไม่ต้อง tag ซ้ำ
+
+- จำกัดทั้งจำนวนรายการและขนาดรวมเป็นไบต์ (ประมาณจากความยาว utf-8 ของ key + token)
+- tag_each: tag หลายข้อความ — ตัดตัวซ้ำในชุด, ใช้ผลจาก cache แล้ว tag ที่ขาดทีละข้อความ
+  (NER ของ pythainlp tag ได้ทีละข้อความ ไม่มี API แบบ batch)
+- นับ hit / miss / eviction ไว้ดูผ่าน /model_stats และ metrics (ner_cache_requests_total)
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from utils.metrics import metrics
+
+RE_SPACES = re.compile(r"\s+")
+ENTRY_OVERHEAD = 64   # ไบต์ต่อรายการ / ต่อ token โดยประมาณ (tuple + str header)
+
+metrics.describe("ner_cache_requests_total", "ThaiNER cache lookups by result (hit / miss)")
+
+
+def _entry_size(key, tags):
+    return (len(key.encode("utf-8")) + ENTRY_OVERHEAD
+            + sum(len(tok.encode("utf-8")) + len(tag) + ENTRY_OVERHEAD for tok, tag in tags))
+
+
+class CachedNer:
+    """หน้าตาเหมือน NER ของ pythainlp (tag) + tag_each — get_model() คืนตัว NER จริง (โหลดตอนต้องใช้)"""
+
+    def __init__(self, get_model, max_entries=8192, max_bytes=16 * 1024 * 1024):
+        self._get_model = get_model
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lru = OrderedDict()   # key → (tags, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(text):
+        return RE_SPACES.sub(" ", text or "").strip()
+
+    def _get(self, key):
+        with self._lock:
+            item = self._lru.get(key)
+            if item is None:
+                self.counters["misses"] += 1
+            else:
+                self._lru.move_to_end(key)
+                self.counters["hits"] += 1
+        metrics.inc("ner_cache_requests_total", result="miss" if item is None else "hit")
+        return item[0] if item is not None else None
+
+    def _put(self, key, tags):
+        size = _entry_size(key, tags)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._lru[key] = (tags, size)
+            self._bytes += size
+            while self._lru and (len(self._lru) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._lru.popitem(last=False)
+                self._bytes -= evicted
+                self.counters["evictions"] += 1
+
+    def tag(self, text):
+        key = self.key(text)
+        tags = self._get(key)
+        if tags is None:
+            # tag ข้อความที่ยุบช่องว่างแล้ว — ผลขึ้นกับ key อย่างเดียว
+            tags = tuple(self._get_model().tag(key))
+            self._put(key, tags)
+        return tags
+
+    def tag_each(self, texts):
+        """tag หลายข้อความ คืน list ตามลำดับเดิม — ข้อความซ้ำในชุดถูก tag ครั้งเดียว (ตัวที่ไม่อยู่ใน cache
+        ส่งเข้าโมเดลทีละข้อความ)"""
+        keys = [self.key(t) for t in texts]
+        found = {}
+        for key in dict.fromkeys(keys):
+            tags = self._get(key)
+            if tags is None:
+                tags = tuple(self._get_model().tag(key))
+                self._put(key, tags)
+            found[key] = tags
+        return [found[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "entries": len(self._lru),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+                **self.counters,
+            }
+
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from database import db
+from database.models import OcrCacheEntry
+from utils.ocr_text import pack_ocr_text, unpack_ocr_text
+
+
+def content_hash(data):
+    """SHA-256 ของไบต์ไฟล์ที่อัปโหลด (ไม่สนชื่อไฟล์)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+EVICT_EVERY = 32   # ตรวจขนาดตาราง (SUM ทั้งตาราง) ทุกกี่ครั้งที่ put — ไม่ต้องเสีย round trip ทุก request
+TOUCH_EVERY = 60   # hit ใน tier 1 อัปเดต last_hit_at ของแถวใน DB ไม่เกินครั้งละกี่วินาทีต่อ entry
+PURGE_EVERY = 3600  # ตรวจเวอร์ชันที่เลิกใช้แล้วไม่เกินชั่วโมงละครั้งต่อ process
+
+
+def _entry_size(raw_text, fields_json, ocr_text_z=None):
+    return len((raw_text or "").encode("utf-8")) + len((fields_json or "").encode("utf-8")) + len(ocr_text_z or b"")
+
+
+# ====== แคชสองชั้น: LRU ในหน่วยความจำ → ตาราง ocr_cache ======
+class OcrResultCache:
+    """แคชผล OCR (raw_text + fields) ตาม content hash + pipeline version
+
+    - tier 1: OrderedDict LRU จำกัดขนาดรวมเป็นไบต์ (memory_max_bytes)
+    - tier 2: ตาราง ocr_cache จำกัดขนาดรวม (db_max_bytes) — ลบแถวที่ถูกใช้ล่าสุดนานที่สุดก่อน
+      (ตรวจทุก EVICT_EVERY ครั้งที่ put จึงเกินได้ชั่วคราวไม่เกินเท่านั้นแถว) hit ใน tier 1 ก็อัปเดต
+      last_hit_at ด้วย (ไม่เกินทุก TOUCH_EVERY วินาที) แถวที่ถูกใช้บ่อยจึงไม่ถูกลบก่อน
+    - เวอร์ชัน pipeline เป็นส่วนหนึ่งของ key — เวอร์ชันอื่นที่ไม่มีแถวไหนถูกใช้เลยนานกว่า stale_after
+      ถือว่าเลิกใช้แล้วและถูกลบทั้งเวอร์ชัน (process ที่ยังรันเวอร์ชันเก่าระหว่าง deploy ยังใช้แคชของตัวเองได้)
+    """
+
+    def __init__(self, pipeline_version, memory_max_bytes=32 * 1024 * 1024, db_max_bytes=256 * 1024 * 1024,
+                 stale_after=timedelta(hours=24)):
+        self.pipeline_version = pipeline_version
+        self.memory_max_bytes = memory_max_bytes
+        self.db_max_bytes = db_max_bytes
+        self.stale_after = stale_after
+        self._lru = OrderedDict()
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+        self._purged_at = None
+        self._puts_since_evict = EVICT_EVERY - 1   # put แรกของ process ตรวจขนาดเลย
+        self.counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "puts": 0,
+                         "memory_evictions": 0, "db_evictions": 0, "invalidated": 0}
+
+    # ---------- tier 1 ----------
+    def _lru_get(self, key):
+        """คืน (item, จำนวน hit ที่ต้องเขียนลง DB) — จำนวนเป็น 0 ถ้าเพิ่งอัปเดตไปไม่ถึง TOUCH_EVERY วินาที"""
+        with self._lock:
+            item = self._lru.get(key)
+            if item is None:
+                return None, 0
+            self._lru.move_to_end(key)
+            item["pending_hits"] += 1
+            now = time.monotonic()
+            if now - item["touched_at"] < TOUCH_EVERY:
+                return item, 0
+            hits, item["pending_hits"], item["touched_at"] = item["pending_hits"], 0, now
+            return item, hits
+
+    def _lru_put(self, key, item):
+        size = item["size_bytes"]
+        if size > self.memory_max_bytes:
+            return
+        item.update(touched_at=time.monotonic(), pending_hits=0)
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._lru_bytes -= old["size_bytes"]
+            self._lru[key] = item
+            self._lru_bytes += size
+            while self._lru_bytes > self.memory_max_bytes:
+                _, evicted = self._lru.popitem(last=False)
+                self._lru_bytes -= evicted["size_bytes"]
+                self.counters["memory_evictions"] += 1
+
+    # ---------- tier 2 ----------
+    def _touch_db(self, digest, hits):
+        """บันทึก hit จาก tier 1 ลงแถวใน DB (ผู้เรียก commit)"""
+        OcrCacheEntry.query.filter_by(content_hash=digest, pipeline_version=self.pipeline_version).update(
+            {
+                OcrCacheEntry.hit_count: func.coalesce(OcrCacheEntry.hit_count, 0) + hits,
+                OcrCacheEntry.last_hit_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+
+    def _purge_stale_versions(self):
+        """ลบแถวของเวอร์ชันอื่นที่ไม่ถูกใช้เลยนานกว่า stale_after (ตรวจไม่เกินทุก PURGE_EVERY วินาที)
+
+        เวอร์ชันเป็น string ประกอบ (โมเดล + extractor + config) เทียบลำดับกันไม่ได้ — ถือว่าเวอร์ชันที่
+        ไม่มีใครใช้นานพอคือเวอร์ชันเก่า ส่วนเวอร์ชันที่ process อื่นยังใช้อยู่ last_hit_at จะใหม่เสมอ
+        """
+        now = time.monotonic()
+        if self._purged_at is not None and now - self._purged_at < PURGE_EVERY:
+            return
+        self._purged_at = now
+        cutoff = datetime.utcnow() - self.stale_after
+        stale = [
+            version for (version,) in
+            db.session.query(OcrCacheEntry.pipeline_version)
+            .filter(OcrCacheEntry.pipeline_version != self.pipeline_version)
+            .group_by(OcrCacheEntry.pipeline_version)
+            .having(func.max(OcrCacheEntry.last_hit_at) < cutoff)
+            .all()
+        ]
+        if not stale:
+            return
+        deleted = (
+            OcrCacheEntry.query
+            .filter(OcrCacheEntry.pipeline_version.in_(stale))
+            .delete(synchronize_session=False)
+        )
+        db.session.commit()
+        self.counters["invalidated"] += deleted
+
+    def _evict_db(self):
+        total = db.session.query(func.coalesce(func.sum(OcrCacheEntry.size_bytes), 0)).scalar()
+        if total <= self.db_max_bytes:
+            return
+        # ลบแถวเก่าสุด (ตาม last_hit_at) ทีละชุดจนขนาดรวมไม่เกิน db_max_bytes
+        while total > self.db_max_bytes:
+            rows = (
+                db.session.query(OcrCacheEntry.id, OcrCacheEntry.size_bytes)
+                .order_by(OcrCacheEntry.last_hit_at.asc())
+                .limit(500)
+                .all()
+            )
+            if not rows:
+                break
+            to_delete = []
+            for row_id, size in rows:
+                if total <= self.db_max_bytes:
+                    break
+                to_delete.append(row_id)
+                total -= size or 0
+            OcrCacheEntry.query.filter(OcrCacheEntry.id.in_(to_delete)).delete(synchronize_session=False)
+            db.session.commit()
+            self.counters["db_evictions"] += len(to_delete)
+
+    # ---------- public API ----------
+    def evict(self):
+        """เรียกหลัง commit แถวที่ put(commit=False) — ตรวจ / ลบแถวเกินขนาดทุก EVICT_EVERY ครั้ง"""
+        self._puts_since_evict += 1
+        if self._puts_since_evict < EVICT_EVERY:
+            return
+        self._puts_since_evict = 0
+        self._evict_db()
+
+    def get(self, digest, commit=True):
+        """คืน {"raw_text", "ocr_text", "fields", "processed_image_path"} หรือ None ถ้าไม่มีในแคช
+
+        commit=False: ตัวนับ hit ของแถวใน DB ถูก commit พร้อม transaction ถัดไปของ request (เช่น draft)
+        """
+        key = (digest, self.pipeline_version)
+        item, hits = self._lru_get(key)
+        if item is not None:
+            self.counters["memory_hits"] += 1
+            if hits:
+                self._touch_db(digest, hits)
+                if commit:
+                    db.session.commit()
+            return item
+
+        self._purge_stale_versions()
+        row = OcrCacheEntry.query.filter_by(content_hash=digest, pipeline_version=self.pipeline_version).first()
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+
+        row.hit_count = (row.hit_count or 0) + 1
+        row.last_hit_at = datetime.utcnow()
+        if commit:
+            db.session.commit()
+
+        item = {
+            "raw_text": row.raw_text,
+            "ocr_text": unpack_ocr_text(row.ocr_text_z),
+            "fields": json.loads(row.fields_json or "{}"),
+            "processed_image_path": row.processed_image_path,
+            "size_bytes": row.size_bytes or 0,
+        }
+        self._lru_put(key, item)
+        self.counters["db_hits"] += 1
+        return item
+
+    def put(self, digest, raw_text, fields, processed_image_path=None, ocr_text=None, commit=True):
+        """commit=False: เพิ่มแถวใน session เท่านั้น — ผู้เรียก commit รวมกับ draft แล้วเรียก evict()"""
+        self._purge_stale_versions()
+        fields_json = json.dumps(fields, ensure_ascii=False)
+        ocr_text_z = pack_ocr_text(ocr_text)
+        size = _entry_size(raw_text, fields_json, ocr_text_z)
+
+        row = OcrCacheEntry.query.filter_by(content_hash=digest, pipeline_version=self.pipeline_version).first()
+        if row is None:
+            row = OcrCacheEntry(content_hash=digest, pipeline_version=self.pipeline_version)
+            db.session.add(row)
+        row.raw_text = raw_text
+        row.ocr_text_z = ocr_text_z
+        row.fields_json = fields_json
+        row.processed_image_path = processed_image_path
+        row.size_bytes = size
+        row.last_hit_at = datetime.utcnow()
+        self.counters["puts"] += 1
+        if commit:
+            db.session.commit()
+            self.evict()
+
+        self._lru_put((digest, self.pipeline_version), {
+            "raw_text": raw_text,
+            "ocr_text": ocr_text,
+            "fields": fields,
+            "processed_image_path": processed_image_path,
+            "size_bytes": size,
+        })
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._lru_bytes = 0
+        deleted = OcrCacheEntry.query.delete(synchronize_session=False)
+        db.session.commit()
+        self.counters["invalidated"] += deleted
+
+    def stats(self):
+        hits = self.counters["memory_hits"] + self.counters["db_hits"]
+        lookups = hits + self.counters["misses"]
+        with self._lock:
+            memory = {"entries": len(self._lru), "bytes": self._lru_bytes, "max_bytes": self.memory_max_bytes}
+        return {
+            "pipeline_version": self.pipeline_version,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "counters": dict(self.counters),
+            "memory": memory,
+            "db_max_bytes": self.db_max_bytes,
+        }
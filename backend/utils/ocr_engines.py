@@ -0,0 +1,200 @@
+"""OCR engine ที่สลับกันได้ (EasyOCR / Tesseract) + cascade ที่ลอง engine ถูกก่อน
+
+ทุก engine มี read(img, field) → (text, confidence) และ read_fields(crops) → (texts, engines)
+โดย engines บอกว่าแต่ละฟิลด์ได้ข้อความมาจาก engine ไหน
+
+cascade: อ่าน ROI ของฟิลด์ที่กำหนดด้วย Tesseract ก่อน (เร็วกว่า EasyOCR บน CPU หลายเท่า) — ถ้าผ่าน validator
+ของฟิลด์นั้นและความมั่นใจไม่ต่ำกว่า min_confidence ใช้ได้เลย ไม่ผ่านค่อยอ่านใหม่ด้วย EasyOCR
+ฟิลด์ที่ Tesseract ไม่มีภาษารองรับ (เช่นไม่ได้ติดตั้ง tha.traineddata) หรือไม่มี tesseract เลย จะไป EasyOCR ตรง ๆ
+"""
+from abc import ABC, abstractmethod
+
+from utils.field_extractor import RE_NAME
+from utils.gazetteer import is_consistent, resolve_address
+from utils.metrics import metrics, timer
+from utils.normalizer import RE_DATE, fix_digits, normalize_date_th, th_id_valid
+
+OCR_ENGINES = ("easyocr", "tesseract", "cascade")
+
+metrics.describe("ocr_engine_fields_total", "Card fields read per OCR engine (cascade: cheap pass accepted or escalated)")
+
+
+# ====== Validator ต่อฟิลด์ (ตรวจข้อความดิบจาก engine ถูก — ไม่ผ่านถือว่าต้องอ่านใหม่) ======
+def _valid_id(text):
+    # ไม่ใช้ th_id_fix_one_digit — ผลที่ต้องแก้ checksum ถือว่าไม่น่าเชื่อพอ ให้ EasyOCR อ่านใหม่
+    d = fix_digits(text)
+    return len(d) == 13 and th_id_valid(d)
+
+
+def _valid_dob(text):
+    m = RE_DATE.fullmatch(normalize_date_th(text))
+    return bool(m) and 1 <= int(m.group(1)) <= 31
+
+
+def _valid_name(text):
+    return RE_NAME.search(text) is not None
+
+
+def _valid_address(text):
+    _, resolution = resolve_address(text)
+    return is_consistent(resolution)
+
+
+VALIDATORS = {
+    "id_number": _valid_id,
+    "dob": _valid_dob,
+    "name": _valid_name,
+    "address": _valid_address,
+}
+
+
+# ====== Engines ======
+class OcrEngine(ABC):
+    name = ""
+
+    @property
+    def version(self):
+        return self.name
+
+    def supports(self, field):
+        return True
+
+    @abstractmethod
+    def read(self, img, field=None):
+        """อ่านภาพหนึ่งภาพ คืน (text, confidence) — confidence เป็น None ถ้า engine ไม่บอก"""
+
+    def read_many(self, imgs, **batch):
+        """อ่านทั้งภาพหลายภาพ คืน list ของ (text, confidence) — engine ที่อ่านเป็น batch ได้ override
+        (batch = n_width / n_height / batch_size ของ OCR_BATCH_*; engine ที่อ่านทีละภาพไม่ใช้)"""
+        return [self.read(img) for img in imgs]
+
+    def read_fields(self, crops):
+        texts, engines = {}, {}
+        for field, crop in crops.items():
+            with timer("ocr"):
+                texts[field], _ = self.read(crop, field)
+            engines[field] = self.name
+            metrics.inc("ocr_engine_fields_total", field=field, engine=self.name)
+        return texts, engines
+
+
+class EasyOcrEngine(OcrEngine):
+    """EasyOCR จาก model registry (หรือ OCR pool ถ้าเปิด OCR_POOL_WORKERS) — ไม่คืนความมั่นใจ"""
+    name = "easyocr"
+
+    def __init__(self, get_reader):
+        self._get_reader = get_reader
+
+    def read(self, img, field=None):
+        # เลขบัตรพิมพ์เป็นเลขอารบิก — จำกัดตัวอักษรช่วยลดการอ่านผิด
+        kwargs = {"allowlist": "0123456789 "} if field == "id_number" else {}
+        lines = self._get_reader().readtext(img, detail=0, paragraph=True, **kwargs)
+        return (" " if field else "\n").join(lines), None
+
+    def read_many(self, imgs, **batch):
+        # readtext_batched ย่อ / ขยายทุกภาพเป็น n_width x n_height ก่อน detection
+        batched = self._get_reader().readtext_batched(list(imgs), detail=0, paragraph=True, **batch)
+        return [("\n".join(lines), None) for lines in batched]
+
+
+class TesseractEngine(OcrEngine):
+    """pytesseract — ROI ฟิลด์เดียวอ่านแบบบรรทัดเดียว (psm 7), เลขบัตรจำกัดเฉพาะตัวเลข"""
+    name = "tesseract"
+
+    # field → (ภาษา, config)
+    FIELD_CONFIG = {
+        "id_number": ("eng", "--psm 7 -c tessedit_char_whitelist=0123456789"),
+        "name": ("tha", "--psm 7"),
+        "dob": ("tha", "--psm 7"),
+        "address": ("tha", "--psm 6"),
+        None: ("tha", "--psm 6"),
+    }
+
+    def __init__(self, cmd=None):
+        self.cmd = cmd
+        self._languages = None
+
+    def languages(self):
+        """ภาษาที่ tesseract ในเครื่องมี — ว่างถ้าไม่มี pytesseract หรือไม่มีตัว tesseract"""
+        if self._languages is None:
+            try:
+                import pytesseract
+                if self.cmd:
+                    pytesseract.pytesseract.tesseract_cmd = self.cmd
+                self._languages = set(pytesseract.get_languages(config=""))
+            except Exception as e:
+                print("[ERROR tesseract]", e)
+                self._languages = set()
+        return self._languages
+
+    def supports(self, field):
+        lang, _ = self.FIELD_CONFIG.get(field, self.FIELD_CONFIG[None])
+        return lang in self.languages()
+
+    def read(self, img, field=None):
+        """คืน (ข้อความ, ความมั่นใจ 0–1 เฉลี่ยถ่วงตามความยาวคำ)"""
+        import pytesseract
+
+        lang, config = self.FIELD_CONFIG.get(field, self.FIELD_CONFIG[None])
+        data = pytesseract.image_to_data(img, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        words = [(w.strip(), float(c)) for w, c in zip(data["text"], data["conf"]) if w.strip() and float(c) >= 0]
+        if not words:
+            return "", 0.0
+        total = sum(len(w) for w, _ in words)
+        confidence = sum(len(w) * c for w, c in words) / total / 100
+        return " ".join(w for w, _ in words), round(confidence, 4)
+
+
+class CascadeEngine(OcrEngine):
+    """ลอง cheap กับฟิลด์ใน fields ก่อน — ไม่ผ่าน validator / ความมั่นใจต่ำ ค่อยใช้ expensive"""
+    name = "cascade"
+
+    def __init__(self, cheap, expensive, fields=("id_number", "dob"), min_confidence=0.75):
+        self.cheap = cheap
+        self.expensive = expensive
+        self.fields = tuple(fields)
+        self.min_confidence = min_confidence
+
+    @property
+    def version(self):
+        # กฎการเลือก engine เปลี่ยนผลลัพธ์ได้ — ใส่ไว้ใน pipeline version (cache key)
+        return f"cascade({','.join(self.fields)})@{self.min_confidence}"
+
+    def read(self, img, field=None):
+        # ทั้งภาพ (ไม่มี ROI) ไม่มี validator ต่อฟิลด์ — ใช้ engine หลักเสมอ
+        return self.expensive.read(img, field)
+
+    def read_many(self, imgs, **batch):
+        return self.expensive.read_many(imgs, **batch)
+
+    def read_fields(self, crops):
+        texts, engines = {}, {}
+        for field, crop in crops.items():
+            if field in self.fields and field in VALIDATORS and self.cheap.supports(field):
+                try:
+                    with timer("ocr_cheap"):
+                        text, confidence = self.cheap.read(crop, field)
+                except Exception as e:
+                    print("[ERROR cascade cheap pass]", field, e)
+                    text, confidence = "", 0.0
+                if confidence >= self.min_confidence and VALIDATORS[field](text):
+                    texts[field], engines[field] = text, self.cheap.name
+                    metrics.inc("ocr_engine_fields_total", field=field, engine=self.cheap.name)
+                    continue
+                metrics.inc("ocr_engine_fields_total", field=field, engine="escalated")
+            with timer("ocr"):
+                texts[field], _ = self.expensive.read(crop, field)
+            engines[field] = self.expensive.name
+            metrics.inc("ocr_engine_fields_total", field=field, engine=self.expensive.name)
+        return texts, engines
+
+
+def build_engine(name, get_reader, cascade_fields=("id_number", "dob"), min_confidence=0.75, tesseract_cmd=None):
+    """สร้าง engine ตามชื่อใน OCR_ENGINE"""
+    if name not in OCR_ENGINES:
+        raise ValueError(f"OCR_ENGINE must be one of {OCR_ENGINES}, got {name!r}")
+    if name == "easyocr":
+        return EasyOcrEngine(get_reader)
+    if name == "tesseract":
+        return TesseractEngine(tesseract_cmd)
+    return CascadeEngine(TesseractEngine(tesseract_cmd), EasyOcrEngine(get_reader), cascade_fields, min_confidence)
@@ -0,0 +1,168 @@
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ====== ลำดับความสำคัญของงาน (เลขน้อย = ทำก่อน) ======
+PRIORITY_LANES = {"high": 0, "normal": 1, "low": 2}
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_ERROR = "error"
+
+
+class QueueFullError(Exception):
+    """คิวเต็ม — ให้ route ตอบ 429 แทนการรับงานเพิ่ม"""
+
+
+# ====== OCR Job ======
+class OcrJob:
+    def __init__(self, payload, priority):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.status = JOB_QUEUED
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0  # เพิ่มทุกครั้งที่สถานะเปลี่ยน — ใช้กับ SSE
+        self._cond = threading.Condition()
+
+    def update(self, **changes):
+        with self._cond:
+            for k, v in changes.items():
+                setattr(self, k, v)
+            self.version += 1
+            self._cond.notify_all()
+
+    def wait_for_change(self, since_version, timeout):
+        """รอจนกว่า version จะเปลี่ยนจาก since_version (หรือหมดเวลา) แล้วคืน version ปัจจุบัน"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != since_version, timeout=timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_ERROR)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+# ====== In-process Job Queue ======
+class OcrJobQueue:
+    """คิวงาน OCR ภายใน process (ไม่ต้องใช้ broker ภายนอก)
+
+    - PriorityQueue เดียว (high ก่อน normal ก่อน low) แต่จำกัดความลึกแยกต่อ lane — lane ที่เต็มแล้ว
+      submit() จะโยน QueueFullError โดยไม่กระทบ lane อื่น (งาน low ล้นคิวก็ยังรับงาน high ได้)
+    - worker thread หลายตัวดึงงานไปรันด้วย handler(job) ภายใน app context
+    - เก็บงานที่เสร็จแล้วไว้จำนวนจำกัด (max_finished) เพื่อให้ client มา poll ได้
+    """
+
+    def __init__(self, handler, max_depth=100, workers=2, max_finished=1000, lane_depths=None):
+        """lane_depths = {lane: ความลึกสูงสุด} — lane ที่ไม่ระบุใช้ max_depth"""
+        self._handler = handler
+        self._queue = queue.PriorityQueue()
+        self._lane_depths = {lane: (lane_depths or {}).get(lane, max_depth) for lane in PRIORITY_LANES}
+        self._lane_counts = dict.fromkeys(PRIORITY_LANES, 0)   # งานที่รออยู่ในคิวต่อ lane
+        self._lane_lock = threading.Lock()
+        self._seq = itertools.count()  # FIFO ภายใน lane เดียวกัน
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._workers = workers
+        self._max_finished = max_finished
+        self._threads = []
+        self._app = None
+        self._start_lock = threading.Lock()
+
+    def start(self, app):
+        """สร้าง worker thread ครั้งแรกที่มีงานเข้ามา (ไม่สร้างตอน import)"""
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._app = app
+            for i in range(self._workers):
+                t = threading.Thread(target=self._worker_loop, name=f"ocr-job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, payload, priority="normal"):
+        if priority not in PRIORITY_LANES:
+            raise ValueError(f"Unknown priority: {priority}")
+        job = OcrJob(payload, priority)
+        # ลงทะเบียนก่อนเข้าคิว — worker อาจหยิบงานไปทำ / client อาจ GET ทันทีหลัง submit
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+        with self._lane_lock:
+            if self._lane_counts[priority] >= self._lane_depths[priority]:
+                with self._jobs_lock:
+                    self._jobs.pop(job.id, None)
+                raise QueueFullError(f"OCR job queue is full ({priority} lane)")
+            self._lane_counts[priority] += 1
+            self._queue.put_nowait((PRIORITY_LANES[priority], next(self._seq), job))
+        return job
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._jobs_lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        with self._lane_lock:
+            lanes = {lane: {"depth": n, "max_depth": self._lane_depths[lane]} for lane, n in self._lane_counts.items()}
+        return {
+            "depth": self.depth(),
+            "max_depth": sum(self._lane_depths.values()),
+            "lanes": lanes,
+            "workers": len(self._threads),
+            "jobs": counts,
+        }
+
+    def _worker_loop(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lane_lock:
+                self._lane_counts[job.priority] -= 1
+            # payload (ไบต์ของภาพ) ไม่ต้องเก็บหลังเริ่มงานแล้ว
+            payload, job.payload = job.payload, None
+            job.update(status=JOB_RUNNING, started_at=time.time())
+            try:
+                with self._app.app_context():
+                    result = self._handler(job, payload)
+                job.update(status=JOB_DONE, stage=None, result=result, finished_at=time.time())
+            except Exception as e:
+                print(f"[ERROR ocr-job {job.id}]", e)
+                job.update(status=JOB_ERROR, error=str(e), finished_at=time.time())
+            finally:
+                self._queue.task_done()
+                self._prune_finished()
+
+    def _prune_finished(self):
+        with self._jobs_lock:
+            finished = [jid for jid, j in self._jobs.items() if j.finished]
+            for jid in finished[: max(0, len(finished) - self._max_finished)]:
+                del self._jobs[jid]
@@ -0,0 +1,357 @@
+"""OCR ใน process pool — EasyOCR หนึ่งตัวต่อ worker process ใช้ได้หลาย core พร้อมกัน
+
+- ภาพที่ decode แล้วส่งให้ worker ผ่าน multiprocessing.shared_memory (ไม่ pickle pixel)
+- worker แต่ละตัวจำกัด torch thread และผูกกับกลุ่ม core ของตัวเอง (sched_setaffinity บน Linux)
+- worker มีคิวงานของตัวเอง parent จึงรู้เสมอว่างานไหนค้างอยู่ที่ใคร — ส่งงานให้ตัวที่งานค้างน้อยที่สุด
+- งานค้างพร้อมกันไม่เกิน max_inflight — เกินแล้วรอได้ submit_timeout วินาทีก่อน PoolBusyError
+- worker ตาย (crash / ถูก OOM kill) → เริ่มตัวใหม่ งานที่กำลังทำอยู่ลองซ้ำได้อีก TASK_RETRIES ครั้ง
+  งานที่ยังรอคิวของ worker ตัวนั้นย้ายไปตัวอื่นโดยไม่นับเป็นการลองซ้ำ
+- worker ที่ RSS เกิน max_rss_mb หรือทำงานครบ max_tasks จะปลดตัวเองหลังจบงาน แล้วถูกแทนด้วยตัวใหม่
+"""
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+from multiprocessing import shared_memory
+
+TASK_RETRIES = 1          # งานที่ทำให้ worker ตายส่งซ้ำได้กี่ครั้ง
+MONITOR_INTERVAL = 0.5    # วินาที — ความถี่ตรวจ worker ที่ตาย
+STARTUP_FAILURES = 3      # worker ตายก่อนโหลดโมเดลเสร็จติดกันเท่านี้ → หยุด restart (เช่นไม่มี easyocr)
+
+
+class PoolBusyError(Exception):
+    """งานค้างเต็ม max_inflight จนหมด submit_timeout — ให้ route ตอบ 503 + Retry-After"""
+
+
+class WorkerCrashedError(Exception):
+    """worker ตายระหว่างทำงานนี้ครบจำนวนครั้งที่ยอมให้ลองซ้ำ"""
+
+
+# ====== ฝั่ง worker process ======
+def _attach(name):
+    """เปิด shared memory ที่ parent สร้างไว้
+
+    worker ที่ spawn ใช้ resource tracker ตัวเดียวกับ parent — การ register ซ้ำไม่มีผล และ parent
+    เป็นคน unlink เสมอ (3.13+ ปิดการ track ฝั่ง worker ไปเลย)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def load_easyocr_reader(torch_threads):
+    """reader ของ worker (ค่าเริ่มต้น): EasyOCR ที่จำกัด torch thread แล้ว warm-up"""
+    import torch
+    from utils.model_registry import _load_easyocr, _warmup_easyocr
+
+    torch.set_num_threads(torch_threads)
+    reader = _load_easyocr()
+    _warmup_easyocr(reader)
+    return reader
+
+
+def _worker_main(idx, cores, torch_threads, task_q, result_q, max_tasks, max_rss_mb, load_reader):
+    # ต้องตั้งก่อน import torch — ไม่งั้น OpenMP เปิด thread เท่าจำนวน core ทั้งเครื่องในทุก worker
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(torch_threads)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    from utils.model_registry import current_rss_mb
+
+    reader = load_reader(torch_threads)
+    result_q.put(("ready", idx, os.getpid()))
+
+    done = 0
+    while True:
+        task = task_q.get()
+        if task is None:
+            return
+        task_id, shm_name, shape, dtype, kwargs = task
+        try:
+            shm = _attach(shm_name)
+            try:
+                img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                result = reader.readtext(img, **kwargs)
+                del img
+            finally:
+                shm.close()
+            result_q.put(("done", idx, task_id, result, None))
+        except Exception as e:
+            result_q.put(("done", idx, task_id, None, f"{type(e).__name__}: {e}"))
+
+        done += 1
+        if (max_tasks and done >= max_tasks) or (max_rss_mb and current_rss_mb() > max_rss_mb):
+            result_q.put(("retire", idx, f"tasks={done} rss_mb={current_rss_mb()}"))
+            return
+
+
+# ====== ฝั่ง parent ======
+class _Task:
+    __slots__ = ("id", "shm", "shape", "dtype", "kwargs", "future", "attempts")
+
+
+class OcrProcessPool:
+    def __init__(self, workers=2, torch_threads=1, max_inflight=None, submit_timeout=10.0,
+                 max_tasks=0, max_rss_mb=0, load_reader=load_easyocr_reader):
+        """load_reader(torch_threads) → reader ใน worker — ต้องเป็นฟังก์ชันระดับ module (spawn ส่งไปด้วย pickle)"""
+        self.workers = workers
+        self.load_reader = load_reader
+        self.torch_threads = torch_threads
+        self.max_inflight = max_inflight or workers * 2
+        self.submit_timeout = submit_timeout
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+
+        # spawn: worker เริ่มจาก interpreter ใหม่ ไม่ได้ fork thread / lock ของ Flask process มาด้วย
+        self._ctx = mp.get_context("spawn")
+        self._result_q = self._ctx.Queue()
+        self._procs = {}
+        self._queues = {}       # worker idx → คิวงานของ worker ตัวนั้น
+        self._assigned = {}     # worker idx → {task_id: _Task} ตามลำดับที่ส่ง (ตัวแรก = ตัวที่กำลังทำ)
+        self._ready = set()
+        self._tasks = {}        # task_id → _Task ที่ยังไม่เสร็จ
+        self._ids = itertools.count(1)
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._lock = threading.Lock()
+        self._ready_cond = threading.Condition(self._lock)
+        self._stopped = False
+        self._startup_failures = 0
+        self._groups = []
+        self.error = None
+        self._stats = {"completed": 0, "failed": 0, "retried": 0, "restarts": 0, "busy_rejections": 0}
+
+    # --- lifecycle ---
+    def _core_groups(self):
+        try:
+            cpus = sorted(os.sched_getaffinity(0))
+        except AttributeError:
+            return [None] * self.workers
+        n = self.torch_threads
+        return [[cpus[(i * n + k) % len(cpus)] for k in range(n)] for i in range(self.workers)]
+
+    def _spawn(self, idx):
+        task_q = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(idx, self._groups[idx], self.torch_threads, task_q, self._result_q,
+                  self.max_tasks, self.max_rss_mb, self.load_reader),
+            name=f"ocr-worker-{idx}",
+            daemon=True,
+        )
+        proc.start()
+        # สลับคิว / process ใน lock เดียว — submit ที่เข้ามาพร้อมกันจะไม่ส่งงานลงคิวของตัวเก่า
+        with self._ready_cond:
+            self._ready.discard(idx)
+            old_q = self._queues.get(idx)
+            orphans = list(self._assigned.get(idx, {}).values())
+            self._queues[idx] = task_q
+            self._assigned[idx] = {}
+            self._procs[idx] = proc
+        if old_q is not None:
+            old_q.close()
+        return orphans
+
+    def start(self):
+        self._groups = self._core_groups()
+        for idx in range(self.workers):
+            self._spawn(idx)
+        threading.Thread(target=self._collect, name="ocr-pool-collector", daemon=True).start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """รอจน worker ทุกตัวโหลดโมเดลเสร็จ — คืน True ถ้าพร้อมทันเวลา"""
+        with self._ready_cond:
+            self._ready_cond.wait_for(lambda: len(self._ready) == self.workers or self.error, timeout=timeout)
+            return len(self._ready) == self.workers
+
+    def shutdown(self, timeout=5.0):
+        self._stopped = True
+        for task_q in self._queues.values():
+            task_q.put(None)
+        for proc in self._procs.values():
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+
+    # --- งาน ---
+    def submit(self, img, **kwargs):
+        """ส่งภาพ (numpy array) ไป OCR — คืน concurrent.futures.Future ของผล reader.readtext"""
+        if self.error:
+            raise RuntimeError(f"OCR pool unavailable: {self.error}")
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            self._stats["busy_rejections"] += 1
+            raise PoolBusyError(f"OCR pool busy ({self.max_inflight} in flight)")
+
+        img = np.ascontiguousarray(img)
+        task = _Task()
+        task.id = next(self._ids)
+        task.shm = shared_memory.SharedMemory(create=True, size=max(img.nbytes, 1))
+        np.ndarray(img.shape, dtype=img.dtype, buffer=task.shm.buf)[...] = img
+        task.shape, task.dtype, task.kwargs = img.shape, img.dtype.str, kwargs
+        task.future = Future()
+        task.future.ocr_task_id = task.id
+        task.attempts = 1
+        with self._lock:
+            self._tasks[task.id] = task
+            self._dispatch(task)
+        return task.future
+
+    def readtext(self, img, timeout=None, **kwargs):
+        return self.result(self.submit(img, **kwargs), timeout)
+
+    def result(self, future, timeout=None):
+        """รอผล — หมดเวลาแล้วทิ้งงานนั้น (คืน slot + shared memory) ผลที่มาทีหลังจะถูกเมิน"""
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            with self._lock:
+                task = self._tasks.get(future.ocr_task_id)
+            if task is not None:
+                self._finish(task, error=TimeoutError(f"OCR task {task.id} timed out after {timeout}s"))
+            raise
+
+    def _dispatch(self, task):
+        """ส่งงานให้ worker ที่งานค้างน้อยที่สุด (ตัวที่โหลดเสร็จแล้วก่อน) — เรียกขณะถือ self._lock"""
+        idx = min(self._assigned, key=lambda i: (i not in self._ready, len(self._assigned[i])))
+        self._assigned[idx][task.id] = task
+        self._queues[idx].put((task.id, task.shm.name, task.shape, task.dtype, task.kwargs))
+
+    def _finish(self, task, result=None, error=None):
+        with self._lock:
+            if self._tasks.pop(task.id, None) is None:
+                return  # เสร็จไปแล้ว (เช่นหมดเวลาพร้อมกับที่ผลมาถึง)
+            for assigned in self._assigned.values():
+                assigned.pop(task.id, None)
+        task.shm.close()
+        task.shm.unlink()
+        self._slots.release()
+        if error is None:
+            self._stats["completed"] += 1
+            task.future.set_result(result)
+        else:
+            self._stats["failed"] += 1
+            task.future.set_exception(error)
+
+    # --- รับผลจาก worker + ดูแล worker ที่ตาย ---
+    def _collect(self):
+        while not self._stopped:
+            try:
+                msg = self._result_q.get(timeout=MONITOR_INTERVAL)
+            except queue.Empty:
+                msg = None
+            if msg is not None:
+                self._handle(msg)
+            self._check_workers()
+
+    def _handle(self, msg):
+        kind, idx = msg[0], msg[1]
+        if kind == "ready":
+            with self._ready_cond:
+                self._startup_failures = 0
+                self._ready.add(idx)
+                self._ready_cond.notify_all()
+        elif kind == "done":
+            _, _, task_id, result, error = msg
+            task = self._tasks.get(task_id)
+            if task is not None:
+                self._finish(task, result, RuntimeError(error) if error else None)
+        elif kind == "retire":
+            print(f"[OCR POOL] worker {idx} retiring ({msg[2]})")
+            self._procs[idx].join(5)
+            self._restart(idx, crashed=False)
+
+    def _check_workers(self):
+        if self.error:
+            return
+        for idx, proc in list(self._procs.items()):
+            if proc.is_alive() or self._stopped:
+                continue
+            # ข้อความที่ worker ส่งก่อนตายอาจยังค้างในคิว — เก็บให้หมดก่อนตัดสินว่างานไหนค้าง
+            while True:
+                try:
+                    self._handle(self._result_q.get_nowait())
+                except queue.Empty:
+                    break
+            if self._procs[idx] is not proc:
+                continue  # ถูกแทนแล้วตอน retire
+            print(f"[ERROR ocr pool] worker {idx} died (exitcode={proc.exitcode})")
+            if idx not in self._ready:
+                self._startup_failures += 1
+                if self._startup_failures >= STARTUP_FAILURES:
+                    self._give_up(f"workers keep dying during model load (last exitcode={proc.exitcode})")
+                    return
+            self._restart(idx, crashed=True)
+
+    def _restart(self, idx, crashed):
+        """แทน worker idx ด้วยตัวใหม่ แล้วย้ายงานที่ค้างในคิวของตัวเก่าไปตัวอื่น
+
+        คิวของ worker ทำงานตามลำดับ งานแรกที่ยังไม่เสร็จจึงเป็นงานที่กำลังทำตอนตาย — นับเป็นการลองหนึ่งครั้ง
+        """
+        if self._stopped:
+            return
+        self._stats["restarts"] += 1
+        orphans = self._spawn(idx)
+
+        for k, task in enumerate(orphans):
+            if crashed and k == 0:
+                if task.attempts > TASK_RETRIES:
+                    self._finish(task, error=WorkerCrashedError(f"worker {idx} exited while running task {task.id}"))
+                    continue
+                task.attempts += 1
+                self._stats["retried"] += 1
+            with self._lock:
+                if task.id in self._tasks:
+                    self._dispatch(task)
+
+    def _give_up(self, reason):
+        """หยุด restart worker และตีงานที่ค้างทั้งหมดให้ล้ม — submit หลังจากนี้ล้มทันที"""
+        print("[ERROR ocr pool]", reason)
+        with self._ready_cond:
+            self.error = reason
+            self._ready_cond.notify_all()
+            pending = list(self._tasks.values())
+        for task in pending:
+            self._finish(task, error=RuntimeError(reason))
+        self.shutdown()
+
+    def ready(self):
+        return len(self._ready) == self.workers
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._tasks)
+            queued = {idx: len(a) for idx, a in self._assigned.items()}
+        return {
+            "workers": self.workers,
+            "ready_workers": len(self._ready),
+            "error": self.error,
+            "torch_threads": self.torch_threads,
+            "core_groups": self._groups,
+            "max_inflight": self.max_inflight,
+            "in_flight": in_flight,
+            "queued_per_worker": queued,
+            "pids": {idx: p.pid for idx, p in self._procs.items()},
+            **self._stats,
+        }
+
+
+class PooledReader:
+    """หน้าตาเหมือน easyocr.Reader (readtext / readtext_batched) แต่ส่งงานเข้า OcrProcessPool"""
+
+    def __init__(self, pool, task_timeout=None):
+        self.pool = pool
+        self.task_timeout = task_timeout
+
+    def readtext(self, img, **kwargs):
+        return self.pool.readtext(img, timeout=self.task_timeout, **kwargs)
+
+    def readtext_batched(self, images, n_width=None, n_height=None, batch_size=None, **kwargs):
+        """กระจายภาพไปทุก worker พร้อมกัน (ไม่ resize เป็นขนาดเดียวกันเหมือน EasyOCR batched)"""
+        futures = [self.pool.submit(img, **kwargs) for img in images]
+        return [self.pool.result(f, self.task_timeout) for f in futures]
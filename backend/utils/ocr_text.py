@@ -0,0 +1,61 @@
+"""ข้อความ OCR ดิบที่เก็บคู่กับผลแต่ละใบ — ใช้ extract ฟิลด์ใหม่ได้โดยไม่ต้อง OCR ภาพซ้ำ (ดู utils/reextract.py)
+
+payload (dict) บีบอัดด้วย zlib ก่อนเก็บลง OcrResult.ocr_text_z / OcrCacheEntry.ocr_text_z
+    {"v": 1, "mode": "roi" | "full",
+     "texts": {roi: ข้อความ} (โหมด roi) หรือ {"full": ข้อความทั้งภาพ},
+     "alt_texts": [ข้อความทั้งภาพจาก recipe สำรอง ตามลำดับที่อ่านซ้ำ]}   ← มีเฉพาะโหมด full
+โหมด roi เก็บข้อความของ ROI หลังอ่านซ้ำแล้ว (ROI ที่แก้ได้ถูกแทนที่ใน texts แล้ว)
+engine รันแบบ detail=0 จึงไม่มีกล่องคำให้เก็บ
+"""
+import json
+import zlib
+
+from utils.field_extractor import extract_fields, extract_roi_fields, invalid_fields
+
+OCR_TEXT_FORMAT = 1
+COMPRESS_LEVEL = 6
+
+
+def ocr_text_payload(card, raw_text=""):
+    """payload จาก card ของ run_ocr — card=None ถือเป็น OCR ทั้งภาพครั้งเดียว (raw_text)"""
+    if card is None:
+        return {"v": OCR_TEXT_FORMAT, "mode": "full", "texts": {"full": raw_text or ""}, "alt_texts": []}
+    return {
+        "v": OCR_TEXT_FORMAT,
+        "mode": card["mode"],
+        "texts": dict(card["texts"]),
+        "alt_texts": list(card["preprocess"].get("alt_texts", [])),
+    }
+
+
+def pack_ocr_text(payload):
+    if not payload:
+        return None
+    return zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), COMPRESS_LEVEL)
+
+
+def unpack_ocr_text(blob):
+    if not blob:
+        return None
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def extract_from_ocr_text(payload, ner):
+    """ทำขั้น extract ของ run_ocr ซ้ำจากข้อความที่เก็บไว้ (รวมการรับฟิลด์จาก recipe สำรองในโหมด full)"""
+    if payload["mode"] == "roi":
+        return extract_roi_fields(payload["texts"])
+
+    raw = {}
+    data = extract_fields(payload["texts"]["full"], ner, raw=raw)
+    bad = invalid_fields(data, raw)
+    for alt_text in payload.get("alt_texts", []):
+        if not bad:
+            break
+        alt_raw = {}
+        alt_data = extract_fields(alt_text, ner, raw=alt_raw)
+        alt_bad = set(invalid_fields(alt_data, alt_raw))
+        fixed = [f for f in bad if f not in alt_bad]
+        for f in fixed:
+            data[f] = alt_data[f]
+        bad = [f for f in bad if f not in fixed]
+    return data
@@ -0,0 +1,145 @@
+"""Preprocess แบบปรับตามคุณภาพภาพ — วัดคุณภาพราคาถูกแล้วเลือก recipe แทนการ blur ทุกภาพเหมือนกัน
+
+- assess_quality: ความคม (variance ของ Laplacian), noise, ความสว่าง, contrast และมุมเอียง — วัดบนภาพย่อ
+  (~5 ms; มุมเอียงใช้ Hough อีก ~10 ms จึงวัดเฉพาะภาพทั้งใบที่ไม่ได้ผ่าน warp บัตร)
+- choose_recipe: noise สูง → Gaussian แบบเดิม, มืด → CLAHE, คม → ไม่ blur, contrast ต่ำ → CLAHE,
+  ที่เหลือ → Gaussian — ภาพที่เอียงต่อท้ายด้วย +deskew
+- retry_recipes: recipe สำรองสำหรับอ่านซ้ำ เฉพาะตอนฟิลด์ที่ได้ไม่ผ่านการตรวจ
+"""
+import cv2
+import numpy as np
+
+QUALITY_MAX_SIDE = 640    # ย่อก่อนวัดคุณภาพ
+NOISE_CROP = 512          # noise วัดบนภาพขนาดจริงตรงกลาง (การย่อเฉลี่ย noise ทิ้งไปเกือบหมด)
+SHARP_VAR = 300.0         # variance ของ Laplacian ≥ นี้ถือว่าคม (สแกน) — ไม่ต้อง blur
+NOISE_SIGMA = 3.0         # noise (ส่วนเบี่ยงเบน, ระดับเทา) ≥ นี้ต้อง blur — Laplacian สูงเพราะ noise ไม่ใช่เพราะคม
+DARK = 80                 # ความสว่างเฉลี่ยต่ำกว่านี้ → CLAHE
+LOW_CONTRAST = 20         # ส่วนเบี่ยงเบนมาตรฐานของความสว่างต่ำกว่านี้ (และไม่คม) → CLAHE
+DESKEW_MIN_DEG = 1.0      # เอียงน้อยกว่านี้ไม่หมุน
+DESKEW_MAX_DEG = 30.0     # เส้นที่เอียงเกินนี้ไม่ใช่บรรทัดข้อความ
+
+RETRY_ORDER = ("clahe", "threshold", "gaussian", "sharp")
+
+
+# ====== วัดคุณภาพ ======
+def to_gray(img):
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def estimate_skew(small):
+    """มุมเอียงของบรรทัดข้อความ (องศา, บวก = ทวนเข็ม) จากค่ามัธยฐานของเส้นเกือบแนวนอน"""
+    edges = cv2.Canny(small, 50, 150)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=80,
+                            minLineLength=small.shape[1] // 6, maxLineGap=10)
+    if lines is None:
+        return 0.0
+    angles = []
+    for x0, y0, x1, y1 in lines.reshape(-1, 4):
+        angle = np.degrees(np.arctan2(y0 - y1, x1 - x0))
+        if abs(angle) <= DESKEW_MAX_DEG:
+            angles.append(angle)
+    return round(float(np.median(angles)), 2) if angles else 0.0
+
+
+# Immerkær (1996): noise ประมาณจาก Laplacian สองชั้นที่ตัดโครงสร้างภาพ (ขอบ / เส้นตรง) ออกเกือบหมด
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+
+def estimate_noise(gray):
+    h, w = gray.shape[:2]
+    y0, x0 = max(0, (h - NOISE_CROP) // 2), max(0, (w - NOISE_CROP) // 2)
+    crop = gray[y0:y0 + NOISE_CROP, x0:x0 + NOISE_CROP]
+    h, w = crop.shape[:2]
+    if h < 3 or w < 3:
+        return 0.0
+    conv = cv2.filter2D(crop.astype(np.float32), -1, _NOISE_KERNEL)[1:-1, 1:-1]
+    return round(float(np.abs(conv).sum() * np.sqrt(np.pi / 2) / (6 * (w - 2) * (h - 2))), 2)
+
+
+def assess_quality(gray, with_skew=True):
+    """คืน {"sharpness", "noise", "brightness", "contrast", "skew_deg"} ของภาพ grayscale"""
+    h, w = gray.shape[:2]
+    scale = min(1.0, QUALITY_MAX_SIDE / max(h, w))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    mean, std = cv2.meanStdDev(small)
+    return {
+        "sharpness": round(float(cv2.Laplacian(small, cv2.CV_64F).var()), 1),
+        "noise": estimate_noise(gray),
+        "brightness": round(float(mean[0][0]), 1),
+        "contrast": round(float(std[0][0]), 1),
+        "skew_deg": estimate_skew(small) if with_skew else 0.0,
+    }
+
+
+# ====== Recipes ======
+def _gaussian(gray):
+    return cv2.GaussianBlur(gray, (5, 5), 0)
+
+
+def _sharp(gray):
+    return gray
+
+
+def _clahe(gray):
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+
+
+def _threshold(gray):
+    # แสงไม่สม่ำเสมอ / เงา — แยกตัวอักษรออกจากพื้นด้วย threshold เฉพาะที่
+    return cv2.adaptiveThreshold(cv2.GaussianBlur(gray, (3, 3), 0), 255,
+                                 cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+
+
+RECIPES = {
+    "gaussian": _gaussian,
+    "sharp": _sharp,
+    "clahe": _clahe,
+    "threshold": _threshold,
+}
+
+
+def rotate(gray, angle):
+    h, w = gray.shape[:2]
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0)
+    return cv2.warpAffine(gray, M, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def choose_recipe(quality):
+    if quality["noise"] >= NOISE_SIGMA:
+        recipe = "gaussian"
+    elif quality["brightness"] < DARK:
+        recipe = "clahe"
+    elif quality["sharpness"] >= SHARP_VAR:
+        recipe = "sharp"
+    elif quality["contrast"] < LOW_CONTRAST:
+        recipe = "clahe"
+    else:
+        recipe = "gaussian"
+    if abs(quality["skew_deg"]) >= DESKEW_MIN_DEG:
+        recipe += "+deskew"
+    return recipe
+
+
+def apply_recipe(gray, recipe, quality):
+    """recipe = ชื่อใน RECIPES ต่อท้ายด้วย "+deskew" ได้"""
+    name, _, extra = recipe.partition("+")
+    if extra == "deskew":
+        gray = rotate(gray, quality["skew_deg"])
+    return RECIPES[name](gray)
+
+
+def retry_recipes(recipe, n):
+    """recipe สำรอง n ตัวตามลำดับ RETRY_ORDER (ไม่ซ้ำตัวแรก, คง +deskew ไว้)"""
+    name, sep, extra = recipe.partition("+")
+    return [r + sep + extra for r in RETRY_ORDER if r != name][:n]
+
+
+def preprocess_adaptive(img, deskew=True):
+    """คืน (processed, gray, recipe, quality) — gray เก็บไว้ให้ลอง recipe อื่นซ้ำได้โดยไม่ต้องแปลงใหม่
+
+    deskew=False สำหรับบัตรที่ warp แล้ว (ตรงอยู่แล้ว — ไม่ต้องเสียเวลาวัดมุม)
+    """
+    gray = to_gray(img)
+    quality = assess_quality(gray, with_skew=deskew)
+    recipe = choose_recipe(quality)
+    return apply_recipe(gray, recipe, quality), gray, recipe, quality
@@ -0,0 +1,154 @@
+"""Re-extract ฟิลด์ของ OcrResult จากข้อความ OCR ที่เก็บไว้ (ocr_text_z) — ไม่ต้อง OCR ภาพใหม่
+
+ใช้หลังแก้ extract_fields / normalizer (และเพิ่ม EXTRACTOR_VERSION หรือ NORMALIZER_VERSION แล้ว)
+- อ่านเฉพาะแถว draft ที่ extractor_version ไม่ตรงกับเวอร์ชันปัจจุบัน ทีละ chunk (keyset ตาม id — หน่วยความจำคงที่)
+- chunk ถัดไปถูกส่งให้ process pool (spawn, ThaiNER หนึ่งตัวต่อ worker) ระหว่างเขียนผลของ chunk ก่อนหน้าลง DB
+- แถวที่ไม่มีข้อความ OCR (สร้างก่อนมีคอลัมน์ ocr_text_z) ข้ามไป — นับไว้ใน skipped_no_text
+- แถวที่ผู้ใช้แก้แล้ว (is_draft=False) ไม่ถูกแตะ
+
+รัน (จากโฟลเดอร์ backend):
+    python -m utils.reextract                      # REEXTRACT_WORKERS / REEXTRACT_CHUNK_SIZE จาก config
+    python -m utils.reextract --workers 4 --dry-run
+หรือ POST /reextract (รันใน thread ของ Flask — ดูความคืบหน้าที่ GET /reextract)
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from sqlalchemy import or_
+
+from database import db
+from database.models import OcrResult
+from utils.metrics import metrics
+from utils.model_registry import get_ner
+from utils.ocr_text import extract_from_ocr_text, unpack_ocr_text
+
+FIELDS = ["id_number", "prefix", "first_name", "last_name", "dob", "address"]
+
+metrics.describe("reextract_rows_total", "Draft rows re-extracted from stored OCR text, by result")
+
+
+def _extract_row(item):
+    """(id, ocr_text_z) → (id, fields หรือ None, error) — รันใน worker process"""
+    row_id, blob = item
+    try:
+        return row_id, extract_from_ocr_text(unpack_ocr_text(blob), get_ner()), None
+    except Exception as e:
+        return row_id, None, f"{type(e).__name__}: {e}"
+
+
+def _stale_filter(version):
+    return (
+        OcrResult.is_draft.is_(True),
+        or_(OcrResult.extractor_version.is_(None), OcrResult.extractor_version != version),
+    )
+
+
+def _stale_chunks(version, chunk_size, limit=None):
+    """แถวที่ต้อง re-extract ทีละ chunk เรียงตาม id — ไม่ใช้ OFFSET จึงไม่ช้าลงเมื่อเลื่อนลึก"""
+    after_id, seen = 0, 0
+    columns = [OcrResult.id, OcrResult.ocr_text_z] + [getattr(OcrResult, f) for f in FIELDS]
+    while limit is None or seen < limit:
+        n = chunk_size if limit is None else min(chunk_size, limit - seen)
+        rows = (
+            db.session.query(*columns)
+            .filter(*_stale_filter(version), OcrResult.ocr_text_z.isnot(None), OcrResult.id > after_id)
+            .order_by(OcrResult.id.asc())
+            .limit(n)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+        seen += len(rows)
+
+
+def _write(rows, results, version, stats, dry_run):
+    old = {r.id: r for r in rows}
+    updates = []
+    for row_id, data, error in results:
+        if error is not None:
+            print("[ERROR reextract]", row_id, error)
+            stats["failed"] += 1
+            metrics.inc("reextract_rows_total", result="failed")
+            continue
+        changed = any((getattr(old[row_id], f) or "") != (data.get(f) or "") for f in FIELDS)
+        result = "changed" if changed else "unchanged"
+        stats[result] += 1
+        metrics.inc("reextract_rows_total", result=result)
+        updates.append({"id": row_id, "extractor_version": version, **{f: data.get(f) for f in FIELDS}})
+    stats["scanned"] += len(rows)
+    if updates and not dry_run:
+        db.session.bulk_update_mappings(OcrResult, updates)
+        db.session.commit()
+
+
+def run_reextract(version, workers=2, chunk_size=500, limit=None, dry_run=False, progress=None):
+    """re-extract แถว draft ที่เวอร์ชันไม่ตรงกับ version — ต้องรันใน app context
+
+    workers=0 รันใน process นี้ (ใช้ ThaiNER ที่โหลดไว้แล้ว); progress(stats) ถูกเรียกหลังเขียนแต่ละ chunk
+    dry_run=True ไม่เขียน DB — ใช้ดูว่าการแก้ extractor เปลี่ยนผลกี่แถว
+    """
+    stats = {
+        "version": version, "dry_run": dry_run, "scanned": 0, "changed": 0, "unchanged": 0, "failed": 0,
+        "skipped_no_text": db.session.query(OcrResult.id)
+        .filter(*_stale_filter(version), OcrResult.ocr_text_z.is_(None)).count(),
+    }
+    t0 = time.perf_counter()
+    pool = multiprocessing.get_context("spawn").Pool(workers) if workers > 0 else None
+    try:
+        pending = None   # (rows, ผลของ chunk ก่อนหน้า) — เขียนลง DB ระหว่างที่ pool ทำ chunk ถัดไป
+        for rows in _stale_chunks(version, chunk_size, limit):
+            items = [(r.id, r.ocr_text_z) for r in rows]
+            if pool is not None:
+                job = pool.map_async(_extract_row, items, chunksize=max(1, len(items) // (workers * 4)))
+            else:
+                job = list(map(_extract_row, items))
+            if pending is not None:
+                _write(pending[0], _results(pending[1]), version, stats, dry_run)
+                if progress:
+                    progress(stats)
+            pending = (rows, job)
+        if pending is not None:
+            _write(pending[0], _results(pending[1]), version, stats, dry_run)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    if progress:
+        progress(stats)
+    return stats
+
+
+def _results(job):
+    return job if isinstance(job, list) else job.get()
+
+
+def main(argv=None):
+    from migrations import make_app
+    from routes.ocr_routes import extraction_version
+
+    app = make_app()
+    parser = argparse.ArgumentParser(description="Re-extract draft OCR results from stored OCR text")
+    parser.add_argument("--workers", type=int, default=app.config["REEXTRACT_WORKERS"], help="0 = ไม่ใช้ process pool")
+    parser.add_argument("--chunk-size", type=int, default=app.config["REEXTRACT_CHUNK_SIZE"])
+    parser.add_argument("--limit", type=int, help="จำนวนแถวสูงสุดในรอบนี้")
+    parser.add_argument("--dry-run", action="store_true", help="ไม่เขียน DB — รายงานจำนวนแถวที่ผลเปลี่ยน")
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        version = extraction_version()
+        print(f"[REEXTRACT] target version {version}, {args.workers} workers, chunk {args.chunk_size}")
+        stats = run_reextract(
+            version, workers=args.workers, chunk_size=args.chunk_size, limit=args.limit, dry_run=args.dry_run,
+            progress=lambda s: print(f"[REEXTRACT] {s['scanned']} rows ({s['changed']} changed, {s['failed']} failed)"),
+        )
+    print(f"[REEXTRACT] done in {stats['seconds']}s: {stats}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
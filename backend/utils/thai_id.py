@@ -0,0 +1,299 @@
+"""ตรวจ / แก้เลขบัตรประชาชน 13 หลัก (checksum mod 11) โดยจัดอันดับด้วย confusion matrix ของ OCR
+
+checksum: S = Σ d[i] * (13 - i) สำหรับ i = 0..11 และหลักสุดท้ายต้องเท่ากับ (11 - S % 11) % 10
+เมื่อเปลี่ยนหลัก i จาก a เป็น b → S' = S + (13 - i) * (b - a) จึงไม่ต้องคำนวณ S ใหม่ทั้งก้อน
+หลักแรก (ประเภทบุคคล) ต้องเป็น 0–8 — ไม่มีเลขบัตรที่ขึ้นต้นด้วย 9 (0 = บุคคลที่ไม่มีสัญชาติไทย)
+"""
+from operator import mul
+
+import numpy as np
+
+WEIGHTS = tuple(13 - i for i in range(12))
+W = np.array(WEIGHTS, dtype=np.int64)
+MAX_FIRST_DIGIT = 8
+
+# ====== ความน่าจะเป็นที่ OCR อ่านเลข a เป็น b (สมมาตร) ======
+_CONFUSED_PAIRS = {
+    (1, 7): 0.90, (0, 8): 0.80, (5, 6): 0.80, (3, 8): 0.70, (6, 8): 0.60,
+    (8, 9): 0.50, (0, 6): 0.50, (0, 9): 0.50, (4, 9): 0.50, (1, 4): 0.40,
+    (2, 7): 0.40, (3, 5): 0.40, (5, 9): 0.30, (2, 3): 0.30, (3, 9): 0.30,
+    (6, 9): 0.30, (5, 8): 0.30, (1, 2): 0.20, (0, 3): 0.20, (7, 9): 0.20,
+}
+BASE_CONFUSION = 0.05        # คู่ที่ไม่อยู่ในตาราง
+TRANSPOSITION_PRIOR = 0.30   # สลับสองหลักติดกัน
+TWO_DIGIT_PENALTY = 0.25     # คูณเพิ่มเมื่อผิดสองหลัก (เกิดน้อยกว่าผิดหลักเดียว)
+
+CONFUSION = np.full((10, 10), BASE_CONFUSION)
+np.fill_diagonal(CONFUSION, 0.0)
+for (a, b), p in _CONFUSED_PAIRS.items():
+    CONFUSION[a, b] = CONFUSION[b, a] = p
+_CONFUSION_ROWS = CONFUSION.tolist()   # อ่านทีละค่าใน id_candidates — list เร็วกว่า index ของ ndarray
+
+# หลักตรวจสอบ c ↔ เศษ S % 11 ที่ให้ c (c = 1 ได้สองค่า: 0 และ 10) และตัวผกผันของน้ำหนัก mod 11
+# → หลัก i ที่ต้องเปลี่ยนเป็น b ≡ d[i] + (r - S) * w⁻¹ (mod 11) คำนวณตรงได้ ไม่ต้องลองทั้ง 10 ค่า
+_RESIDUES = tuple(tuple(r for r in range(11) if (11 - r) % 10 == c) for c in range(10))
+_INV_WEIGHTS = tuple(pow(w, -1, 11) if w % 11 else None for w in WEIGHTS)
+_ZERO_SUM = ord("0") * sum(WEIGHTS)   # ผลรวมถ่วงน้ำหนักของรหัส ASCII ต้องหักส่วนนี้ออก
+
+
+def checksum_sum(digits):
+    return sum(map(mul, digits, WEIGHTS))   # WEIGHTS มี 12 ตัว — map หยุดก่อนหลักตรวจสอบ
+
+
+def check_digit(s):
+    return (11 - s % 11) % 10
+
+
+def is_valid(d13):
+    if len(d13) != 13 or not (d13.isascii() and d13.isdigit()):
+        return False
+    # เรียกทุกฟิลด์ id_number — คูณรหัส ASCII ตรง ๆ เร็วกว่าแปลงทีละหลักด้วย int()
+    raw = d13.encode()
+    s = sum(map(mul, raw, WEIGHTS)) - _ZERO_SUM
+    return check_digit(s) == raw[12] - ord("0") and raw[0] - ord("0") <= MAX_FIRST_DIGIT
+
+
+# ====== แก้เลขบัตรแบบคืนผู้สมัครหลายตัวพร้อมคะแนน ======
+def id_candidates(d13, top_k=5, transpositions=True, two_digit=False):
+    """คืน list ของ {"id", "score", "confidence", "edit"} เรียงจากน่าจะเป็นที่สุด
+
+    - ผิดหนึ่งหลัก: คะแนน = CONFUSION[เดิม, ใหม่]
+    - สลับหลักติดกัน: คะแนน = TRANSPOSITION_PRIOR
+    - ผิดสองหลัก (two_digit=True): คะแนน = ผลคูณ confusion × TWO_DIGIT_PENALTY
+    ถ้าเลขถูกต้องอยู่แล้วจะคืนตัวเองเป็นผู้สมัครเดียว
+    """
+    if len(d13) != 13 or not (d13.isascii() and d13.isdigit()):
+        return []
+    zero = ord("0")
+    digits = [c - zero for c in d13.encode()]
+    s = checksum_sum(digits)
+    if check_digit(s) == digits[12] and digits[0] <= MAX_FIRST_DIGIT:
+        return [{"id": d13, "score": 1.0, "confidence": 1.0, "edit": "none"}]
+
+    # key = tuple ของ (ตำแหน่ง, หลักใหม่) เรียงตามตำแหน่ง — ผู้สมัครเดียวกันได้ key เดียวกันเสมอ
+    # (สร้าง string เฉพาะผู้สมัครที่คืน)
+    found = {}
+
+    def add(changes, score, edit):
+        key = tuple(changes)
+        if score > found.get(key, (0.0, None))[0]:
+            found[key] = (score, edit)
+
+    # ผิดหนึ่งหลัก: แก้สมการ mod 11 ต่อตำแหน่ง (หลักที่น้ำหนัก ≡ 0 mod 11 เปลี่ยนแล้ว checksum ไม่เปลี่ยน)
+    check, first = digits[12], digits[0]
+    for i in range(12):
+        inv = _INV_WEIGHTS[i]
+        if inv is None:
+            continue
+        a = digits[i]
+        for b in sorted([(a + (r - s) * inv) % 11 for r in _RESIDUES[check]]):
+            if b <= 9 and b != a and (b if i == 0 else first) <= MAX_FIRST_DIGIT:
+                add([(i, b)], _CONFUSION_ROWS[a][b], f"sub@{i}")
+    required = check_digit(s)
+    if first <= MAX_FIRST_DIGIT:
+        add([(12, required)], _CONFUSION_ROWS[check][required], "sub@12")
+
+    if transpositions:
+        for i in range(12):
+            a, b = digits[i], digits[i + 1]
+            if a == b or (b if i == 0 else first) > MAX_FIRST_DIGIT:
+                continue
+            if i < 11:
+                ok = check_digit(s + (WEIGHTS[i] - WEIGHTS[i + 1]) * (b - a)) == check
+            else:   # หลัก 11 ↔ หลักตรวจสอบ
+                ok = check_digit(s + WEIGHTS[11] * (b - a)) == a
+            if ok:
+                add([(i, b), (i + 1, a)], TRANSPOSITION_PRIOR, f"swap@{i}")
+
+    if two_digit:
+        # เปลี่ยนหลัก i เป็น b แล้วแก้สมการหาหลัก j เหมือนกรณีหลักเดียว (ไม่ลอง c ทั้ง 10 ค่า)
+        for i in range(13):
+            a = digits[i]
+            for j in range(i + 1, 13):
+                c_old = digits[j]
+                for b in range(10):
+                    if b == a or (b if i == 0 else first) > MAX_FIRST_DIGIT:
+                        continue
+                    s_i = s + WEIGHTS[i] * (b - a) if i < 12 else s
+                    if j == 12:
+                        news = (check_digit(s_i),)
+                    elif _INV_WEIGHTS[j] is None:   # หลักนี้ไม่มีผลต่อ checksum
+                        news = range(10) if check_digit(s_i) == check else ()
+                    else:
+                        news = sorted((c_old + (r - s_i) * _INV_WEIGHTS[j]) % 11 for r in _RESIDUES[check])
+                    p_i = _CONFUSION_ROWS[a][b] * TWO_DIGIT_PENALTY
+                    for c in news:
+                        if c <= 9 and c != c_old:
+                            add([(i, b), (j, c)], p_i * _CONFUSION_ROWS[c_old][c], f"sub@{i},{j}")
+
+    # คะแนนเท่ากัน → ตามลำดับที่พบ (ตำแหน่งซ้ายก่อน, แทนที่ก่อนสลับ) ให้ตรงกับ correct_ids_batch
+    ranked = sorted(found.items(), key=lambda kv: -kv[1][0])[:top_k]
+    total = float(sum(score for score, _ in found.values())) or 1.0
+    return [
+        {"id": _apply(d13, changes), "score": round(float(score), 4), "confidence": round(float(score) / total, 4),
+         "edit": edit}
+        for changes, (score, edit) in ranked
+    ]
+
+
+def _apply(d13, changes):
+    chars = list(d13)
+    for pos, new in changes:
+        chars[pos] = str(new)
+    return "".join(chars)
+
+
+def correct_id(d13, transpositions=True, two_digit=False):
+    """คืนผู้สมัครที่น่าจะเป็นที่สุด (หรือค่าเดิมถ้าแก้ไม่ได้) — ผลเดียวกับ id_candidates(top_k=1)
+
+    เรียกทุกเอกสาร จึงไม่สร้างรายการผู้สมัคร / ความมั่นใจ: เดินผู้สมัครลำดับเดียวกับ id_candidates
+    แล้วเก็บเฉพาะตัวแรกที่คะแนนสูงสุด (ผิดสองหลักยังใช้ id_candidates)
+    """
+    if two_digit:
+        cands = id_candidates(d13, top_k=1, transpositions=transpositions, two_digit=True)
+        return cands[0]["id"] if cands else d13
+    if len(d13) != 13 or not (d13.isascii() and d13.isdigit()):
+        return d13
+    zero = ord("0")
+    digits = [c - zero for c in d13.encode()]
+    s = checksum_sum(digits)
+    check, first = digits[12], digits[0]
+    required = check_digit(s)
+    if required == check and first <= MAX_FIRST_DIGIT:
+        return d13
+
+    best, best_score = None, 0.0
+    residues = _RESIDUES[check]
+    for i in range(12):
+        inv = _INV_WEIGHTS[i]
+        if inv is None:
+            continue
+        a = digits[i]
+        row = _CONFUSION_ROWS[a]
+        for r in residues:
+            b = (a + (r - s) * inv) % 11
+            if b <= 9 and b != a and (b if i == 0 else first) <= MAX_FIRST_DIGIT and row[b] > best_score:
+                best, best_score = ((i, b),), row[b]
+    if len(residues) > 1 and best is not None:
+        # สองเศษให้ b ไม่เรียงตามค่า — หาตัวแรกที่ได้คะแนนนี้ตามลำดับของ id_candidates อีกรอบ
+        best = _first_single(digits, s, residues, best_score)
+    if first <= MAX_FIRST_DIGIT and _CONFUSION_ROWS[check][required] > best_score:
+        best, best_score = ((12, required),), _CONFUSION_ROWS[check][required]
+
+    if transpositions and best_score < TRANSPOSITION_PRIOR:
+        for i in range(12):
+            a, b = digits[i], digits[i + 1]
+            if a == b or (b if i == 0 else first) > MAX_FIRST_DIGIT:
+                continue
+            if i < 11:
+                ok = check_digit(s + (WEIGHTS[i] - WEIGHTS[i + 1]) * (b - a)) == check
+            else:   # หลัก 11 ↔ หลักตรวจสอบ
+                ok = check_digit(s + WEIGHTS[11] * (b - a)) == a
+            if ok:
+                best = ((i, b), (i + 1, a))
+                break
+    return d13 if best is None else _apply(d13, best)
+
+
+def _first_single(digits, s, residues, score):
+    """หลักตรวจสอบ 1 มีสองเศษ (0, 10) — ผู้สมัครตัวแรกที่ได้ score ตามลำดับ (ตำแหน่ง, หลักใหม่) ของ id_candidates"""
+    first = digits[0]
+    for i in range(12):
+        inv = _INV_WEIGHTS[i]
+        if inv is None:
+            continue
+        a = digits[i]
+        for b in sorted((a + (r - s) * inv) % 11 for r in residues):
+            if b <= 9 and b != a and (b if i == 0 else first) <= MAX_FIRST_DIGIT and _CONFUSION_ROWS[a][b] == score:
+                return ((i, b),)
+
+
+# ====== Batch (NumPy) สำหรับประมวลผลข้อมูลย้อนหลังจำนวนมาก ======
+def _to_digit_matrix(ids):
+    """แปลง list ของ string เป็น (N, 13) int64 + mask ว่ารูปแบบถูก (13 หลักล้วน)"""
+    well_formed = np.array([len(x) == 13 and x.isascii() and x.isdigit() for x in ids], dtype=bool)
+    padded = [x if ok else "0" * 13 for x, ok in zip(ids, well_formed)]
+    raw = np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8).reshape(-1, 13)
+    return (raw - ord("0")).astype(np.int64), well_formed
+
+
+def validate_ids_batch(ids):
+    """ตรวจ checksum ของเลขบัตรหลายพันรายการพร้อมกัน — คืน bool array"""
+    if len(ids) == 0:
+        return np.zeros(0, dtype=bool)
+    D, well_formed = _to_digit_matrix(ids)
+    S = D[:, :12] @ W
+    ok = ((11 - S % 11) % 10 == D[:, 12]) & (D[:, 0] <= MAX_FIRST_DIGIT)
+    return ok & well_formed
+
+
+def correct_ids_batch(ids, transpositions=True):
+    """แก้เลขบัตรที่ checksum ผิดแบบ vectorized (ผิดหนึ่งหลัก + สลับหลักติดกัน) — ผลเหมือน correct_id ทุกรายการ
+
+    คืน (corrected: list[str], valid: bool array ก่อนแก้, changed: bool array, score: float array)
+    """
+    n = len(ids)
+    if n == 0:
+        empty = np.zeros(0)
+        return [], empty.astype(bool), empty.astype(bool), empty
+    D, well_formed = _to_digit_matrix(ids)
+    S = D[:, :12] @ W
+    first_ok = D[:, 0] <= MAX_FIRST_DIGIT
+    valid = ((11 - S % 11) % 10 == D[:, 12]) & first_ok & well_formed
+
+    B = np.arange(10)
+    # --- ผิดหนึ่งหลักที่ตำแหน่ง 0..11: S' = S + w_i (b - d_i) ---
+    S_sub = S[:, None, None] + W[None, :, None] * (B[None, None, :] - D[:, :12, None])  # (N, 12, 10)
+    ok_sub = (11 - S_sub % 11) % 10 == D[:, 12, None, None]
+    ok_sub[:, 0, :] &= B <= MAX_FIRST_DIGIT
+    ok_sub[:, 1:, :] &= first_ok[:, None, None]
+    score_sub = np.where(ok_sub, CONFUSION[D[:, :12]], 0.0)                               # (N, 12, 10)
+
+    # --- ผิดที่หลักตรวจสอบ (ตำแหน่ง 12) ---
+    required = (11 - S % 11) % 10
+    score_check = np.where(first_ok & (required != D[:, 12]), CONFUSION[D[:, 12], required], 0.0)
+
+    flat = score_sub.reshape(n, -1)
+    best_flat = flat.argmax(axis=1)
+    best_score = flat[np.arange(n), best_flat]
+    use_check = score_check > best_score
+    best_score = np.maximum(best_score, score_check)
+
+    # --- สลับหลักติดกัน (ตำแหน่ง 0..11 เหมือน id_candidates — 11 คือสลับกับหลักตรวจสอบ) ---
+    best_swap = np.full(n, -1)
+    if transpositions:
+        a, b = D[:, :11], D[:, 1:12]
+        S_swap = S[:, None] + (W[:11] - W[1:12])[None, :] * (b - a)
+        first_after = np.where(np.arange(11)[None, :] == 0, b, D[:, :1])
+        ok_swap = ((11 - S_swap % 11) % 10 == D[:, 12, None]) & (a != b) & (first_after <= MAX_FIRST_DIGIT)
+        # หลัก 11 ↔ หลักตรวจสอบ: S เปลี่ยนเฉพาะน้ำหนักของหลัก 11 และหลักตรวจสอบใหม่คือ d[11] เดิม
+        a11, check = D[:, 11], D[:, 12]
+        S_check = S + W[11] * (check - a11)
+        ok_check_swap = ((11 - S_check % 11) % 10 == a11) & (a11 != check) & first_ok
+        ok_swap = np.concatenate([ok_swap, ok_check_swap[:, None]], axis=1)                # (N, 12)
+        swap_score = np.where(ok_swap, TRANSPOSITION_PRIOR, 0.0)
+        swap_pos = swap_score.argmax(axis=1)
+        swap_best = swap_score[np.arange(n), swap_pos]
+        better = swap_best > best_score
+        best_swap = np.where(better, swap_pos, -1)
+        use_check &= ~better
+        best_score = np.maximum(best_score, swap_best)
+
+    fixable = ~valid & well_formed & (best_score > 0)
+    out = D.copy()
+    rows = np.nonzero(fixable)[0]
+    for r in rows:
+        if best_swap[r] >= 0:
+            p = best_swap[r]
+            out[r, p], out[r, p + 1] = D[r, p + 1], D[r, p]
+        elif use_check[r]:
+            out[r, 12] = required[r]
+        else:
+            pos, digit = divmod(int(best_flat[r]), 10)
+            out[r, pos] = digit
+
+    corrected = list(ids)
+    for r in rows:
+        corrected[r] = "".join(map(str, out[r]))
+    score = np.where(valid, 1.0, np.where(fixable, best_score, 0.0))
+    return corrected, valid, fixable, score
@@ -0,0 +1,256 @@
+"""ที่เก็บไฟล์อัปโหลดแบบ content-addressed — ชื่อไฟล์ = SHA-256 ของเนื้อไฟล์ (ไฟล์ชื่อซ้ำไม่ทับกัน, ไฟล์ซ้ำเก็บครั้งเดียว)
+
+โครงสร้างบนดิสก์ (LocalUploadStore):
+    <root>/originals/ab/cd/<sha256>.jpg                  ← ต้นฉบับ (ไม่ถูกลบ)
+    <root>/variants/<ชื่อ>-<version>/ab/cd/<sha256>.<ext>  ← ภาพย่อ / processed สร้างตอนถูกขอครั้งแรก
+แบ่ง shard สองชั้นตามเลขฐานสิบหกตัวแรก ๆ ไม่ให้ไดเรกทอรีเดียวมีไฟล์เป็นแสน
+variants เป็นแคช — จำกัดขนาดรวม (variants_max_bytes) แล้วลบไฟล์ที่ถูกใช้ล่าสุดนานที่สุดก่อน
+
+backend อื่น (เช่น object storage) ทำได้โดย implement UploadStore — route ใช้แค่ put / original / variant
+และ StoredFile.url (redirect) แทน path ได้
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from utils.image_io import decode_image_bytes
+
+RE_KEY = re.compile(r"^([0-9a-f]{64})(\.(?:jpg|jpeg|png))$")
+MIMETYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+# path (ไฟล์ในเครื่อง) หรือ url (backend ภายนอก) อย่างใดอย่างหนึ่ง
+StoredFile = namedtuple("StoredFile", "path url etag last_modified mimetype")
+# fn(img BGR) → img, ext = นามสกุลไฟล์ที่ encode, version = เปลี่ยนเมื่อวิธีสร้างเปลี่ยน (ไฟล์เก่าไม่ถูกใช้อีก)
+Variant = namedtuple("Variant", "fn ext version encode_params")
+
+
+def make_key(data, ext, digest=None):
+    """key = sha256 + นามสกุล (ตัวเล็ก) — digest ส่งมาได้ถ้าคำนวณไว้แล้ว (เช่น content_hash ของ OCR cache)"""
+    return (digest or hashlib.sha256(data).hexdigest()) + ext.lower()
+
+
+def valid_key(key):
+    return RE_KEY.match(key or "") is not None
+
+
+def thumbnail(max_side):
+    def fn(img):
+        h, w = img.shape[:2]
+        scale = max_side / max(h, w)
+        if scale >= 1.0:
+            return img
+        return cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return fn
+
+
+class UploadStore:
+    """interface ของที่เก็บไฟล์อัปโหลด"""
+
+    def __init__(self):
+        self.variants = {}
+
+    def register_variant(self, name, fn, ext=".jpg", version="1", encode_params=()):
+        self.variants[name] = Variant(fn, ext, version, tuple(encode_params))
+
+    def url(self, key, variant=None):
+        """path ที่เก็บใน DB / ส่งให้ frontend (ต่อท้าย base URL ของ backend)"""
+        return f"files/{key}/{variant}" if variant else f"files/{key}"
+
+    def put(self, data, ext, digest=None):
+        """เก็บไฟล์ คืน key — ไฟล์ที่มีอยู่แล้วไม่เขียนซ้ำ"""
+        raise NotImplementedError
+
+    def put_async(self, data, ext, digest=None):
+        """เหมือน put แต่เขียนนอก request thread — key ใช้ได้ทันที (original รอให้เขียนเสร็จก่อน)"""
+        return self.put(data, ext, digest)
+
+    def original(self, key):
+        """StoredFile ของต้นฉบับ หรือ None ถ้าไม่มี"""
+        raise NotImplementedError
+
+    def variant(self, key, name):
+        """StoredFile ของ variant (สร้างถ้ายังไม่มี) หรือ None ถ้าไม่มีต้นฉบับ"""
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class _DiskLru:
+    """ลำดับการใช้ไฟล์ใน variants/ (ในหน่วยความจำของ process) + ลบไฟล์เก่าเมื่อขนาดรวมเกิน max_bytes
+
+    ตอนเริ่มสแกนไดเรกทอรีครั้งเดียวเรียงตาม mtime — หลาย process ต่างคนต่างนับ จึงเป็นขอบเขตโดยประมาณ
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()   # path → size
+        self._bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _load(self):
+        found = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(found):
+            self._files[path] = size
+            self._bytes += size
+        self._loaded = True
+
+    def touch(self, path, size=None):
+        """บันทึกว่าเพิ่งใช้ path (size = ขนาดถ้าเพิ่งสร้าง) แล้วลบไฟล์เกินขนาด"""
+        evicted = []
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if size is not None:
+                self._bytes += size - self._files.pop(path, 0)
+                self._files[path] = size
+            elif path in self._files:
+                self._files.move_to_end(path)
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old, old_size = self._files.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(old)
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._files), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "evictions": self.evictions}
+
+
+class LocalUploadStore(UploadStore):
+    def __init__(self, root, variants_max_bytes=512 * 1024 * 1024, max_side=None):
+        super().__init__()
+        self.root = str(root)
+        self.max_side = max_side   # ด้านยาวสูงสุดตอน decode ต้นฉบับเพื่อสร้าง variant (เหมือนตอน OCR)
+        self._lru = _DiskLru(os.path.join(self.root, "variants"), variants_max_bytes)
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-store")
+        self._pending = {}   # key → Future ของไฟล์ที่ยังเขียนไม่เสร็จ
+        self._pending_lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "originals"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "variants"), exist_ok=True)
+
+    @staticmethod
+    def _shard(digest):
+        return os.path.join(digest[:2], digest[2:4])
+
+    def _original_path(self, key):
+        digest, _ = RE_KEY.match(key).groups()
+        return os.path.join(self.root, "originals", self._shard(digest), key)
+
+    def _variant_path(self, key, name):
+        digest, _ = RE_KEY.match(key).groups()
+        v = self.variants[name]
+        return os.path.join(self.root, "variants", f"{name}-{v.version}", self._shard(digest), digest + v.ext)
+
+    @staticmethod
+    def _write_atomic(path, data):
+        """เขียนไฟล์ชั่วคราวในไดเรกทอรีเดียวกันแล้ว rename — ไม่มีใครเห็นไฟล์ที่เขียนไม่ครบ"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _stored(path, etag, ext):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return StoredFile(path, None, etag, st.st_mtime, MIMETYPES.get(ext, "application/octet-stream"))
+
+    def put(self, data, ext, digest=None):
+        key = make_key(data, ext, digest)
+        path = self._original_path(key)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+        return key
+
+    def _put_logged(self, data, ext, digest):
+        try:
+            self.put(data, ext, digest)
+        except OSError as e:
+            print("[ERROR upload store]", e)
+
+    def put_async(self, data, ext, digest=None):
+        key = make_key(data, ext, digest)
+        if os.path.exists(self._original_path(key)):
+            return key
+        with self._pending_lock:
+            if key not in self._pending:
+                future = self._pool.submit(self._put_logged, data, ext, digest)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._pending.pop(key, None))
+        return key
+
+    def original(self, key):
+        if not valid_key(key):
+            return None
+        future = self._pending.get(key)
+        if future is not None:
+            future.result()   # frontend ขอภาพทันทีหลังอัปโหลด — รอให้เขียนเสร็จแทนการตอบ 404
+        digest, ext = RE_KEY.match(key).groups()
+        return self._stored(self._original_path(key), digest, ext)
+
+    def variant(self, key, name):
+        if not valid_key(key) or name not in self.variants:
+            return None
+        digest, _ = RE_KEY.match(key).groups()
+        v = self.variants[name]
+        path = self._variant_path(key, name)
+        etag = f"{digest}-{name}-{v.version}"
+
+        stored = self._stored(path, etag, v.ext)
+        if stored is not None:
+            self._lru.touch(path)
+            return stored
+
+        source = self.original(key)
+        if source is None:
+            return None
+        with open(source.path, "rb") as f:
+            img = decode_image_bytes(f.read(), max_side=self.max_side)
+        if img is None:
+            return None
+        ok, encoded = cv2.imencode(v.ext, v.fn(img), list(v.encode_params))
+        if not ok:
+            print("[ERROR upload store] cannot encode", name, key)
+            return None
+        data = encoded.tobytes()
+        self._write_atomic(path, data)
+        self._lru.touch(path, len(data))
+        return StoredFile(path, None, etag, time.time(), MIMETYPES.get(v.ext, "application/octet-stream"))
+
+    def stats(self):
+        return {"root": self.root, "variants": self._lru.stats()}
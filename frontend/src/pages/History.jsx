@@ -118,6 +118,14 @@ export default function History() {
                   >
                     <td className="py-4 border-b">{i + 1}</td>
                     <td className="py-4 border-b font-medium text-indigo-700">
+                      {item.thumbnail_path && (
+                        <img
+                          src={`http://127.0.0.1:5000/${item.thumbnail_path}`}
+                          alt={item.filename}
+                          loading="lazy"
+                          className="w-16 h-auto mx-auto mb-1 rounded"
+                        />
+                      )}
                       {item.filename}
                     </td>
                     <td className="py-4 border-b">{item.id_number}</td>